@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, Request, status, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from config.token import create_access_token
+from config.token import create_access_token, decode_token, oauth2_scheme
+from config.revocation import revocation_list
+from config.config import settings
+from config.ratelimit import login_throttle
 
 from config.database import get_db
 from models.usermodels import User
+from dto.userschema import LoginResponse
 
 from config.hashing import Hashing
 
@@ -12,10 +17,18 @@ from sqlalchemy.orm import Session
 router = APIRouter(tags=["Authentication"])
 
 
-@router.post("/login")
+@router.post("/login", response_model=LoginResponse)
 def login(
-    request: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    http_request: Request,
+    request: OAuth2PasswordRequestForm = Depends(),
+    db: Session = Depends(get_db),
 ):
+    if settings.RATE_LIMIT_ENABLED == "True":
+        # The client's own address: server.py applies X-Forwarded-For from
+        # FORWARDED_ALLOW_IPS, so behind nginx this is not the proxy's.
+        client = http_request.client
+        login_throttle.check(client.host if client else None, request.username)
+
     user = db.query(User).filter(User.email == request.username).first()
     if not user:
         raise HTTPException(
@@ -26,7 +39,7 @@ def login(
             status_code=status.HTTP_404_NOT_FOUND, detail=f"Incorrect password"
         )
 
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_access_token(data={"sub": user.email}, user=user)
 
     response = {
         "id": user.id,
@@ -38,3 +51,23 @@ def login(
     }
 
     return response
+
+
+@router.post("/logout", response_model=str)
+def logout(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    payload = decode_token(token, credentials_exception)
+
+    if payload.get("jti"):
+        revocation_list.revoke_token(
+            jti=payload["jti"],
+            user_id=payload.get("uid"),
+            expires_at=datetime.utcfromtimestamp(payload["exp"]),
+            db=db,
+        )
+
+    return "Done"
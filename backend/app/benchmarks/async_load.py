@@ -0,0 +1,64 @@
+"""Concurrency of the sync (threadpool) vs async (USE_ASYNC_DB) read paths.
+
+Starts one uvicorn worker per mode against the same seeded SQLite file and
+drives the catalog read endpoints at increasing concurrency. Sync handlers
+are capped by Starlette's threadpool (40 threads), async handlers are not.
+
+aiosqlite runs every connection through a helper thread, so on SQLite the
+async path is usually slower; the concurrency gain shows up on Postgres
+with asyncpg::
+
+    python -m benchmarks.async_load --requests 2000 --concurrency 10 50 200
+    python -m benchmarks.async_load --env USE_SQLITE_DB=False --env POSTGRES_USER=...
+"""
+import argparse
+import asyncio
+import shutil
+import tempfile
+
+from benchmarks.common import drive, serve
+
+PATHS = ["/api/product/", "/api/product/1", "/api/review/", "/api/order/orderbyuser/1"]
+
+
+def seed(base_url: str, products: int):
+    import httpx
+
+    with httpx.Client(base_url=base_url) as client:
+        for i in range(products):
+            client.post("/api/product/", json={
+                "name": f"Product {i}", "image": "", "category": "bench",
+                "description": "", "price": 10 + i, "countInStock": 5, "rating": i % 5,
+            })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE passed to the server")
+    args = parser.parse_args()
+    env = dict(item.split("=", 1) for item in args.env)
+
+    seeded = tempfile.mkdtemp(prefix="ecom-bench-")
+    with serve(workdir=seeded, **env) as base_url:
+        seed(base_url, args.products)
+
+    async def request(client, i):
+        return await client.get(PATHS[i % len(PATHS)])
+
+    print(f"{'mode':>6} {'conc':>5} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for mode in ("sync", "async"):
+        workdir = tempfile.mkdtemp(prefix="ecom-bench-")
+        shutil.copy(f"{seeded}/ecomfastapi.db", workdir)
+        env["USE_ASYNC_DB"] = "True" if mode == "async" else "False"
+        with serve(workdir=workdir, **env) as base_url:
+            for concurrency in args.concurrency:
+                result = asyncio.run(drive(base_url, request, concurrency, args.requests))
+                print(f"{mode:>6} {concurrency:>5} {result['rps']:>9} {result['p50_ms']:>8} "
+                      f"{result['p95_ms']:>8} {result['p99_ms']:>8} {result['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Authenticated-request throughput: DB-backed vs stateless JWT authorization.
+
+Run from ``backend/app``::
+
+    python -m benchmarks.auth_throughput --requests 5000
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+
+def run_mode(mode: str, requests: int) -> dict:
+    from benchmarks.common import boot_app
+
+    app, _ = boot_app(STATELESS_AUTH="True" if mode == "stateless" else "False")
+
+    from fastapi.testclient import TestClient
+
+    client = TestClient(app)
+    client.post("/api/users/", json={
+        "name": "bench", "email": "bench@example.com", "password": "bench",
+        "is_staff": False, "is_active": True,
+    })
+    token = client.post(
+        "/api/login", data={"username": "bench@example.com", "password": "bench"}
+    ).json()["jwtToken"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for _ in range(min(200, requests)):
+        client.get("/api/users/me", headers=headers)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get("/api/users/me", headers=headers)
+        assert response.status_code == 200, response.text
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "requests": requests,
+        "seconds": round(elapsed, 3),
+        "rps": round(requests / elapsed, 1),
+        "us_per_request": round(elapsed / requests * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--mode", choices=["db", "stateless"])
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.requests)))
+        return
+
+    results = []
+    for mode in ("db", "stateless"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.auth_throughput",
+             "--mode", mode, "--requests", str(args.requests)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for result in results:
+        print(f"{result['mode']:>10}: {result['rps']:>9} req/s  {result['us_per_request']:>8} us/req")
+    print(f"   speedup: {results[1]['rps'] / results[0]['rps']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import asyncio
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def boot_app(**env):
+    """Import the app against a throwaway SQLite database.
+
+    Settings and engines are read at import time, so this must run before
+    anything under ``config`` is imported and each configuration under test
+    needs its own process.
+    """
+    workdir = tempfile.mkdtemp(prefix="ecom-bench-")
+    os.environ["USE_SQLITE_DB"] = "True"
+    os.environ["AUTO_CREATE_TABLES"] = "True"
+    os.environ.update({key: str(value) for key, value in env.items()})
+    os.chdir(workdir)
+
+    import main
+
+    return main.app, workdir
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_env(**env) -> dict:
+    process_env = dict(os.environ)
+    process_env.update({"USE_SQLITE_DB": "True", "AUTO_CREATE_TABLES": "True", "PYTHONPATH": APP_DIR})
+    process_env.update({key: str(value) for key, value in env.items()})
+    return process_env
+
+
+def seed_database(workdir: str, scale: float, seed: int = 42, **env):
+    """Fill the database the server in ``workdir`` will use with ``python -m seed``."""
+    subprocess.run(
+        [sys.executable, "-m", "seed", "--create-tables", "--reset", "--scale", str(scale), "--seed", str(seed)],
+        cwd=workdir, env=server_env(**env), check=True,
+    )
+
+
+@contextlib.contextmanager
+def serve(workers: int = 1, workdir: str = None, **env):
+    """Run uvicorn in a subprocess against a SQLite database in ``workdir``.
+
+    Yields the base URL once the server answers.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="ecom-bench-")
+    port = free_port()
+    process_env = server_env(**env)
+
+    if workers > 1:
+        # Create the schema once so that workers do not race on create_all.
+        subprocess.run([sys.executable, "-c", "import main"], cwd=workdir, env=process_env,
+                       check=True, capture_output=True)
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=workdir, env=process_env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        import httpx
+
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                httpx.get(base_url + "/", timeout=1)
+                break
+            except httpx.HTTPError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies, elapsed: float, errors: int = 0) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def drive(base_url: str, make_request, concurrency: int, total: int) -> dict:
+    """Issue ``total`` requests from ``concurrency`` concurrent clients.
+
+    ``make_request(client, i)`` performs one request and returns the response.
+    """
+    import httpx
+
+    latencies, errors = [], 0
+    counter = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                try:
+                    response = await make_request(client, i)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(latencies, elapsed, errors)
@@ -0,0 +1,61 @@
+"""Response compression: ratio, compression time and variant cache hits.
+
+Fills a throwaway database as ``benchmarks.serialization`` does and
+requests the review list (about 190 bytes per row) with each available
+encoding. The first request compresses the body and the following ones are
+served from the variant cache. Run from ``backend/app``::
+
+    python -m benchmarks.compression --rows 10000
+"""
+import argparse
+import time
+
+from benchmarks.common import boot_app
+from benchmarks.serialization import fill
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app, _ = boot_app(SQL_INSTRUMENTATION="False", METRICS_ENABLED="False")
+    from fastapi.testclient import TestClient
+
+    from config.compression import Gzip, _compress, available_encoders
+
+    fill(args.rows)
+    encoders = available_encoders()
+
+    with TestClient(app) as client:
+        identity = client.get("/api/review/", headers={"accept-encoding": "identity"})
+        body = identity.content
+        print(f"GET /api/review/: {len(body):,} bytes uncompressed")
+        print(f"{'encoding':<10} {'bytes':>10} {'ratio':>7} {'compress ms':>12} "
+              f"{'miss ms':>8} {'hit ms':>8} {'identity ms':>12}")
+
+        def timed(encoding: str) -> float:
+            start = time.perf_counter()
+            response = client.get("/api/review/", headers={"accept-encoding": encoding})
+            elapsed = (time.perf_counter() - start) * 1000
+            assert response.status_code == 200
+            return elapsed
+
+        identity_ms = min(timed("identity") for _ in range(args.repeat))
+        for name, encoder in encoders.items():
+            compressed, cpu = _compress(encoder, body)
+            # The first request per encoding compresses; the rest hit the cache.
+            miss = timed(name)
+            hit = min(timed(name) for _ in range(args.repeat))
+            print(f"{name:<10} {len(compressed):>10,} {len(body) / len(compressed):>7.1f} {cpu * 1000:>12.1f} "
+                  f"{miss:>8.1f} {hit:>8.1f} {identity_ms:>12.1f}")
+
+        if "gzip" in encoders:
+            for level in (1, 6, 9):
+                compressed, cpu = _compress(Gzip(level), body)
+                print(f"gzip -{level}: {len(compressed):,} bytes in {cpu * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
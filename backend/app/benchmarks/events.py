@@ -0,0 +1,89 @@
+"""Cost of idle event streams and of fanning an event out to them.
+
+Opens ``--streams`` subscriptions on one :class:`config.events.EventHub`,
+each drained by a task, as an event stream response would. Every stream
+follows product 1 and a product of its own. Reports:
+
+- ``memory``: Python memory per idle stream (subscriber, queue and task),
+  measured with tracemalloc. Sockets and the server's per-connection
+  state come on top.
+- ``fan-out``: from dispatching one event on product 1 until every stream
+  has taken it off its queue.
+- ``targeted``: dispatching one event to each stream's own product.
+- ``heartbeat``: one keep-alive sweep over all quiet streams.
+
+Run from ``backend/app``::
+
+    python -m benchmarks.events --streams 50000
+"""
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+
+
+async def run(streams: int):
+    from config.events import EventHub, frame
+
+    hub = EventHub(max_pending=64, heartbeat_seconds=3600)
+    received = 0
+    done = asyncio.Event()
+
+    async def drain(subscriber):
+        nonlocal received
+        async for _ in subscriber.frames():
+            received += 1
+            if received == streams:
+                done.set()
+
+    async def round_trip(send) -> float:
+        nonlocal received
+        received = 0
+        done.clear()
+        start = time.perf_counter()
+        send()
+        await done.wait()
+        return time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = [
+        asyncio.create_task(drain(hub.subscribe(("product:1", f"product:{1000 + i}"))))
+        for i in range(streams)
+    ]
+    await asyncio.sleep(0)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"memory     {used / streams:8.0f} bytes per stream ({used / 2**20:.1f} MiB for {streams})")
+
+    data = frame("stock", {"id": 1, "countInStock": 3})
+    elapsed = await round_trip(lambda: hub.dispatch("product:1", data))
+    print(f"fan-out    {elapsed * 1000:8.1f} ms  ({streams / elapsed:,.0f} deliveries/s)")
+
+    def targeted():
+        for i in range(streams):
+            hub.dispatch(f"product:{1000 + i}", frame("stock", {"id": 1000 + i, "countInStock": 3}))
+
+    elapsed = await round_trip(targeted)
+    print(f"targeted   {elapsed * 1000:8.1f} ms  ({streams / elapsed:,.0f} events/s)")
+
+    elapsed = await round_trip(hub.heartbeat)
+    print(f"heartbeat  {elapsed * 1000:8.1f} ms")
+
+    hub.close()
+    await asyncio.gather(*tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--streams", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Importing the settings needs a database choice; nothing here connects to one.
+    os.environ["USE_SQLITE_DB"] = "True"
+    asyncio.run(run(args.streams))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Throughput of bulk order fulfillment by batch size.
+
+Fills a throwaway SQLite database with ``--orders`` orders, then marks
+batches of each size in ``--sizes`` delivered with
+``OrderService.fulfillBatch`` (the ``POST /api/order/fulfillment/batch``
+code path, chunked transactions) and, for the smallest size, one order
+per transaction as a client looping over orders would. Orders per second
+should stay flat as batches grow.
+
+Run from ``backend/app``::
+
+    python -m benchmarks.fulfillment --orders 100000 --sizes 1000,10000,50000
+"""
+import argparse
+import time
+
+from benchmarks.common import boot_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--orders", type=int, default=60000)
+    parser.add_argument("--sizes", default="1000,5000,20000")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    boot_app(FULFILLMENT_MAX_IDS=max(sizes))
+    from sqlalchemy import update
+
+    from benchmarks.serialization import fill
+    from config.database import SessionLocal
+    from dto.orderschema import FulfillmentBatch
+    from models.ordermodels import OrderModel
+    from order.orderservice import OrderService
+
+    fill(args.orders)
+    print(f"{'mode':>10} {'orders':>7} {'seconds':>8} {'orders/s':>9}")
+
+    def reset(db):
+        db.execute(update(OrderModel).values(isDelivered=False))
+        db.commit()
+
+    with SessionLocal() as db:
+        for size in sizes:
+            reset(db)
+            # Every other id by transaction id, to cover both lookups.
+            ids = list(range(1, size + 1))
+            request = FulfillmentBatch(
+                orderIds=ids[::2], transactionIds=[f"txn-{i:08d}" for i in ids[1::2]]
+            )
+            start = time.perf_counter()
+            result = OrderService.fulfillBatch(request=request, db=db)
+            elapsed = time.perf_counter() - start
+            assert result["updated"] == size, result["updated"]
+            print(f"{'batch':>10} {size:>7} {elapsed:>8.2f} {size / elapsed:>9.0f}")
+
+        reset(db)
+        size = sizes[0]
+        start = time.perf_counter()
+        for order_id in range(1, size + 1):
+            order = db.get(OrderModel, order_id)
+            order.isDelivered = True
+            db.commit()
+        elapsed = time.perf_counter() - start
+        print(f"{'per-order':>10} {size:>7} {elapsed:>8.2f} {size / elapsed:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
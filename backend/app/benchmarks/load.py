@@ -0,0 +1,326 @@
+"""End-to-end load benchmark over every router.
+
+Boots uvicorn against a database filled by ``python -m seed``, signs up
+a few clients through the API, then drives a weighted mix of auth,
+users, product, review and order requests at each concurrency level. It
+reports throughput and p50/p95/p99 per endpoint. Orders go through the stub payment gateway, and the login
+throttle is off so that repeated logins measure the handler itself.
+
+Results are written as JSON. Given a baseline from an earlier run, any
+endpoint whose p95 or throughput regressed beyond the thresholds is
+listed and the exit status is 1::
+
+    python -m benchmarks.load --output before.json
+    python -m benchmarks.load --baseline before.json --output after.json
+    python -m benchmarks.load --mix browse --concurrency 50 --workers 4
+    python -m benchmarks.load --env USE_SQLITE_DB=False --env POSTGRES_SERVER=localhost ...
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import APP_DIR, seed_database, serve, summarize
+from seed import BASE_COUNTS
+
+PASSWORD = "benchmark-password"
+
+CARD = {"address_line1": "1 Jalan Bench", "address_city": "Kuala Lumpur",
+        "address_country": "MY", "address_zip": "50000"}
+
+# Operation name -> weight. Names are the route templates they exercise.
+MIXES = {
+    "mixed": {
+        "POST /api/login": 2,
+        "GET /api/users/": 2,
+        "GET /api/users/me": 4,
+        "GET /api/product/": 20,
+        "GET /api/product/{productid}": 25,
+        "GET /api/product/recommendation": 3,
+        "PUT /api/product/{productid}": 2,
+        "GET /api/review/": 8,
+        "POST /api/review/create/{productid}": 3,
+        "GET /api/order/": 2,
+        "GET /api/order/orderbyuser/{userid}": 10,
+        "GET /api/order/orderbyid/{id}": 8,
+        "POST /api/order/": 5,
+    },
+    "browse": {
+        "GET /api/product/": 40,
+        "GET /api/product/{productid}": 45,
+        "GET /api/product/recommendation": 5,
+        "GET /api/review/": 10,
+    },
+    "checkout": {
+        "POST /api/login": 5,
+        "GET /api/users/me": 10,
+        "GET /api/product/{productid}": 35,
+        "POST /api/order/": 30,
+        "GET /api/order/orderbyuser/{userid}": 20,
+    },
+}
+
+
+class Context:
+    """Ids and tokens shared by all simulated clients."""
+
+    def __init__(self, users, products, orders, customers, prices, orderable):
+        self.users = users
+        self.products = products
+        # Product id -> current price. Updates keep it, so orders stay valid.
+        self.prices = prices
+        # Products with enough stock for any order line.
+        self.orderable = orderable
+        self.orders = orders
+        self.customers = customers
+        self.review_pairs = iter(
+            (user, product) for product in products for user in users
+        )
+
+
+def product_body(i: int, stock: int = 50, price: int = None) -> dict:
+    return {
+        "name": f"Product {i}", "image": f"/images/{i}.jpg", "category": f"category-{i % 8}",
+        "description": f"Benchmark product {i}, sturdy and good value",
+        "price": 10 + i % 90 if price is None else price,
+        "countInStock": stock, "rating": i % 5,
+    }
+
+
+def order_body(user: dict, ctx: Context, rng: random.Random) -> dict:
+    # The server checks lines against current prices and stock.
+    items = [
+        {"id": product, "name": f"Product {product}", "quantity": rng.randint(1, 3), "price": ctx.prices[product]}
+        for product in rng.sample(ctx.orderable, k=min(len(ctx.orderable), rng.randint(1, 4)))
+    ]
+    return {
+        "token": {"id": "tok_visa", "email": user["email"], "card": CARD},
+        "cartItems": items,
+        "currentUser": {"id": user["id"], "name": user["name"], "email": user["email"],
+                        "is_staff": False, "is_active": True},
+        "subtotal": sum(item["quantity"] * item["price"] for item in items),
+    }
+
+
+def register_clients(base_url: str, clients: int, scale: float) -> Context:
+    """Sign up the simulated clients; the rest of the data comes from the seeder.
+
+    Clients are new accounts, so the reviews they post never collide with
+    seeded ones. Every product is read once for its price and stock.
+    """
+    import httpx
+
+    def ids(table: str) -> list:
+        return list(range(1, max(1, int(BASE_COUNTS[table] * scale)) + 1))
+
+    products = ids("products")
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        users = []
+        for i in range(clients):
+            email = f"bench{i}@example.com"
+            client.post("/api/users/", json={
+                "name": f"Bench User {i}", "email": email, "password": PASSWORD,
+                "is_staff": False, "is_active": True,
+            }).raise_for_status()
+            token = client.post("/api/login", data={"username": email, "password": PASSWORD}).json()["jwtToken"]
+            me = client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"}).json()
+            users.append({"id": me["id"], "name": me["name"], "email": email, "token": token})
+        prices, orderable = {}, []
+        for product_id in products:
+            response = client.get(f"/api/product/{product_id}")
+            product = response.json() if response.status_code == 200 else {}
+            if product.get("price") is None:
+                continue
+            prices[product_id] = product["price"]
+            if (product["countInStock"] or 0) >= 3:
+                orderable.append(product_id)
+
+    return Context(users, list(prices), ids("orders"), ids("users"), prices, orderable)
+
+
+async def perform(client, name: str, ctx: Context, rng: random.Random):
+    user = rng.choice(ctx.users)
+    auth = {"Authorization": f"Bearer {user['token']}"}
+    product = rng.choice(ctx.products)
+
+    if name == "POST /api/login":
+        return await client.post("/api/login", data={"username": user["email"], "password": PASSWORD})
+    if name == "GET /api/users/":
+        return await client.get("/api/users/")
+    if name == "GET /api/users/me":
+        return await client.get("/api/users/me", headers=auth)
+    if name == "GET /api/product/":
+        return await client.get("/api/product/")
+    if name == "GET /api/product/{productid}":
+        return await client.get(f"/api/product/{product}")
+    if name == "GET /api/product/recommendation":
+        return await client.get("/api/product/recommendation")
+    if name == "PUT /api/product/{productid}":
+        body = product_body(product, stock=10_000, price=ctx.prices[product])
+        return await client.put(f"/api/product/{product}", json=body)
+    if name == "GET /api/review/":
+        return await client.get("/api/review/")
+    if name == "POST /api/review/create/{productid}":
+        # One review per user and product; fall back to a read once exhausted.
+        pair = next(ctx.review_pairs, None)
+        if pair is None:
+            return await client.get("/api/review/")
+        reviewer, product = pair
+        return await client.post(
+            f"/api/review/create/{product}",
+            json={"rating": rng.randint(1, 5), "comment": "Works as described, would buy again"},
+            headers={"Authorization": f"Bearer {reviewer['token']}"},
+        )
+    if name == "GET /api/order/":
+        return await client.get("/api/order/")
+    if name == "GET /api/order/orderbyuser/{userid}":
+        return await client.get(f"/api/order/orderbyuser/{rng.choice(ctx.customers)}")
+    if name == "GET /api/order/orderbyid/{id}":
+        return await client.get(f"/api/order/orderbyid/{rng.choice(ctx.orders)}")
+    if name == "POST /api/order/":
+        return await client.post("/api/order/", json=order_body(user, ctx, rng))
+    raise ValueError(f"unknown operation {name}")
+
+
+async def drive_mix(base_url: str, ctx: Context, mix: dict, concurrency: int, total: int, seed: int) -> dict:
+    import httpx
+
+    names, weights = list(mix), list(mix.values())
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker(number: int):
+            rng = random.Random(seed * 1000 + number)
+            for _ in remaining:
+                name = rng.choices(names, weights)[0]
+                start = time.perf_counter()
+                try:
+                    response = await perform(client, name, ctx, rng)
+                    if response.status_code >= 400:
+                        errors[name] += 1
+                except httpx.HTTPError:
+                    errors[name] += 1
+                latencies[name].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    endpoints = {
+        name: summarize(latencies[name], elapsed, errors[name]) for name in names if latencies[name]
+    }
+    endpoints["total"] = summarize(
+        [value for values in latencies.values() for value in values], elapsed, sum(errors.values())
+    )
+    return endpoints
+
+
+def compare(baseline: dict, current: dict, p95_threshold: float, rps_threshold: float, min_delta_ms: float):
+    """Regressions of ``current`` against ``baseline``, as printable lines."""
+    regressions = []
+    for concurrency, endpoints in current["results"].items():
+        for name, result in endpoints.items():
+            before = baseline["results"].get(concurrency, {}).get(name)
+            if not before:
+                continue
+            p95_delta = result["p95_ms"] - before["p95_ms"]
+            if before["p95_ms"] and p95_delta > min_delta_ms and p95_delta / before["p95_ms"] > p95_threshold:
+                regressions.append(
+                    f"c={concurrency} {name}: p95 {before['p95_ms']} -> {result['p95_ms']} ms"
+                )
+            if before["rps"] and (before["rps"] - result["rps"]) / before["rps"] > rps_threshold:
+                regressions.append(
+                    f"c={concurrency} {name}: throughput {before['rps']} -> {result['rps']} rps"
+                )
+            if result["errors"] > before["errors"]:
+                regressions.append(
+                    f"c={concurrency} {name}: errors {before['errors']} -> {result['errors']}"
+                )
+    return regressions
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--scale", type=float, default=0.1, help="dataset size, see python -m seed")
+    parser.add_argument("--clients", type=int, default=10, help="signed-up users the requests come from")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE passed to the server")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--p95-threshold", type=float, default=0.20, help="allowed relative p95 increase")
+    parser.add_argument("--rps-threshold", type=float, default=0.15, help="allowed relative throughput drop")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore smaller p95 changes")
+    args = parser.parse_args()
+
+    env = {"PAYMENT_GATEWAY": "stub", "RATE_LIMIT_ENABLED": "False"}
+    env.update(item.split("=", 1) for item in args.env)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "mix": args.mix,
+            "workers": args.workers,
+            "requests": args.requests,
+            "scale": args.scale,
+            "env": env,
+        },
+        "results": {},
+    }
+
+    workdir = tempfile.mkdtemp(prefix="ecom-bench-")
+    seed_database(workdir, args.scale, **env)
+    with serve(workers=args.workers, workdir=workdir, **env) as base_url:
+        ctx = register_clients(base_url, args.clients, args.scale)
+        for concurrency in args.concurrency:
+            endpoints = asyncio.run(
+                drive_mix(base_url, ctx, MIXES[args.mix], concurrency, args.requests, args.seed)
+            )
+            report["results"][str(concurrency)] = endpoints
+
+            print(f"\nconcurrency {concurrency}")
+            print(f"{'endpoint':<40} {'requests':>8} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+            for name, result in endpoints.items():
+                print(f"{name:<40} {result['requests']:>8} {result['rps']:>8} {result['p50_ms']:>8} "
+                      f"{result['p95_ms']:>8} {result['p99_ms']:>8} {result['errors']:>6}")
+
+    with open(args.output, "w") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\nresults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        regressions = compare(baseline, report, args.p95_threshold, args.rps_threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline} "
+                  f"(revision {baseline['meta'].get('revision')}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nno regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Per-request cost of the Prometheus middleware, and a multi-worker check.
+
+The first part wraps a no-op ASGI app so only the middleware is timed,
+and compares that with a request through the full application (target:
+< 1%). The second starts uvicorn with several workers and checks that
+``/metrics`` reports the requests served by all of them.
+
+Run from ``backend/app``::
+
+    python -m benchmarks.metrics_overhead
+"""
+import argparse
+import asyncio
+import re
+import tempfile
+import time
+
+from benchmarks.common import boot_app, serve
+
+
+class _Route:
+    def __init__(self, path):
+        self.path = path
+        self.path_regex = re.compile("^" + re.sub(r"{\w+}", "[^/]+", path) + "$")
+
+
+class _App:
+    routes = [_Route("/api/product/"), _Route("/api/product/{productid}"), _Route("/api/order/{orderid}")]
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _measure(app, iterations: int) -> float:
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        pass
+
+    bare = _App()
+    scopes = [
+        {"type": "http", "method": "GET", "path": f"/api/product/{i % 500}", "app": bare}
+        for i in range(iterations)
+    ]
+    start = time.perf_counter()
+    for scope in scopes:
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def _measure_app(app, path: str, iterations: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+    await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def overhead(iterations: int):
+    app, _ = boot_app(METRICS_DIR=tempfile.mkdtemp(prefix="ecom-metrics-"), SQL_INSTRUMENTATION="False")
+    from monitoring.prometheus import PrometheusMiddleware
+
+    bare = _App()
+    wrapped = PrometheusMiddleware(bare)
+    # Best of several rounds, to keep scheduler noise out of a ~1 us difference.
+    base = min(asyncio.run(_measure(bare, iterations)) for _ in range(5))
+    cost = min(asyncio.run(_measure(wrapped, iterations)) for _ in range(5)) - base
+    print(f"middleware: +{cost:.2f} us/request")
+
+    for path in ("/", "/api/product/"):
+        request = min(asyncio.run(_measure_app(app, path, iterations // 100)) for _ in range(3))
+        print(f"GET {path:<14} {request:8.1f} us/request, metrics add {cost / request * 100:.2f}%")
+
+
+def multi_worker(workers: int, requests: int):
+    import httpx
+
+    metrics_dir = tempfile.mkdtemp(prefix="ecom-metrics-")
+    with serve(workers=workers, METRICS_DIR=metrics_dir, METRICS_FLUSH_SECONDS=0, METRICS_TOKEN="bench") as base_url:
+        with httpx.Client(base_url=base_url, headers={"Authorization": "Bearer bench"}) as client:
+            for _ in range(requests):
+                # New connections, so the kernel spreads them over the workers.
+                httpx.get(base_url + "/api/product/")
+            text = client.get("/metrics").text
+
+    served = sum(
+        int(float(line.rsplit(" ", 1)[1]))
+        for line in text.splitlines()
+        if line.startswith('http_requests_total{method="GET",route="/api/product/"')
+    )
+    pids = set(re.findall(r'process_resident_memory_bytes\{pid="(\d+)"', text))
+    print(f"{workers} workers: /metrics counted {served}/{requests} requests from {len(pids)} worker(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    overhead(args.iterations)
+    multi_worker(args.workers, args.requests)
+
+
+if __name__ == "__main__":
+    main()
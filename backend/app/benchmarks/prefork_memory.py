@@ -0,0 +1,145 @@
+"""Memory per worker and throughput scaling: ``server.py`` against ``uvicorn --workers``.
+
+For each server and worker count, starts the server against a seeded
+SQLite database, warms every worker up with browse requests, then reads
+``/proc/<pid>/smaps_rollup`` for the master and each worker:
+
+- ``uss``: memory only that process uses. With ``server.py`` the modules
+  and models imported before the fork stay shared, so a worker's USS is
+  what it allocated while serving. ``uvicorn --workers`` starts each
+  worker as a new interpreter that imports everything again.
+- ``pss``: shared pages split between the processes using them. Summed
+  over the tree it is the memory the server really takes.
+
+Then it drives the product list with the service cache off, so every
+request does the work, to show how throughput scales with workers. Run
+from ``backend/app``::
+
+    python -m benchmarks.prefork_memory --workers 1 2 4
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import APP_DIR, drive, free_port, seed_database, server_env
+
+MiB = 2 ** 20
+
+
+def children(pid: int):
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name may contain spaces, the fields after it do not.
+                fields = stat.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid and not _is_resource_tracker(entry):
+            found.append(int(entry))
+    return found
+
+
+def _is_resource_tracker(pid: str) -> bool:
+    # uvicorn --workers starts its workers with multiprocessing, which adds this helper.
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as cmdline:
+            return b"resource_tracker" in cmdline.read()
+    except OSError:
+        return False
+
+
+@contextlib.contextmanager
+def start(server: str, workers: int, workdir: str, **env):
+    """Run ``server`` ("prefork" or "uvicorn"); yields (base_url, master pid)."""
+    port = free_port()
+    if server == "prefork":
+        command = [sys.executable, os.path.join(APP_DIR, "server.py"), "--workers", str(workers), "--job-workers", "0"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--workers", str(workers)]
+    process = subprocess.Popen(
+        command + ["--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=workdir, env=server_env(**env), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    # uvicorn serves from its own process when there is a single worker.
+    expected = 0 if server == "uvicorn" and workers == 1 else workers
+    try:
+        import httpx
+
+        deadline = time.monotonic() + 120
+        while len(children(process.pid)) < expected or not _answers(httpx, base_url):
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"{server} did not start")
+            time.sleep(0.2)
+        yield base_url, process.pid
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+
+def _answers(httpx, base_url: str) -> bool:
+    try:
+        return httpx.get(base_url + "/", timeout=1).status_code == 200
+    except httpx.HTTPError:
+        return False
+
+
+def browse(client, i: int):
+    if i % 2:
+        return client.get("/api/product/")
+    return client.get(f"/api/product/{1 + i % 20}")
+
+
+def measure(master: int) -> dict:
+    from monitoring.prometheus import memory_usage
+
+    own = memory_usage(master)
+    workers = [usage for usage in map(memory_usage, children(master)) if usage]
+    if not workers:
+        # A single uvicorn process is its own worker.
+        return {"master_uss": 0.0, "worker_uss": own["uss"] / MiB,
+                "worker_rss": own["rss"] / MiB, "total_pss": own["pss"] / MiB}
+    return {
+        "master_uss": own["uss"] / MiB,
+        "worker_uss": sum(usage["uss"] for usage in workers) / len(workers) / MiB,
+        "worker_rss": sum(usage["rss"] for usage in workers) / len(workers) / MiB,
+        "total_pss": (own["pss"] + sum(usage["pss"] for usage in workers)) / MiB,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--scale", type=float, default=0.1, help="seed scale, see python -m seed")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    env = {"CACHE_ENABLED": "False", "METRICS_ENABLED": "False", "SQL_INSTRUMENTATION": "False"}
+    workdir = tempfile.mkdtemp(prefix="ecom-bench-")
+    seed_database(workdir, args.scale, **env)
+
+    print(f"{'server':<8} {'workers':>7} {'master uss':>11} {'worker uss':>11} {'worker rss':>11} "
+          f"{'total pss':>10} {'rps':>8} {'p99 ms':>8}   (MiB)")
+    for workers in args.workers:
+        for server in ("uvicorn", "prefork"):
+            with start(server, workers, workdir, **env) as (base_url, master):
+                # Enough requests that every worker has served some.
+                asyncio.run(drive(base_url, browse, concurrency=workers * 4, total=workers * 200))
+                memory = measure(master)
+                result = asyncio.run(drive(base_url, browse, args.concurrency, args.requests))
+            print(f"{server:<8} {workers:>7} {memory['master_uss']:>11.1f} {memory['worker_uss']:>11.1f} "
+                  f"{memory['worker_rss']:>11.1f} {memory['total_pss']:>10.1f} "
+                  f"{result['rps']:>8.1f} {result['p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
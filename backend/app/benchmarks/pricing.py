@@ -0,0 +1,67 @@
+"""Latency of pricing a cart by its number of lines.
+
+Times :func:`order.pricing.price_cart`, one ``IN`` query per cart, against
+looking each line's product up on its own, for carts of each size in
+``--lines`` on a throwaway SQLite database. The first should stay nearly
+flat as carts grow; the second grows with every line.
+
+Run from ``backend/app``::
+
+    python -m benchmarks.pricing --lines 1,10,100,500
+"""
+import argparse
+import statistics
+import time
+from types import SimpleNamespace
+
+from benchmarks.common import boot_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--lines", default="1,10,100,500")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.lines.split(",")]
+
+    boot_app(PRICING_MAX_LINES=max(sizes))
+    from sqlalchemy import insert
+
+    from config.database import SessionLocal, engine
+    from models.productmodels import ProductModel
+    from order.pricing import price_cart
+
+    products = max(sizes) * 2
+    with engine.begin() as connection:
+        connection.execute(insert(ProductModel), [
+            {"id": i, "name": f"Product {i}", "price": 10 + i % 90, "countInStock": 100} for i in range(1, products + 1)
+        ])
+
+    def per_line(cart, db):
+        total = 0
+        for item in cart:
+            product = db.get(ProductModel, item.id)
+            assert product.price == item.price and product.countInStock >= item.quantity
+            total += product.price * item.quantity
+        return total
+
+    def median_ms(fn) -> float:
+        timings = []
+        for _ in range(args.repeat):
+            with SessionLocal() as db:
+                start = time.perf_counter()
+                fn(db)
+                timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
+
+    print(f"{'lines':>6} {'one query ms':>13} {'per line ms':>12}")
+    for size in sizes:
+        cart = [SimpleNamespace(id=i, quantity=1, price=10 + i % 90) for i in range(1, 2 * size, 2)]
+        subtotal = sum(item.price for item in cart)
+        batched = median_ms(lambda db: price_cart(cart, subtotal, db))
+        separate = median_ms(lambda db: per_line(cart, db))
+        print(f"{size:>6} {batched:>13.2f} {separate:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
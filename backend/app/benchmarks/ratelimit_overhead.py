@@ -0,0 +1,40 @@
+"""Per-request cost of the login throttle (target: < 50 us).
+
+Run from ``backend/app``::
+
+    python -m benchmarks.ratelimit_overhead
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("USE_SQLITE_DB", "True")
+
+from config.ratelimit import MemoryStore, RedisStore, SlidingWindowLimiter
+from config.redisclient import LocalRedis
+
+
+def measure(store, iterations: int, keys: int) -> float:
+    limiter = SlidingWindowLimiter(store, limit=1_000_000, window=60)
+    names = [f"login:ip:10.0.{i // 256}.{i % 256}" for i in range(keys)]
+    start = time.perf_counter()
+    for i in range(iterations):
+        limiter.hit(names[i % keys])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=10_000)
+    args = parser.parse_args()
+
+    for name, store in (
+        ("memory", MemoryStore()),
+        ("redis (LocalRedis)", RedisStore(LocalRedis())),
+    ):
+        print(f"{name:>20}: {measure(store, args.iterations, args.keys):6.2f} us/hit")
+
+
+if __name__ == "__main__":
+    main()
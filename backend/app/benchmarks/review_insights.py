@@ -0,0 +1,66 @@
+"""Cost of computing review keyphrases for the whole catalog.
+
+Generates ``--reviews`` comments spread over ``--products`` products with
+the seed data's templates, scores them with VADER, fits the TF-IDF
+vectorizer once, then times two ways of computing every product:
+
+- ``per-product``: :func:`product.insights.extract` called once per
+  product, which is what running each product's refresh would cost.
+- ``one-pass``: a single call over all reviews, as the nightly rebuild
+  does; the grouping is one sparse matrix product.
+
+Run from ``backend/app``::
+
+    python -m benchmarks.review_insights --products 2000 --reviews 200000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+
+def corpus(products: int, reviews: int, seed: int = 42):
+    from seed.generate import review_comments
+
+    rng = np.random.default_rng(seed)
+    ratings = rng.integers(1, 6, reviews)
+    comments = review_comments(rng, ratings)
+    product_ids = rng.integers(1, products + 1, reviews)
+    return product_ids, comments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--reviews", type=int, default=50000)
+    args = parser.parse_args()
+
+    # Importing the models needs an engine; nothing here connects to it.
+    os.environ["USE_SQLITE_DB"] = "True"
+    from product.insights import extract, make_vectorizer
+    from product.sentiment import VaderBackend
+
+    product_ids, comments = corpus(args.products, args.reviews)
+    start = time.perf_counter()
+    scores = VaderBackend().score_batch(comments)
+    print(f"scoring      {time.perf_counter() - start:8.2f}s  ({args.reviews} reviews, VADER)")
+
+    start = time.perf_counter()
+    vectorizer = make_vectorizer().fit(comments)
+    print(f"fit          {time.perf_counter() - start:8.2f}s  ({len(vectorizer.vocabulary_)} terms)")
+
+    start = time.perf_counter()
+    order = np.argsort(product_ids, kind="stable")
+    bounds = np.flatnonzero(np.diff(product_ids[order])) + 1
+    for group in np.split(order, bounds):
+        extract(vectorizer, product_ids[group], [comments[i] for i in group], [scores[i] for i in group])
+    print(f"per-product  {time.perf_counter() - start:8.2f}s")
+
+    start = time.perf_counter()
+    extract(vectorizer, product_ids, comments, scores)
+    print(f"one-pass     {time.perf_counter() - start:8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Throughput and latency of review sentiment scoring.
+
+For each backend, times:
+
+- ``single``: one comment per call, as the product page did before
+  scores were stored.
+- ``batch-N``: N comments per ``score_batch`` call.
+- ``batcher-cN``: N threads each scoring one comment at a time through a
+  :class:`MicroBatcher`, which is what concurrent requests see.
+- ``cached``: the same comments again, from the score cache.
+
+Comments are made unique so the cache only serves the ``cached`` run.
+VADER always runs; pass ``--model`` to add a transformer (a Hugging Face
+name or a local directory), ``--onnx`` / ``--quantize`` to run it with
+onnxruntime. Run from ``backend/app``::
+
+    python -m benchmarks.sentiment --texts 2000 --model distilbert-base-uncased-finetuned-sst-2-english
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+COMMENTS = (
+    "Works as described, would buy again",
+    "Stopped charging after two weeks and support never answered",
+    "Arrived on time, packaging was fine",
+    "Honestly the best purchase I made this year",
+    "Not worth the price, the fabric feels cheap",
+    "It's okay. Does the job but nothing special",
+)
+
+
+def texts(count: int, run: str) -> list:
+    return [f"{COMMENTS[i % len(COMMENTS)]} ({run} {i})" for i in range(count)]
+
+
+def report(name: str, count: int, elapsed: float, latencies=None):
+    line = f"{name:<14} {count / elapsed:>10.0f} texts/s"
+    if latencies:
+        latencies = sorted(latencies)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        line += f"   p50 {statistics.median(latencies) * 1000:7.2f} ms   p99 {p99 * 1000:7.2f} ms"
+    print(line)
+
+
+def run(backend, count: int, batch_sizes, concurrency, max_wait_ms: float):
+    from product.sentiment import MicroBatcher, ScoreCache
+
+    print(f"\n{backend.name}")
+    backend.score_batch(texts(8, "warmup"))
+
+    items = texts(count, "single")
+    latencies = []
+    start = time.perf_counter()
+    for text in items:
+        began = time.perf_counter()
+        backend.score_batch([text])
+        latencies.append(time.perf_counter() - began)
+    report("single", count, time.perf_counter() - start, latencies)
+
+    for size in batch_sizes:
+        items = texts(count, f"batch{size}")
+        start = time.perf_counter()
+        for offset in range(0, count, size):
+            backend.score_batch(items[offset:offset + size])
+        report(f"batch-{size}", count, time.perf_counter() - start)
+
+    for threads in concurrency:
+        batcher = MicroBatcher(backend, max(batch_sizes), max_wait_ms)
+        items = texts(count, f"c{threads}")
+
+        def score(text):
+            began = time.perf_counter()
+            batcher.submit(text).result()
+            return time.perf_counter() - began
+
+        with ThreadPoolExecutor(threads) as pool:
+            start = time.perf_counter()
+            latencies = list(pool.map(score, items))
+        report(f"batcher-c{threads}", count, time.perf_counter() - start, latencies)
+
+    cache = ScoreCache(count)
+    items = texts(count, "cached")
+    for text, value in zip(items, backend.score_batch(items[:1]) * count):
+        cache.put(ScoreCache.key(text), value)
+    start = time.perf_counter()
+    for text in items:
+        cache.get(ScoreCache.key(text))
+    report("cached", count, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--batch-sizes", default="8,32,64")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    parser.add_argument("--model", help="transformer to compare with VADER")
+    parser.add_argument("--onnx", action="store_true", help="run the model's model.onnx with onnxruntime")
+    parser.add_argument("--quantize", action="store_true", help="quantize the ONNX model to int8 first")
+    parser.add_argument("--threads", type=int, default=0, help="intra-op threads, 0 for the framework default")
+    args = parser.parse_args()
+
+    # The module builds its own backend on import; keep that one cheap.
+    os.environ["SENTIMENT_BACKEND"] = "vader"
+    from product.sentiment import TransformerBackend, VaderBackend
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    concurrency = [int(threads) for threads in args.concurrency.split(",")]
+    backends = [VaderBackend()]
+    if args.model:
+        backends.append(TransformerBackend(args.model, onnx=args.onnx, quantize=args.quantize, threads=args.threads))
+    for backend in backends:
+        run(backend, args.texts, batch_sizes, concurrency, args.max_wait_ms)
+
+
+if __name__ == "__main__":
+    main()
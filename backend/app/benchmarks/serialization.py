@@ -0,0 +1,186 @@
+"""Serialization cost of large list responses.
+
+Fills a throwaway SQLite database with ``--rows`` users, reviews and
+order items, then times three ways of turning each list into a response
+body:
+
+- ``encoder``: ORM instances through ``jsonable_encoder`` and the stdlib
+  ``JSONResponse``, which is what the routes did before they had response
+  models.
+- ``model``: ORM instances validated against the response model and
+  rendered with ``ORJSONResponse``, the path FastAPI takes for routes
+  that return ORM objects.
+- ``rows``: plain column tuples through ``rows_response``, which the
+  large list endpoints use now.
+
+Each is reported with and without the query. Run from ``backend/app``::
+
+    python -m benchmarks.serialization --rows 10000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import boot_app
+
+
+def fill(rows: int):
+    from sqlalchemy import insert
+
+    from config.database import engine
+    from models.ordermodels import OrderItemsModel, OrderModel
+    from models.productmodels import ProductModel
+    from models.reviewmodels import ReviewModel
+    from models.usermodels import User
+
+    start = datetime(2026, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {"id": i, "name": f"User {i}", "email": f"user{i}@example.com",
+             "password": "$2b$12$" + "x" * 53, "is_staff": False, "is_active": True}
+            for i in range(1, rows + 1)
+        ])
+        connection.execute(insert(ProductModel), [
+            {"id": 1, "name": "Product", "image": "/images/1.jpg", "category": "Books",
+             "description": "A product", "price": 10, "countInStock": 5, "rating": 4}
+        ])
+        connection.execute(insert(ReviewModel), [
+            {"id": i, "name": f"User {i}", "comment": "Works as described, would buy again",
+             "rating": 1 + i % 5, "user_id": i, "product_id": 1,
+             "created_at": start + timedelta(minutes=i), "updated_at": start + timedelta(minutes=i)}
+            for i in range(1, rows + 1)
+        ])
+        connection.execute(insert(OrderModel), [
+            {"id": i, "name": f"User {i}", "email": f"user{i}@example.com", "orderAmount": 100 + i % 900,
+             "transactionId": f"txn-{i:08d}", "isDelivered": i % 3 == 0, "user_id": 1 + i % 50,
+             "created_at": start + timedelta(minutes=i), "updated_at": start + timedelta(minutes=i)}
+            for i in range(1, rows + 1)
+        ])
+        connection.execute(insert(OrderItemsModel), [
+            {"id": i, "name": "Product", "quantity": 1 + i % 3, "price": 10, "order_id": i}
+            for i in range(1, rows + 1)
+        ])
+
+
+def order_pairs(db):
+    from models.ordermodels import OrderItemsModel, OrderModel
+
+    return (
+        db.query(OrderModel, OrderItemsModel)
+        .join(OrderItemsModel, OrderModel.id == OrderItemsModel.order_id)
+        .all()
+    )
+
+
+def order_fields(order) -> dict:
+    return {
+        "id": order.id, "name": order.name, "email": order.email, "orderAmount": order.orderAmount,
+        "transactionId": order.transactionId, "isDelivered": order.isDelivered,
+        "user_id": order.user_id, "created_at": order.created_at, "updated_at": order.updated_at,
+    }
+
+
+def paths() -> dict:
+    """list -> path -> (fetch(db), render(data) -> bytes)."""
+    from typing import List
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from pydantic import TypeAdapter
+
+    from config.responses import rows_response
+    from dto.orderschema import OrderWithItem
+    from dto.reviewschema import ReviewOut
+    from dto.userschema import UserOut
+    from models.reviewmodels import ReviewModel
+    from models.usermodels import User
+    from order.orderservice import OrderService
+    from review.reviewservice import ReviewService
+    from users.usersservice import UserService
+
+    def encoder(content):
+        return JSONResponse(jsonable_encoder(content)).body
+
+    def model(schema):
+        adapter = TypeAdapter(List[schema])
+
+        def render(content):
+            value = adapter.validate_python(content, from_attributes=True)
+            return ORJSONResponse(adapter.dump_python(value, mode="json")).body
+
+        return render
+
+    def rows(result):
+        return rows_response(result).body
+
+    return {
+        "users": {
+            "encoder": (lambda db: db.query(User).all(), encoder),
+            "model": (lambda db: db.query(User).all(), model(UserOut)),
+            "rows": (lambda db: UserService.get_allUser(db=db), rows),
+        },
+        "reviews": {
+            "encoder": (lambda db: db.query(ReviewModel).all(), encoder),
+            "model": (lambda db: db.query(ReviewModel).all(), model(ReviewOut)),
+            "rows": (lambda db: ReviewService.get_all(db=db), rows),
+        },
+        "orders": {
+            # OrderService.getAll before: ORM pairs into dicts into jsonable_encoder.
+            "encoder": (
+                lambda db: [
+                    {**order_fields(order), "order_items": {
+                        "id": item.id, "name": item.name, "quantity": item.quantity, "price": item.price,
+                    }}
+                    for order, item in order_pairs(db)
+                ],
+                encoder,
+            ),
+            "model": (
+                lambda db: [{**order_fields(order), "order_items": item} for order, item in order_pairs(db)],
+                model(OrderWithItem),
+            ),
+            "rows": (lambda db: OrderService.getAll(db=db), lambda content: ORJSONResponse(content).body),
+        },
+    }
+
+
+def best(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    boot_app(SQL_INSTRUMENTATION="False", METRICS_ENABLED="False")
+    from config.database import SessionLocal
+
+    fill(args.rows)
+
+    print(f"{args.rows} rows, best of {args.repeat}, milliseconds")
+    print(f"{'list':<8} {'path':<8} {'serialize':>10} {'query+serialize':>16} {'bytes':>10}")
+    with SessionLocal() as db:
+        for name, cases in paths().items():
+            for path, (fetch, render) in cases.items():
+                data = fetch(db)
+                size = len(render(data))
+                serialize = best(lambda: render(data), args.repeat)
+
+                def end_to_end():
+                    # A fresh identity map, so the ORM paths build their instances again.
+                    db.expunge_all()
+                    render(fetch(db))
+
+                total = best(end_to_end, args.repeat)
+                print(f"{name:<8} {path:<8} {serialize:10.1f} {total:16.1f} {size:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Read/write throughput of SQLite deployments across several uvicorn workers.
+
+Compares SQLITE_PROFILE=default (rollback journal, synchronous=FULL) with
+SQLITE_PROFILE=tuned (WAL, mmap, busy_timeout, single-writer queue) on a
+mix of product reads and product updates. "database is locked" failures
+show up as errors.
+
+Run from ``backend/app``::
+
+    python -m benchmarks.sqlite_throughput --workers 4 --concurrency 64 --write-ratio 0.2
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import drive, serve
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    write_every = max(1, round(1 / args.write_ratio)) if args.write_ratio > 0 else None
+
+    def product(i):
+        return {
+            "name": f"Product {i}", "image": "", "category": "bench", "description": "",
+            "price": 10 + i % 90, "countInStock": i % 50, "rating": i % 5,
+        }
+
+    async def request(client, i):
+        product_id = i % args.products + 1
+        if write_every and i % write_every == 0:
+            return await client.put(f"/api/product/{product_id}", json=product(i))
+        return await client.get(f"/api/product/{product_id}")
+
+    async def seed(client, i):
+        return await client.post("/api/product/", json=product(i))
+
+    print(f"{'profile':>8} {'workers':>7} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for profile in ("default", "tuned"):
+        with serve(workers=args.workers, SQLITE_PROFILE=profile, RATE_LIMIT_ENABLED="False") as base_url:
+            asyncio.run(drive(base_url, seed, 8, args.products))
+            result = asyncio.run(drive(base_url, request, args.concurrency, args.requests))
+        print(f"{profile:>8} {args.workers:>7} {result['rps']:>9} {result['p50_ms']:>8} "
+              f"{result['p95_ms']:>8} {result['p99_ms']:>8} {result['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
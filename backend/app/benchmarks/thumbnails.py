@@ -0,0 +1,65 @@
+"""Rendering product thumbnails: one process against a pool.
+
+Writes ``--images`` synthetic photos (``--size`` pixels, noisy so they
+compress like real ones) to a temporary MEDIA_DIR, then renders every
+configured width as JPEG and WebP with :func:`product.images.render`,
+first in this process and then across ``--processes`` pool processes, as
+``products.thumbnails_rebuild`` does. Run from ``backend/app``::
+
+    python -m benchmarks.thumbnails --images 64 --processes 4
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+def photos(count: int, width: int, height: int) -> list:
+    import numpy as np
+    from PIL import Image
+
+    from product.images import _store
+
+    rng = np.random.default_rng(42)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    originals = []
+    for _ in range(count):
+        pixels = gradient + rng.normal(0, 25, (height, width, 3)) + rng.integers(0, 100, 3)
+        buffer = io.BytesIO()
+        Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, format="JPEG", quality=92)
+        originals.append(_store(buffer.getvalue(), "originals", "jpg"))
+    return originals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--size", default="2400x1600", help="WIDTHxHEIGHT of the originals")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    os.environ["USE_SQLITE_DB"] = "True"
+    os.environ["MEDIA_DIR"] = tempfile.mkdtemp(prefix="ecom-bench-media-")
+    from product.images import _render_args, render
+
+    width, height = map(int, args.size.split("x"))
+    originals = photos(args.images, width, height)
+    print(f"{args.images} originals of {width}x{height}, widths {_render_args()[0]}")
+
+    start = time.perf_counter()
+    for original in originals:
+        render(original, *_render_args())
+    serial = time.perf_counter() - start
+    print(f"1 process    {serial:6.2f}s  {args.images / serial:6.1f} images/s")
+
+    with ProcessPoolExecutor(args.processes) as pool:
+        start = time.perf_counter()
+        list(pool.map(render, originals, *zip(*[_render_args()] * len(originals))))
+        pooled = time.perf_counter() - start
+    print(f"{args.processes} processes  {pooled:6.2f}s  {args.images / pooled:6.1f} images/s")
+
+
+if __name__ == "__main__":
+    main()
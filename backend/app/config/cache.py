@@ -0,0 +1,406 @@
+"""Result cache for service methods.
+
+::
+
+    class ProductService:
+        @staticmethod
+        @cache.cached(ttl=60, stale=600, tags=("products", "product:{productid}"))
+        def show_product(productid: int, db: Session): ...
+
+        @staticmethod
+        def update_product(productid: int, request, db: Session):
+            ...
+            db.commit()
+            cache.invalidate("products", f"product:{productid}")
+
+Keys are built from the method and its arguments, except ``db``. An entry
+is fresh for ``ttl`` seconds, then served stale for another ``stale``
+seconds while one background refresh recomputes it with its own session.
+Concurrent misses for a key are coalesced, so only one computation runs
+per key at a time: per worker, and for sync methods with the redis
+backend also across workers.
+
+Tags are versioned counters in Redis. An entry remembers the versions of
+its tags at the time it was computed, and :meth:`ServiceCache.invalidate`
+bumps them. With ``REDIS_URL`` set, entries computed before the bump are
+therefore ignored by every worker, whichever backend holds them. Without
+it the counters are a per-process ``LocalRedis``, and an invalidation
+only reaches the process that made the write, which is only correct
+with a single worker.
+
+For async methods the Redis calls run in the thread pool when Redis is
+remote, so a slow round trip does not hold up the event loop.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import math
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from config.config import settings
+from config.redisclient import get_redis
+from monitoring.profiler import run_in_threadpool
+from monitoring.prometheus import metrics
+
+logger = logging.getLogger("ecom.cache")
+
+TAG_PREFIX = "cache:tag:"
+VALUE_PREFIX = "cache:value:"
+LOCK_PREFIX = "cache:lock:"
+
+
+class MemoryBackend:
+    """Per-process LRU.
+
+    Values are shared between requests, not copied, so cached results must
+    be treated as read-only.
+    """
+
+    shared = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires = item
+            if expires <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, ttl: float):
+        with self._lock:
+            self._entries[key] = (entry, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisBackend:
+    """Pickled entries in Redis, shared by all workers."""
+
+    shared = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        raw = self.client.get(VALUE_PREFIX + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, entry, ttl: float):
+        self.client.set(VALUE_PREFIX + key, pickle.dumps(entry, pickle.HIGHEST_PROTOCOL), ex=max(1, math.ceil(ttl)))
+
+
+class _Flight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class _Method:
+    """What one decorated method needs on every call."""
+
+    def __init__(self, fn, ttl, stale, tags, session_factory):
+        self.fn = fn
+        self.name = f"{fn.__module__}.{fn.__qualname__}"
+        self.signature = inspect.signature(fn)
+        self.ttl = ttl
+        self.stale = stale
+        self.tags = tags
+        self.session_factory = session_factory
+        self.results = {}
+
+    def count(self, result: str):
+        cell = self.results.get(result)
+        if cell is None:
+            cell = self.results[result] = metrics.counter(
+                "service_cache_requests_total", (("function", self.name), ("result", result))
+            )
+        # From threadpool and refresh threads as well as the event loop.
+        metrics.add_to(cell)
+
+    def bind(self, args, kwargs):
+        bound = self.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        key_args = ",".join(f"{name}={value!r}" for name, value in arguments.items() if name != "db")
+        tags = tuple(tag.format(**arguments) for tag in self.tags)
+        return arguments, f"{self.name}({key_args})", tags
+
+
+class ServiceCache:
+    def __init__(self, backend, enabled: bool = True, lock_seconds: float = 10.0, remote: bool = False):
+        self.backend = backend
+        self.enabled = enabled
+        self.remote = remote
+        self.lock_seconds = lock_seconds
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self._async_flights = {}
+        self._refreshing = set()
+        self._tasks = set()
+
+    # Tags
+
+    def _versions(self, tags) -> tuple:
+        if not tags:
+            return ()
+        values = get_redis().mget([TAG_PREFIX + tag for tag in tags])
+        return tuple(int(value) if value is not None else 0 for value in values)
+
+    def _bump(self, tags):
+        pipeline = get_redis().pipeline()
+        for tag in tags:
+            pipeline.incr(TAG_PREFIX + tag)
+        pipeline.execute()
+
+    def invalidate(self, *tags: str):
+        """Drop every entry carrying one of ``tags``; call it after the write commits."""
+        if not self.enabled or not tags:
+            return
+        self._bump(tags)
+        if settings.DATABASE_REPLICA_URLS:
+            # A read between the commit and the replicas catching up may have
+            # cached the old rows again; invalidate once more after the lag
+            # that read-your-writes allows for.
+            timer = threading.Timer(settings.READ_YOUR_WRITES_SECONDS, self._bump, args=(tags,))
+            timer.daemon = True
+            timer.start()
+
+    # Lookup and compute
+
+    def _lookup(self, method: _Method, key: str, tags):
+        """(value, state) with state "fresh" or "stale", or None on a miss."""
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        value, fresh_until, versions = entry
+        if versions != self._versions(tags):
+            return None
+        return value, "fresh" if time.time() < fresh_until else "stale"
+
+    def _store(self, method: _Method, key: str, value, versions):
+        self.backend.set(key, (value, time.time() + method.ttl, versions), method.ttl + method.stale)
+
+    def _acquire(self, key: str) -> bool:
+        """With a shared backend, take the key's lock across workers."""
+        if not self.backend.shared:
+            return True
+        return bool(get_redis().set(LOCK_PREFIX + key, b"1", ex=math.ceil(self.lock_seconds), nx=True))
+
+    def _wait_for_other_worker(self, method: _Method, key: str, tags):
+        """Poll for the value the worker holding the lock stores; None if it gives up."""
+        deadline = time.monotonic() + self.lock_seconds
+        while time.monotonic() < deadline:
+            time.sleep(0.025)
+            found = self._lookup(method, key, tags)
+            if found is not None:
+                return found
+        return None
+
+    def _compute(self, method: _Method, arguments: dict, key: str, tags):
+        acquired = self._acquire(key)
+        if not acquired:
+            found = self._wait_for_other_worker(method, key, tags)
+            if found is not None:
+                return found[0]
+        try:
+            # Versions are read before computing: a write that lands meanwhile
+            # makes the stored entry invalid instead of hiding it.
+            versions = self._versions(tags)
+            value = method.fn(**arguments)
+            self._store(method, key, value, versions)
+            return value
+        finally:
+            if acquired and self.backend.shared:
+                get_redis().delete(LOCK_PREFIX + key)
+
+    async def _off_loop(self, fn, *args):
+        # LocalRedis and the memory backend answer without blocking; a thread
+        # hop would only slow them down.
+        if self.remote:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def _compute_async(self, method: _Method, arguments: dict, key: str, tags):
+        versions = await self._off_loop(self._versions, tags)
+        value = await method.fn(**arguments)
+        await self._off_loop(self._store, method, key, value, versions)
+        return value
+
+    def _single_flight(self, method: _Method, key: str, compute):
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            method.count("coalesced")
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = compute()
+            return flight.value
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.event.set()
+
+    async def _single_flight_async(self, method: _Method, key: str, compute):
+        future = self._async_flights.get(key)
+        if future is not None:
+            method.count("coalesced")
+            return await asyncio.shield(future)
+        future = self._async_flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await compute()
+            future.set_result(value)
+            return value
+        except BaseException as error:
+            future.set_exception(error)
+            # Retrieved here so an exception nobody else awaited is not reported.
+            future.exception()
+            raise
+        finally:
+            del self._async_flights[key]
+
+    # Background refresh
+
+    def _refresh(self, method: _Method, arguments: dict, key: str, tags):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        def run():
+            try:
+                with method.session_factory() as db:
+                    fresh = dict(arguments, db=db)
+                    self._single_flight(method, key, lambda: self._compute(method, fresh, key, tags))
+            except Exception:
+                logger.exception("cache refresh of %s failed", key)
+            finally:
+                self._refreshing.discard(key)
+
+        threading.Thread(target=run, name="cache-refresh", daemon=True).start()
+
+    def _refresh_async(self, method: _Method, arguments: dict, key: str, tags):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def run():
+            try:
+                async with method.session_factory() as db:
+                    fresh = dict(arguments, db=db)
+                    await self._single_flight_async(
+                        method, key, lambda: self._compute_async(method, fresh, key, tags)
+                    )
+            except Exception:
+                logger.exception("cache refresh of %s failed", key)
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(run())
+        # The loop only keeps weak references to tasks.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # Decorator
+
+    def cached(self, ttl: float, stale: float = 0, tags=(), session_factory=None):
+        """Cache a service method's result.
+
+        ``tags`` may reference arguments, e.g. ``"product:{productid}"``.
+        ``session_factory`` opens the session a stale-while-revalidate
+        refresh runs with, since the request's own session is closed by
+        then; it defaults to a read session.
+        """
+
+        def decorate(fn):
+            if not self.enabled:
+                return fn
+
+            is_async = inspect.iscoroutinefunction(fn)
+            method = _Method(fn, ttl, stale, tuple(tags), session_factory or _default_session_factory(is_async))
+
+            if is_async:
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    arguments, key, entry_tags = method.bind(args, kwargs)
+                    found = await self._off_loop(self._lookup, method, key, entry_tags)
+                    if found is not None:
+                        value, state = found
+                        if state == "stale":
+                            method.count("stale")
+                            self._refresh_async(method, arguments, key, entry_tags)
+                        else:
+                            method.count("hit")
+                        return value
+                    method.count("miss")
+                    return await self._single_flight_async(
+                        method, key, lambda: self._compute_async(method, arguments, key, entry_tags)
+                    )
+
+                async_wrapper.cache_method = method
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                arguments, key, entry_tags = method.bind(args, kwargs)
+                found = self._lookup(method, key, entry_tags)
+                if found is not None:
+                    value, state = found
+                    if state == "stale":
+                        method.count("stale")
+                        self._refresh(method, arguments, key, entry_tags)
+                    else:
+                        method.count("hit")
+                    return value
+                method.count("miss")
+                return self._single_flight(
+                    method, key, lambda: self._compute(method, arguments, key, entry_tags)
+                )
+
+            wrapper.cache_method = method
+            return wrapper
+
+        return decorate
+
+
+def _default_session_factory(is_async: bool):
+    from config.replicas import async_read_session, read_session
+
+    return async_read_session if is_async else read_session
+
+
+def make_backend():
+    if settings.CACHE_BACKEND == "redis":
+        return RedisBackend(get_redis())
+    return MemoryBackend(settings.CACHE_MAX_ENTRIES)
+
+
+cache = ServiceCache(make_backend(), enabled=settings.CACHE_ENABLED == "True", remote=bool(settings.REDIS_URL))
+
+metrics.describe("service_cache_requests_total", "counter",
+                 "Cached service calls by result: hit, stale (served while refreshing), miss, "
+                 "coalesced (waited for a computation already running).")
@@ -0,0 +1,350 @@
+import time
+import zlib
+from collections import OrderedDict
+from hashlib import blake2b
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from config.config import settings
+from monitoring.prometheus import metrics
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/javascript", "application/xml",
+    "application/problem+json", "image/svg+xml",
+)
+# Events must reach the client as they are sent, not when a compressor block fills.
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+# Larger bodies are compressed in the threadpool, to keep the event loop free.
+OFFLOAD_BYTES = 256 * 1024
+
+
+class Gzip:
+    name = "gzip"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return (
+            lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush,
+        )
+
+
+class Brotli:
+    name = "br"
+
+    def __init__(self, quality: int = 5):
+        self.quality = quality
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, quality=self.quality)
+
+    def stream(self):
+        compressor = brotli.Compressor(quality=self.quality)
+        return lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish
+
+
+class Zstd:
+    name = "zstd"
+
+    def __init__(self, level: int = 3):
+        self.compressor = zstandard.ZstdCompressor(level=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def stream(self):
+        compressor = self.compressor.compressobj()
+        return (
+            lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush,
+        )
+
+
+def available_encoders() -> dict:
+    """Encoders from COMPRESSION_ENCODINGS whose library is installed, in
+    server preference order."""
+    factories = {"gzip": Gzip}
+    if brotli is not None:
+        factories["br"] = Brotli
+    if zstandard is not None:
+        factories["zstd"] = Zstd
+    names = [name.strip() for name in settings.COMPRESSION_ENCODINGS.split(",")]
+    return {name: factories[name]() for name in names if name in factories}
+
+
+def negotiate(accept_encoding: str, encoders) -> str:
+    """The encoding to use for an Accept-Encoding header, or None for identity.
+
+    The highest q-value wins; ties go to the server's preference order.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[token] = weight
+
+    best, best_weight = None, 0.0
+    for name in encoders:
+        weight = weights.get(name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires."""
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in if_none_match.split(","))
+
+
+class VariantCache:
+    """Compressed bodies by (path, ETag, encoding), least recently used
+    evicted first once ``max_bytes`` is reached.
+
+    Only touched from the event loop thread, so there is no lock.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._size_gauge = metrics.gauge("http_compression_cache_bytes")
+
+    def get(self, key):
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, key, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+        self._size_gauge[0] = self.size
+
+
+def _compress(encoder, body: bytes):
+    start = time.thread_time()
+    compressed = encoder.compress(body)
+    return compressed, time.thread_time() - start
+
+
+class CompressionMiddleware:
+    """Compresses responses with the best encoding the client accepts.
+
+    Complete bodies below ``min_size`` are sent as they are. Streaming
+    bodies are compressed chunk by chunk, each chunk flushed so the client
+    gets it right away.
+
+    Cacheable responses (200 to GET or HEAD without ``no-store``) get a
+    weak ETag over the uncompressed body unless the endpoint set one. A
+    matching If-None-Match is answered with 304, and compressed variants
+    are kept in a :class:`VariantCache`, so a hot payload is compressed
+    once rather than on every request.
+    """
+
+    def __init__(self, app, min_size: int = None, cache_bytes: int = None):
+        self.app = app
+        self.min_size = settings.COMPRESSION_MIN_SIZE if min_size is None else min_size
+        self.encoders = available_encoders()
+        self.cache = VariantCache(
+            settings.COMPRESSION_CACHE_MB * 1024 * 1024 if cache_bytes is None else cache_bytes
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        responder = _Responder(
+            self, scope, send,
+            negotiate(headers.get("accept-encoding", ""), self.encoders),
+            headers.get("if-none-match"),
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    def __init__(self, middleware: CompressionMiddleware, scope, send, encoding, if_none_match):
+        self.middleware = middleware
+        self.scope = scope
+        self._send = send
+        self.encoding = encoding
+        self.if_none_match = if_none_match
+        self.start = None
+        self.compressible = False
+        self.stream = None
+
+    async def send(self, message):
+        kind = message["type"]
+        if kind == "http.response.start":
+            # Held back until the first body chunk shows whether the body is complete.
+            self.start = message
+            return
+        if kind != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            if message.get("more_body", False):
+                await self._begin_stream(start, message)
+            else:
+                await self._send_complete(start, message)
+            return
+
+        if self.stream is None:
+            await self._send(message)
+            return
+        compress, finish = self.stream
+        body = compress(message.get("body", b""))
+        more_body = message.get("more_body", False)
+        if not more_body:
+            body += finish()
+        self._count_stream(len(message.get("body", b"")), len(body))
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    def _prepare(self, start) -> MutableHeaders:
+        headers = MutableHeaders(raw=list(start.get("headers", [])))
+        status = start["status"]
+        content_type = headers.get("content-type", "")
+        self.compressible = (
+            status not in (204, 304)
+            and status >= 200
+            and "content-encoding" not in headers
+            and "no-transform" not in headers.get("cache-control", "")
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and not content_type.startswith(UNCOMPRESSED_TYPES)
+        )
+        if self.compressible:
+            headers.add_vary_header("Accept-Encoding")
+        return headers
+
+    async def _begin_stream(self, start, message):
+        headers = self._prepare(start)
+        if self.compressible and self.encoding is not None:
+            encoder = self.middleware.encoders[self.encoding]
+            self.stream = encoder.stream()
+            del headers["content-length"]
+            headers["content-encoding"] = self.encoding
+            compress, _ = self.stream
+            body = compress(message.get("body", b""))
+            self._count_stream(len(message.get("body", b"")), len(body))
+            metrics.inc("http_compression_responses_total", (("encoding", self.encoding), ("cache", "stream")))
+            message = {"type": "http.response.body", "body": body, "more_body": True}
+        start["headers"] = headers.raw
+        await self._send(start)
+        await self._send(message)
+
+    def _count_stream(self, size_in: int, size_out: int):
+        labels = (("encoding", self.encoding),)
+        metrics.inc("http_compression_input_bytes_total", labels, size_in)
+        metrics.inc("http_compression_output_bytes_total", labels, size_out)
+
+    async def _send_complete(self, start, message):
+        headers = self._prepare(start)
+        body = message.get("body", b"")
+
+        cacheable = (
+            start["status"] == 200
+            and self.scope["method"] in ("GET", "HEAD")
+            and "no-store" not in headers.get("cache-control", "")
+        )
+        etag = headers.get("etag")
+        if cacheable and etag is None:
+            etag = f'W/"{blake2b(body, digest_size=16).hexdigest()}"'
+            headers["etag"] = etag
+
+        if cacheable and self.if_none_match and etag_matches(self.if_none_match, etag):
+            metrics.inc("http_not_modified_total")
+            for name in ("content-length", "content-type"):
+                del headers[name]
+            start.update(status=304, headers=headers.raw)
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": b""})
+            return
+
+        if self.compressible and self.encoding is not None and len(body) >= self.middleware.min_size:
+            body = await self._compressed(body, etag if cacheable else None)
+            headers["content-encoding"] = self.encoding
+            headers["content-length"] = str(len(body))
+            message = {"type": "http.response.body", "body": body}
+
+        start["headers"] = headers.raw
+        await self._send(start)
+        await self._send(message)
+
+    async def _compressed(self, body: bytes, etag) -> bytes:
+        encoding = self.encoding
+        labels = (("encoding", encoding),)
+        cache = self.middleware.cache
+        key = (self.scope["path"], etag, encoding) if etag else None
+
+        compressed = cache.get(key) if key else None
+        if compressed is None:
+            encoder = self.middleware.encoders[encoding]
+            if len(body) >= OFFLOAD_BYTES:
+                compressed, cpu = await run_in_threadpool(_compress, encoder, body)
+            else:
+                compressed, cpu = _compress(encoder, body)
+            metrics.inc("http_compression_cpu_seconds_total", labels, cpu)
+            if key:
+                cache.put(key, compressed)
+            result = "miss" if key else "uncacheable"
+        else:
+            result = "hit"
+
+        metrics.inc("http_compression_responses_total", labels + (("cache", result),))
+        metrics.inc("http_compression_input_bytes_total", labels, len(body))
+        metrics.inc("http_compression_output_bytes_total", labels, len(compressed))
+        return compressed
+
+
+metrics.describe("http_compression_responses_total", "counter",
+                 "Compressed responses by encoding and variant cache result (hit, miss, uncacheable, stream).")
+metrics.describe("http_compression_input_bytes_total", "counter", "Uncompressed bytes of compressed responses.")
+metrics.describe("http_compression_output_bytes_total", "counter",
+                 "Bytes sent for compressed responses; input minus output is the saving.")
+metrics.describe("http_compression_cpu_seconds_total", "counter",
+                 "CPU time spent compressing (variant cache hits cost none).")
+metrics.describe("http_compression_cache_bytes", "gauge", "Size of the precompressed variant cache.")
+metrics.describe("http_not_modified_total", "counter", "304 responses to a matching If-None-Match.")
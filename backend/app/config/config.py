@@ -15,8 +15,116 @@ class Settings:
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "tdd")
     DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
     SECRET_KEY: str = os.getenv("SECRET_KEY")
+    DEBUG: str = os.getenv("DEBUG", "False")
+    AUTO_CREATE_TABLES: str = os.getenv("AUTO_CREATE_TABLES", "False")
+    # Serve read endpoints from async handlers on an asyncpg/aiosqlite engine.
+    USE_ASYNC_DB: str = os.getenv("USE_ASYNC_DB", "False")
+    # Connection pool. DB_POOL_MODE=null disables pooling for use behind PgBouncer.
+    DB_POOL_MODE: str = os.getenv("DB_POOL_MODE", "queue")  # queue | null
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", 30))  # in secs
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))  # in secs, -1 disables
+    DB_POOL_PRE_PING: str = os.getenv("DB_POOL_PRE_PING", "True")
+    # Comma-separated read replica URLs used by the read-only catalog endpoints.
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    REPLICA_BALANCING: str = os.getenv("REPLICA_BALANCING", "round_robin")  # round_robin | least_connections
+    READ_YOUR_WRITES_SECONDS: int = int(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+    # "tuned" enables WAL, relaxed fsync, mmap and a single-writer queue; "default" keeps SQLite's defaults.
+    SQLITE_PROFILE: str = os.getenv("SQLITE_PROFILE", "tuned")
+    SQLITE_BUSY_TIMEOUT: int = int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000))  # in ms
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", 65536))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))  # in bytes
+    # Per-request query counting, slow-query log and N+1 detection.
+    SQL_INSTRUMENTATION: str = os.getenv("SQL_INSTRUMENTATION", "True")
+    SLOW_QUERY_MS: int = int(os.getenv("SLOW_QUERY_MS", 200))
+    N_PLUS_ONE_THRESHOLD: int = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))
+    METRICS_ENABLED: str = os.getenv("METRICS_ENABLED", "True")
+    METRICS_DIR: str = os.getenv("METRICS_DIR", "")
+    METRICS_FLUSH_SECONDS: float = float(os.getenv("METRICS_FLUSH_SECONDS", 5))
+    # Bearer token Prometheus scrapes /metrics with; staff tokens work too.
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+    PROFILING_ENABLED: str = os.getenv("PROFILING_ENABLED", "False")
+    PROFILE_SAMPLE_RATE: int = int(os.getenv("PROFILE_SAMPLE_RATE", 100))
+    PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "")
+    COMPRESSION_ENABLED: str = os.getenv("COMPRESSION_ENABLED", "True")
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))  # in bytes
+    # Server preference order; br and zstd need the brotli and zstandard packages.
+    COMPRESSION_ENCODINGS: str = os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip")
+    COMPRESSION_CACHE_MB: int = int(os.getenv("COMPRESSION_CACHE_MB", 32))
+    # Service result cache: "memory" is a per-worker LRU, "redis" is shared (REDIS_URL).
+    CACHE_ENABLED: str = os.getenv("CACHE_ENABLED", "True")
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")  # memory | redis
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+    # server.py: worker processes (0 = one per CPU when all their state is shared through Redis, else one) and seconds to drain requests on stop or reload.
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", 0))
+    GRACEFUL_TIMEOUT: int = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+    # Proxies (comma separated IPs, "*" for any) whose X-Forwarded-For/-Proto server.py trusts.
+    FORWARDED_ALLOW_IPS: str = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+    # Background jobs (jobs/worker.py): JOB_WORKERS processes are forked by server.py.
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", 1))
+    JOB_POLL_SECONDS: float = float(os.getenv("JOB_POLL_SECONDS", 1))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+    JOB_RETRY_SECONDS: float = float(os.getenv("JOB_RETRY_SECONDS", 10))  # doubled on each retry
+    JOB_HEARTBEAT_SECONDS: float = float(os.getenv("JOB_HEARTBEAT_SECONDS", 10))
+    JOB_WORKER_NICE: int = int(os.getenv("JOB_WORKER_NICE", 10))
+    JOB_WORKER_CPUS: str = os.getenv("JOB_WORKER_CPUS", "")  # e.g. "2,3"; empty = any
+    JOB_RETENTION_DAYS: int = int(os.getenv("JOB_RETENTION_DAYS", 7))
+    # Review sentiment (product/sentiment.py): "vader", or "transformer" with SENTIMENT_MODEL.
+    SENTIMENT_BACKEND: str = os.getenv("SENTIMENT_BACKEND", "vader")  # vader | transformer
+    SENTIMENT_MODEL: str = os.getenv("SENTIMENT_MODEL", "distilbert-base-uncased-finetuned-sst-2-english")
+    SENTIMENT_ONNX: str = os.getenv("SENTIMENT_ONNX", "False")  # SENTIMENT_MODEL is a directory with model.onnx
+    SENTIMENT_QUANTIZE: str = os.getenv("SENTIMENT_QUANTIZE", "False")  # int8, with SENTIMENT_ONNX
+    SENTIMENT_THREADS: int = int(os.getenv("SENTIMENT_THREADS", 0))  # 0 = the runtime's default
+    SENTIMENT_BATCH_SIZE: int = int(os.getenv("SENTIMENT_BATCH_SIZE", 32))
+    SENTIMENT_BATCH_WAIT_MS: float = float(os.getenv("SENTIMENT_BATCH_WAIT_MS", 10))
+    SENTIMENT_CACHE_SIZE: int = int(os.getenv("SENTIMENT_CACHE_SIZE", 50000))
+    # Review keyphrases (product/insights.py), rebuilt daily at INSIGHTS_REBUILD_AT (UTC, "" = never).
+    INSIGHTS_TERMS: int = int(os.getenv("INSIGHTS_TERMS", 10))
+    INSIGHTS_MAX_FEATURES: int = int(os.getenv("INSIGHTS_MAX_FEATURES", 50000))
+    INSIGHTS_REBUILD_AT: str = os.getenv("INSIGHTS_REBUILD_AT", "03:00")
+    INSIGHTS_REFRESH_DELAY_SECONDS: float = float(os.getenv("INSIGHTS_REFRESH_DELAY_SECONDS", 60))
+    INSIGHTS_VECTORIZER_PATH: str = os.getenv("INSIGHTS_VECTORIZER_PATH", "review_tfidf.joblib")
+    # Product images (product/images.py): originals and resized copies under MEDIA_DIR, served at MEDIA_URL.
+    MEDIA_DIR: str = os.getenv("MEDIA_DIR", "media")
+    MEDIA_URL: str = os.getenv("MEDIA_URL", "/api/media")
+    IMAGE_MAX_BYTES: int = int(os.getenv("IMAGE_MAX_BYTES", 10 * 1024 * 1024))
+    IMAGE_WIDTHS: str = os.getenv("IMAGE_WIDTHS", "160,480,960")
+    IMAGE_JPEG_QUALITY: int = int(os.getenv("IMAGE_JPEG_QUALITY", 85))
+    IMAGE_WEBP_QUALITY: int = int(os.getenv("IMAGE_WEBP_QUALITY", 80))
+    IMAGE_PROCESSES: int = int(os.getenv("IMAGE_PROCESSES", 0))  # bulk re-rendering; 0 = one per CPU
+    # Export files (jobs/exports.py); shared storage when job and HTTP workers run on different hosts.
+    EXPORT_DIR: str = os.getenv("EXPORT_DIR", "exports")
+    EXPORT_FRESH_SECONDS: int = int(os.getenv("EXPORT_FRESH_SECONDS", 300))  # identical exports reuse the file
+    EXPORT_BATCH_ROWS: int = int(os.getenv("EXPORT_BATCH_ROWS", 5000))
+    # Server-sent events (config/events.py), broadcast to all workers over Redis pub/sub.
+    EVENTS_CHANNEL: str = os.getenv("EVENTS_CHANNEL", "ecom:events")
+    EVENTS_MAX_CONNECTIONS: int = int(os.getenv("EVENTS_MAX_CONNECTIONS", 20000))  # per worker
+    EVENTS_MAX_PRODUCTS: int = int(os.getenv("EVENTS_MAX_PRODUCTS", 100))  # per stream
+    EVENTS_MAX_PENDING: int = int(os.getenv("EVENTS_MAX_PENDING", 64))  # a stream further behind is closed
+    EVENTS_HEARTBEAT_SECONDS: float = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+    EVENTS_RETRY_MS: int = int(os.getenv("EVENTS_RETRY_MS", 3000))
+    # POST /api/order/fulfillment/batch: ids per request, and per transaction.
+    FULFILLMENT_MAX_IDS: int = int(os.getenv("FULFILLMENT_MAX_IDS", 20000))
+    FULFILLMENT_CHUNK_SIZE: int = int(os.getenv("FULFILLMENT_CHUNK_SIZE", 500))
+    PRICING_MAX_LINES: int = int(os.getenv("PRICING_MAX_LINES", 500))  # cart lines per order
+    PAYMENT_GATEWAY: str = os.getenv("PAYMENT_GATEWAY", "stripe")
+    PAYMENT_STUB_LATENCY_MS: float = float(os.getenv("PAYMENT_STUB_LATENCY_MS", 0))
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30  # in mins
+    # When "True", requests are authorized from the JWT claims alone and the
+    # users table is only read at login time.
+    STATELESS_AUTH: str = os.getenv("STATELESS_AUTH", "False")
+    REVOCATION_SYNC_SECONDS: int = int(os.getenv("REVOCATION_SYNC_SECONDS", 5))
+    # Shared state for multi-worker deployments; unset means an in-process stand-in.
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+    RATE_LIMIT_ENABLED: str = os.getenv("RATE_LIMIT_ENABLED", "True")
+    # memory | redis; shared through Redis whenever there is one.
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "redis" if REDIS_URL else "memory")
+    LOGIN_RATE_LIMIT_PER_IP: int = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", 20))
+    LOGIN_RATE_LIMIT_PER_USERNAME: int = int(os.getenv("LOGIN_RATE_LIMIT_PER_USERNAME", 5))
+    LOGIN_RATE_LIMIT_WINDOW: int = int(os.getenv("LOGIN_RATE_LIMIT_WINDOW", 60))  # in secs
 
 
 settings = Settings()
\ No newline at end of file
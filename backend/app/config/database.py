@@ -2,17 +2,26 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .pool import engine_options, register_engine
+from .sqlite import WriterQueue, apply_pragmas, serialize_writes
 
 if settings.USE_SQLITE_DB == "True":
     SQLALCHAMY_DATABASE_URL = 'sqlite:///./ecomfastapi.db'
-    engine = create_engine(SQLALCHAMY_DATABASE_URL,connect_args={"check_same_thread": False})
+    engine = create_engine(SQLALCHAMY_DATABASE_URL,connect_args={"check_same_thread": False}, **engine_options())
 else:
     SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options())
+
+register_engine("primary", engine)
 
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+SQLITE_TUNED = settings.USE_SQLITE_DB == "True" and settings.SQLITE_PROFILE == "tuned"
+if SQLITE_TUNED:
+    apply_pragmas(engine)
+    serialize_writes(SessionLocal, WriterQueue(timeout=settings.SQLITE_BUSY_TIMEOUT / 1000))
+
 Base = declarative_base()
 
 
@@ -21,4 +30,29 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.USE_ASYNC_DB == "True":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        engine.url.set(drivername=ASYNC_DRIVERS[engine.url.get_backend_name()]),
+        **engine_options(is_async=True),
+    )
+    register_engine("primary_async", async_engine.sync_engine)
+    if SQLITE_TUNED:
+        apply_pragmas(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
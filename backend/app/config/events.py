@@ -0,0 +1,245 @@
+"""Stock and order changes pushed to clients as server-sent events.
+
+Writers call :func:`publish` (or :func:`stock_changed`,
+:func:`order_changed`) once their transaction has committed. The event is
+published on the EVENTS_CHANNEL Redis channel, so it reaches every web
+worker whichever process made the change, job workers included. Without
+``REDIS_URL`` the channel is a ``LocalRedis`` one and only reaches the
+same process: changes made in a job worker reach no stream, and with more
+than one web worker a stream would miss the others' changes, so
+:func:`events_shared` is false and the stream endpoint refuses to start.
+
+Each web worker subscribes to the channel once, from a listener thread,
+however many clients it serves. The listener hands every event to the
+worker's :class:`EventHub` on the event loop, which encodes it once and
+puts the same bytes on the queue of each client subscribed to its topic.
+An idle client costs its queue and the coroutine streaming it, and
+nothing else: one hub task sends the keep-alive comments of all quiet
+streams.
+
+Topics are ``product:{id}``, for ``stock`` events, and ``user:{id}``, for
+``order`` events about that user's orders.
+"""
+import asyncio
+import logging
+import threading
+import time
+
+import orjson
+
+from config.config import settings
+from config.redisclient import get_redis
+from monitoring.prometheus import metrics
+
+logger = logging.getLogger("ecom.events")
+
+HEARTBEAT = b": keep-alive\n\n"
+
+
+def frame(event: str, data) -> bytes:
+    """One server-sent event."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+def publish(topic: str, event: str, data):
+    """Send ``event`` to the subscribers of ``topic`` in every worker.
+
+    Best effort: when Redis is unreachable the failure is logged and the
+    change that was reported stands.
+    """
+    message = orjson.dumps({"topic": topic, "event": event, "data": data})
+    try:
+        get_redis().publish(settings.EVENTS_CHANNEL, message)
+    except Exception:
+        logger.exception("publishing %s to %s failed", event, topic)
+
+
+def publish_many(messages):
+    """:func:`publish` for each (topic, event, data), in one round trip to Redis."""
+    pipeline = get_redis().pipeline(transaction=False)
+    count = 0
+    for topic, event, data in messages:
+        pipeline.publish(settings.EVENTS_CHANNEL, orjson.dumps({"topic": topic, "event": event, "data": data}))
+        count += 1
+    try:
+        pipeline.execute()
+    except Exception:
+        logger.exception("publishing %d events failed", count)
+
+
+def events_shared() -> bool:
+    """Whether every change reaches this worker's streams: through Redis, or because it is the only worker."""
+    return bool(settings.REDIS_URL) or settings.WEB_CONCURRENCY <= 1
+
+
+def stock_changed(product_id: int, count_in_stock: int):
+    publish(f"product:{product_id}", "stock", {"id": product_id, "countInStock": count_in_stock})
+
+
+def order_changed(user_id: int, order: dict):
+    """``order`` has the id, transactionId, isDelivered and updated_at of one of ``user_id``'s orders."""
+    publish(f"user:{user_id}", "order", order)
+
+
+def orders_changed(orders):
+    """:func:`order_changed` for many orders; each is a dict as above plus its ``user_id``."""
+    publish_many(
+        (f"user:{order['user_id']}", "order", {key: value for key, value in order.items() if key != "user_id"})
+        for order in orders
+    )
+
+
+class Subscriber:
+    """One client's stream: its topics and the events not yet sent to it.
+
+    Lighter than an ``asyncio.Queue``, which allocates several deques and
+    an event per instance; with tens of thousands of idle streams that is
+    most of their memory.
+    """
+
+    __slots__ = ("topics", "max_pending", "pending", "closed", "_waiter")
+
+    def __init__(self, topics: tuple, max_pending: int):
+        self.topics = topics
+        self.max_pending = max_pending
+        self.pending = []
+        self.closed = False
+        self._waiter = None
+
+    def put(self, data: bytes):
+        if self.closed:
+            return
+        if len(self.pending) >= self.max_pending:
+            # Too slow to keep up. Ending the stream makes the client
+            # reconnect and start again from a fresh snapshot.
+            self.close()
+            return
+        self.pending.append(data)
+        self._wake()
+
+    def close(self):
+        self.closed = True
+        self._wake()
+
+    def _wake(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def frames(self):
+        """The events of this subscription, until it is closed."""
+        while not self.closed:
+            if not self.pending:
+                self._waiter = asyncio.get_running_loop().create_future()
+                try:
+                    await self._waiter
+                finally:
+                    self._waiter = None
+                continue
+            # Few at most (max_pending), so popping from the front is cheap.
+            yield self.pending.pop(0)
+
+
+class EventHub:
+    """This worker's subscribers by topic. Used on the event loop only."""
+
+    def __init__(self, max_pending: int, heartbeat_seconds: float):
+        self.max_pending = max_pending
+        self.heartbeat_seconds = heartbeat_seconds
+        self._topics = {}
+        self._subscribers = set()
+        self._loop = None
+        self._tasks = set()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, topics) -> Subscriber:
+        self._start()
+        subscriber = Subscriber(tuple(topics), self.max_pending)
+        for topic in subscriber.topics:
+            self._topics.setdefault(topic, set()).add(subscriber)
+        self._subscribers.add(subscriber)
+        metrics.set("events_subscribers", (), len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        for topic in subscriber.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._topics[topic]
+        self._subscribers.discard(subscriber)
+        metrics.set("events_subscribers", (), len(self._subscribers))
+
+    def dispatch(self, topic: str, data: bytes):
+        subscribers = self._topics.get(topic)
+        if subscribers:
+            metrics.inc("events_delivered_total", (), len(subscribers))
+            for subscriber in subscribers:
+                subscriber.put(data)
+
+    def close(self):
+        """End every stream, e.g. so a stopping worker need not wait for them."""
+        for subscriber in self._subscribers:
+            subscriber.close()
+
+    def _start(self):
+        # The hub outlives event loops (a forked worker, a test client), and
+        # neither the listener nor the heartbeat task survive them.
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        task = loop.create_task(self._heartbeats())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        threading.Thread(target=self._listen, args=(loop,), name="events-listener", daemon=True).start()
+
+    def heartbeat(self):
+        """Send a keep-alive comment to every stream with nothing queued."""
+        for subscriber in self._subscribers:
+            if not subscriber.pending:
+                subscriber.put(HEARTBEAT)
+
+    async def _heartbeats(self):
+        # Proxies drop connections that stay silent for too long.
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            self.heartbeat()
+
+    def _current(self, loop) -> bool:
+        return self._loop is loop and not loop.is_closed()
+
+    def _listen(self, loop):
+        while self._current(loop):
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(settings.EVENTS_CHANNEL)
+                try:
+                    while self._current(loop):
+                        message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message is None or message["type"] != "message":
+                            continue
+                        event = orjson.loads(message["data"])
+                        loop.call_soon_threadsafe(self.dispatch, event["topic"], frame(event["event"], event["data"]))
+                finally:
+                    pubsub.close()
+            except RuntimeError:
+                # The loop closed between the check and the call.
+                return
+            except Exception:
+                logger.exception("event subscription failed, resubscribing")
+                # Events published meanwhile are lost; reconnecting clients
+                # get a fresh snapshot instead.
+                try:
+                    loop.call_soon_threadsafe(self.close)
+                except RuntimeError:
+                    return
+                time.sleep(1)
+
+
+hub = EventHub(settings.EVENTS_MAX_PENDING, settings.EVENTS_HEARTBEAT_SECONDS)
+
+metrics.describe("events_subscribers", "gauge", "Open server-sent event streams.")
+metrics.describe("events_delivered_total", "counter", "Events queued to server-sent event streams.")
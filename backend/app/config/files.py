@@ -0,0 +1,113 @@
+"""Serving finished files with ``Range`` support.
+
+Starlette's ``FileResponse`` always sends the whole file. A client that
+lost its connection halfway through a large export should ask for the
+rest instead (``Range: bytes=<received>-``), with ``If-Range`` so it never
+joins two versions of a file. :func:`file_response` answers a single
+byte range with 206, and anything it cannot satisfy with 416 or the full
+file, as RFC 9110 allows.
+
+:class:`ImmutableStaticFiles` serves a directory of content-addressed
+files, which caches may keep forever.
+"""
+import os
+from email.utils import formatdate
+
+from fastapi import HTTPException, status
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.staticfiles import StaticFiles
+
+CHUNK_BYTES = 256 * 1024
+
+
+def parse_range(header: str, size: int):
+    """(start, end) inclusive for a single ``bytes=`` range, or None to send the whole file.
+
+    Raises 416 when the range starts past the end of the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec or size == 0:
+        # Multiple ranges would need multipart/byteranges; whole file it is.
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            length = int(last)
+            if length <= 0:
+                return None
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _read(path: str, start: int, length: int):
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_BYTES, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def file_response(request: Request, path: str, filename: str, media_type: str) -> Response:
+    """The file, or the byte range the request asks for.
+
+    The file must not change once it is served under a name: its ETag is
+    derived from size and modification time.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    size = stat.st_size
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        # Already compressed; must not be compressed again on the way.
+        "Cache-Control": "private, no-transform",
+    }
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag or if_range == headers["Last-Modified"]):
+        byte_range = parse_range(range_header, size)
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(
+        _read(path, start, end - start + 1), status_code=status_code, headers=headers, media_type=media_type
+    )
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Static files whose name changes whenever their content does."""
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
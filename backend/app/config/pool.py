@@ -0,0 +1,106 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from config.config import settings
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            if waited > self.wait_seconds_max:
+                self.wait_seconds_max = waited
+
+
+class _TimedCheckoutMixin:
+    """Measures how long each checkout waits for a connection."""
+
+    @property
+    def stats(self) -> PoolStats:
+        if "_stats" not in self.__dict__:
+            self._stats = PoolStats()
+        return self._stats
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(is_async: bool = False) -> dict:
+    """create_engine() pool arguments from Settings.
+
+    DB_POOL_MODE=null hands pooling to an external pooler such as PgBouncer:
+    every checkout opens a fresh connection to it and closes it afterwards.
+    """
+    if settings.DB_POOL_MODE == "null":
+        return {"poolclass": NullPool}
+
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING == "True",
+    }
+
+
+engines = {}
+
+
+def register_engine(name: str, engine):
+    engines[name] = engine
+
+
+def pool_status() -> dict:
+    status = {}
+    for name, engine in engines.items():
+        pool = engine.pool
+        entry = {"pool_class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+            })
+        if isinstance(pool, _TimedCheckoutMixin):
+            stats = pool.stats
+            entry.update({
+                "checkouts": stats.checkouts,
+                "timeouts": stats.timeouts,
+                "wait_seconds_total": round(stats.wait_seconds_total, 6),
+                "wait_seconds_avg": round(stats.wait_seconds_total / stats.checkouts, 6) if stats.checkouts else 0.0,
+                "wait_seconds_max": round(stats.wait_seconds_max, 6),
+            })
+        status[name] = entry
+    return status
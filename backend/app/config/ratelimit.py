@@ -0,0 +1,114 @@
+import threading
+import time
+
+from fastapi import HTTPException, status
+
+from config.config import settings
+from config.redisclient import get_redis
+
+
+class MemoryStore:
+    """Per-process sliding-window counters; one dict lookup per hit."""
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def incr_window(self, key: str, bucket: int, window: int):
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None or entry[0] < bucket - 1:
+                entry = [bucket, 0, 0]
+                self._counters[key] = entry
+            elif entry[0] == bucket - 1:
+                entry[0], entry[1], entry[2] = bucket, 0, entry[1]
+            entry[1] += 1
+            current, previous = entry[1], entry[2]
+
+        if time.monotonic() >= self._next_prune:
+            self._prune(bucket, window)
+        return previous, current
+
+    def _prune(self, bucket: int, window: int):
+        with self._lock:
+            self._next_prune = time.monotonic() + window
+            stale = [key for key, entry in self._counters.items() if entry[0] < bucket - 1]
+            for key in stale:
+                del self._counters[key]
+
+
+class RedisStore:
+    """Counters shared by every worker, kept in redis (or LocalRedis)."""
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    def incr_window(self, key: str, bucket: int, window: int):
+        current_key = f"{self.prefix}{key}:{bucket}"
+        pipe = self.client.pipeline(transaction=False)
+        pipe.incr(current_key)
+        pipe.expire(current_key, window * 2)
+        pipe.get(f"{self.prefix}{key}:{bucket - 1}")
+        current, _, previous = pipe.execute()
+        return int(previous or 0), int(current)
+
+
+class SlidingWindowLimiter:
+    """Sliding-window counter: the previous fixed window is weighted by how
+    much of it still overlaps the trailing ``window`` seconds."""
+
+    def __init__(self, store, limit: int, window: int):
+        self.store = store
+        self.limit = limit
+        self.window = window
+
+    def hit(self, key: str) -> float:
+        """Count one attempt for ``key``; return 0 if allowed, else seconds to wait."""
+        now = time.time()
+        bucket, offset = divmod(now, self.window)
+        previous, current = self.store.incr_window(key, int(bucket), self.window)
+        weight = 1 - offset / self.window
+
+        if previous * weight + current <= self.limit:
+            return 0
+        if current > self.limit or previous == 0:
+            return self.window - offset
+        # Time until the previous window's weight drops enough to let one through.
+        return max(1.0, (1 - (self.limit - current) / previous) * self.window - offset)
+
+
+def build_store():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisStore(get_redis())
+    return MemoryStore()
+
+
+class LoginThrottle:
+    def __init__(self, store):
+        self.by_ip = SlidingWindowLimiter(
+            store, settings.LOGIN_RATE_LIMIT_PER_IP, settings.LOGIN_RATE_LIMIT_WINDOW
+        )
+        self.by_username = SlidingWindowLimiter(
+            store, settings.LOGIN_RATE_LIMIT_PER_USERNAME, settings.LOGIN_RATE_LIMIT_WINDOW
+        )
+
+    def check(self, ip: str, username: str):
+        """Raise 429 before any database or bcrypt work when over the limit.
+
+        ``ip`` is None when the client address is unknown; only the
+        username limit applies then.
+        """
+        retry_after = self.by_username.hit(f"login:user:{username.lower()}")
+        if ip is not None:
+            retry_after = max(retry_after, self.by_ip.hit(f"login:ip:{ip}"))
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": str(int(retry_after) + 1)},
+            )
+
+
+login_throttle = LoginThrottle(build_store())
@@ -0,0 +1,150 @@
+import queue
+import threading
+import time
+
+from config.config import settings
+
+
+class LocalRedis:
+    """In-process stand-in for the subset of the redis client the app uses.
+
+    Shared backends are written against the redis-py API; when no
+    ``REDIS_URL`` is configured (tests, single-worker development) they get
+    one of these instead, which behaves the same within a single process.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._channels = {}
+        self._lock = threading.RLock()
+
+    def _alive(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key) if self._alive(key) else None
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._data[key] = value if isinstance(value, bytes) else str(value).encode()
+            self._expires.pop(key, None)
+            if ex is not None:
+                self._expires[key] = time.monotonic() + ex
+            return True
+
+    def mget(self, keys):
+        with self._lock:
+            return [self._data.get(key) if self._alive(key) else None for key in keys]
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            value = int(self._data[key]) + amount if self._alive(key) else amount
+            self._data[key] = str(value).encode()
+            return value
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    removed += 1
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def pipeline(self, transaction=True):
+        return _LocalPipeline(self)
+
+    def publish(self, channel, message):
+        with self._lock:
+            receivers = list(self._channels.get(channel, ()))
+        name = channel if isinstance(channel, bytes) else channel.encode()
+        data = message if isinstance(message, bytes) else str(message).encode()
+        for pubsub in receivers:
+            pubsub._messages.put({"type": "message", "pattern": None, "channel": name, "data": data})
+        return len(receivers)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return _LocalPubSub(self)
+
+
+class _LocalPubSub:
+    """Channel subscriptions of a LocalRedis; subscribe confirmations are never delivered."""
+
+    def __init__(self, client):
+        self._client = client
+        self._messages = queue.SimpleQueue()
+        self.channels = set()
+
+    def subscribe(self, *channels):
+        with self._client._lock:
+            for channel in channels:
+                self._client._channels.setdefault(channel, set()).add(self)
+                self.channels.add(channel)
+
+    def unsubscribe(self, *channels):
+        with self._client._lock:
+            for channel in channels or tuple(self.channels):
+                self._client._channels.get(channel, set()).discard(self)
+                self.channels.discard(channel)
+
+    def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return self._messages.get(timeout=timeout) if timeout else self._messages.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.unsubscribe()
+
+
+class _LocalPipeline:
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._calls.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        with self._client._lock:
+            results = [method(*args, **kwargs) for method, args, kwargs in self._calls]
+        self._calls = []
+        return results
+
+
+_client = None
+
+
+def get_redis():
+    """Return the process-wide redis client, or a LocalRedis without REDIS_URL."""
+    global _client
+    if _client is None:
+        if settings.REDIS_URL:
+            import redis
+
+            _client = redis.Redis.from_url(settings.REDIS_URL)
+        else:
+            _client = LocalRedis()
+    return _client
@@ -0,0 +1,183 @@
+import itertools
+import threading
+import time
+
+from fastapi import Request
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+from config.config import settings
+from config.database import ASYNC_DRIVERS, AsyncSessionLocal, SessionLocal
+from config.pool import engine_options, register_engine
+from config.sqlite import apply_pragmas
+
+LAST_WRITE_COOKIE = "last_write"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        url = make_url(url)
+        connect_args = {"check_same_thread": False} if url.get_backend_name() == "sqlite" else {}
+
+        self.engine = create_engine(url, connect_args=connect_args, **engine_options())
+        if url.get_backend_name() == "sqlite" and settings.SQLITE_PROFILE == "tuned":
+            apply_pragmas(self.engine)
+        self.SessionLocal = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+        register_engine(name, self.engine)
+
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        if settings.USE_ASYNC_DB == "True":
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            self.async_engine = create_async_engine(
+                url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]),
+                connect_args=connect_args,
+                **engine_options(is_async=True),
+            )
+            self.AsyncSessionLocal = async_sessionmaker(
+                bind=self.async_engine, autoflush=False, expire_on_commit=False
+            )
+            register_engine(f"{name}_async", self.async_engine.sync_engine)
+            if url.get_backend_name() == "sqlite" and settings.SQLITE_PROFILE == "tuned":
+                apply_pragmas(self.async_engine.sync_engine)
+
+        self.down_until = 0.0
+
+    def checked_out(self) -> int:
+        pool = self.engine.pool
+        return pool.checkedout() if hasattr(pool, "checkedout") else 0
+
+
+class ReplicaRouter:
+    """Picks a replica for read-only sessions.
+
+    A replica that fails to hand out a connection is skipped for
+    ``cooldown`` seconds; when none is available reads go to the primary.
+    """
+
+    def __init__(self, urls, balancing: str = "round_robin", cooldown: float = 30.0):
+        self.replicas = [Replica(f"replica_{i}", url) for i, url in enumerate(urls)]
+        self.balancing = balancing
+        self.cooldown = cooldown
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def pick(self):
+        now = time.monotonic()
+        healthy = [replica for replica in self.replicas if replica.down_until <= now]
+        if not healthy:
+            return None
+        if self.balancing == "least_connections":
+            return min(healthy, key=Replica.checked_out)
+        with self._lock:
+            return healthy[next(self._counter) % len(healthy)]
+
+    def mark_down(self, replica: Replica):
+        replica.down_until = time.monotonic() + self.cooldown
+
+    def dispose(self):
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    balancing=settings.REPLICA_BALANCING,
+)
+
+
+def wrote_recently(request: Request) -> bool:
+    """Read-your-writes: stay on the primary for a while after this client wrote."""
+    last_write = request.cookies.get(LAST_WRITE_COOKIE)
+    if not last_write:
+        return False
+    try:
+        return time.time() - float(last_write) < settings.READ_YOUR_WRITES_SECONDS
+    except ValueError:
+        return False
+
+
+def read_session():
+    """A session on a replica, or the primary without one, for reads outside a request."""
+    replica = replica_router.pick()
+    return (replica.SessionLocal if replica is not None else SessionLocal)()
+
+
+def async_read_session():
+    replica = replica_router.pick()
+    return (replica.AsyncSessionLocal if replica is not None else AsyncSessionLocal)()
+
+
+def get_read_db(request: Request):
+    replica = None if wrote_recently(request) else replica_router.pick()
+    db = None
+
+    if replica is not None:
+        db = replica.SessionLocal()
+        try:
+            # Check out eagerly so an unreachable replica falls back right here.
+            db.connection()
+        except exc.OperationalError:
+            db.close()
+            replica_router.mark_down(replica)
+            db = None
+
+    if db is None:
+        db = SessionLocal()
+
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    replica = None if wrote_recently(request) else replica_router.pick()
+    db = None
+
+    if replica is not None:
+        db = replica.AsyncSessionLocal()
+        try:
+            await db.connection()
+        except exc.OperationalError:
+            await db.close()
+            replica_router.mark_down(replica)
+            db = None
+
+    if db is None:
+        db = AsyncSessionLocal()
+
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+class ReadYourWritesMiddleware:
+    """Stamps clients that performed a successful write with a cookie, so
+    their next reads within READ_YOUR_WRITES_SECONDS skip lagging replicas."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (
+                    f"{LAST_WRITE_COOKIE}={time.time():.3f}; "
+                    f"Max-Age={settings.READ_YOUR_WRITES_SECONDS}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode("latin-1"))
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
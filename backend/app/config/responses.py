@@ -0,0 +1,28 @@
+"""orjson responses for large lists.
+
+Routes declare a Pydantic ``response_model`` and the application renders
+with ``ORJSONResponse``. For a single object, validating the ORM instance
+against the model is cheap. For lists that can run into thousands of
+rows, the services select plain columns instead, and the routes hand the
+row tuples to :func:`rows_response`. That skips both building ORM
+instances and validating each row; the response model still documents
+the shape, and the selected columns decide what is exposed.
+"""
+import orjson
+from starlette.responses import Response
+
+
+def rows_to_dicts(rows) -> list:
+    """``Row`` tuples from a column ``select`` as dicts keyed by column label."""
+    if not rows:
+        return []
+    fields = rows[0]._fields
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def rows_response(rows, status_code: int = 200) -> Response:
+    return Response(
+        orjson.dumps(rows_to_dicts(rows), option=orjson.OPT_NON_STR_KEYS),
+        status_code=status_code,
+        media_type="application/json",
+    )
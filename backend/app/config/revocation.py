@@ -0,0 +1,113 @@
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config.config import settings
+from config.database import SessionLocal
+from models.revokedtokenmodels import RevokedTokenModel
+
+
+class RevocationList:
+    """In-memory denylist of revoked token ids and per-user token versions.
+
+    Every worker keeps its own copy and pulls new rows from the
+    ``revoked_tokens`` table at most once per ``sync_seconds``, so checking a
+    token costs a dict lookup and revocations reach all workers within one
+    sync interval.
+    """
+
+    def __init__(self, sync_seconds: int):
+        self.sync_seconds = sync_seconds
+        self._revoked_jtis = {}
+        self._user_versions = {}
+        self._last_id = 0
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti, user_id, version) -> bool:
+        self.sync()
+        if jti is not None and jti in self._revoked_jtis:
+            return True
+        if user_id is not None:
+            return (version or 0) < self._user_versions.get(user_id, 0)
+        return False
+
+    def current_version(self, user_id: int) -> int:
+        """The version new tokens of ``user_id`` must carry, read from the database.
+
+        The synced copy may predate a forced logout on another worker; a
+        token issued with it would be revoked at the next sync.
+        """
+        db = SessionLocal()
+        try:
+            version = self._latest_version(user_id, db)
+        finally:
+            db.close()
+        self._user_versions[user_id] = max(version, self._user_versions.get(user_id, 0))
+        return self._user_versions[user_id]
+
+    @staticmethod
+    def _latest_version(user_id: int, db: Session) -> int:
+        return (
+            db.query(func.max(RevokedTokenModel.version))
+            .filter(RevokedTokenModel.user_id == user_id)
+            .scalar()
+        ) or 0
+
+    def revoke_token(self, jti: str, user_id: int, expires_at: datetime, db: Session):
+        db.add(RevokedTokenModel(jti=jti, user_id=user_id, expires_at=expires_at))
+        db.commit()
+        self._revoked_jtis[jti] = expires_at
+
+    def revoke_user(self, user_id: int, db: Session) -> int:
+        """Invalidate every token issued to ``user_id`` so far (forced logout)."""
+        version = self._latest_version(user_id, db) + 1
+        db.add(RevokedTokenModel(user_id=user_id, version=version))
+        db.commit()
+        self._user_versions[user_id] = max(version, self._user_versions.get(user_id, 0))
+        return version
+
+    def sync(self, force: bool = False):
+        if not force and time.monotonic() < self._next_sync:
+            return
+        if not self._lock.acquire(blocking=False):
+            # Another thread is already syncing; serve from the current copy.
+            return
+        try:
+            db = SessionLocal()
+            try:
+                rows = (
+                    db.query(RevokedTokenModel)
+                    .filter(RevokedTokenModel.id > self._last_id)
+                    .order_by(RevokedTokenModel.id)
+                    .all()
+                )
+            finally:
+                db.close()
+
+            for row in rows:
+                if row.jti is not None:
+                    self._revoked_jtis[row.jti] = row.expires_at
+                if row.version is not None:
+                    self._user_versions[row.user_id] = max(
+                        row.version, self._user_versions.get(row.user_id, 0)
+                    )
+                self._last_id = row.id
+
+            now = datetime.utcnow()
+            expired = [
+                jti for jti, expires_at in self._revoked_jtis.items()
+                if expires_at is not None and expires_at < now
+            ]
+            for jti in expired:
+                del self._revoked_jtis[jti]
+
+            self._next_sync = time.monotonic() + self.sync_seconds
+        finally:
+            self._lock.release()
+
+
+revocation_list = RevocationList(sync_seconds=settings.REVOCATION_SYNC_SECONDS)
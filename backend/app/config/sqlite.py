@@ -0,0 +1,94 @@
+import threading
+
+from sqlalchemy import event
+
+from config.config import settings
+
+
+def tuned_pragmas() -> dict:
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "temp_store": "MEMORY",
+    }
+
+
+def apply_pragmas(engine):
+    """Set the tuned pragmas on every new DBAPI connection of ``engine``."""
+    pragmas = tuned_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+class WriterQueue:
+    """FIFO lock that lets one session at a time write in this process.
+
+    SQLite allows a single writer per database. Without this, concurrent
+    request threads race for the write lock inside SQLite and the losers spin
+    in the busy handler or fail with "database is locked". Queuing them
+    here instead leaves SQLite's busy_timeout to arbitrate between worker
+    processes only.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned = set()
+
+    def acquire(self):
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            if not self._cond.wait_for(lambda: self._serving == ticket, timeout=self.timeout):
+                # Give up the place in line without stalling the tickets behind it.
+                self._abandoned.add(ticket)
+                self._advance()
+                raise TimeoutError("Timed out waiting for the SQLite writer queue")
+
+    def release(self):
+        with self._cond:
+            self._serving += 1
+            self._advance()
+
+    def _advance(self):
+        while self._serving in self._abandoned:
+            self._abandoned.discard(self._serving)
+            self._serving += 1
+        self._cond.notify_all()
+
+
+def serialize_writes(session_factory, queue: WriterQueue):
+    """Hold ``queue`` from a session's first write until its transaction ends.
+
+    pysqlite only issues BEGIN right before the first INSERT/UPDATE/DELETE,
+    so the write transaction itself starts after the queue is acquired.
+    """
+
+    def acquire(session):
+        if not session.info.get("sqlite_writer"):
+            queue.acquire()
+            session.info["sqlite_writer"] = True
+
+    @event.listens_for(session_factory, "before_flush")
+    def before_flush(session, flush_context, instances):
+        acquire(session)
+
+    @event.listens_for(session_factory, "do_orm_execute")
+    def before_bulk_write(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            acquire(orm_execute_state.session)
+
+    @event.listens_for(session_factory, "after_transaction_end")
+    def after_transaction_end(session, transaction):
+        if transaction.parent is None and session.info.pop("sqlite_writer", False):
+            queue.release()
@@ -1,8 +1,12 @@
 from datetime import datetime, timedelta
+from uuid import uuid4
 from jwt import PyJWTError
 import jwt
 from sqlalchemy.orm import Session
+from config.config import settings
 from config.database import get_db
+from config.revocation import revocation_list
+from dto.userschema import CurrentUser
 from users.usersservice import UserService
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
@@ -14,26 +18,53 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 
-def create_access_token(data: dict):
+def create_access_token(data: dict, user=None):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
+
+    if user is not None:
+        # Authorization claims, so that STATELESS_AUTH can skip the users table.
+        to_encode.update({
+            "uid": user.id,
+            "name": user.name,
+            "role": "staff" if user.is_staff else "customer",
+            "active": bool(user.is_active),
+            "ver": revocation_list.current_version(user.id),
+        })
+
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def verify_token(token: str, credentials_exception, db: Session = Depends(get_db)):
+def decode_token(token: str, credentials_exception):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM)
-        email: str = payload.get("sub")
-
-        if email is None:
-            raise credentials_exception
-        token_data = email
     except PyJWTError:
         raise credentials_exception
 
-    user = UserService.get_user(email=token_data, db=db)
+    if payload.get("sub") is None:
+        raise credentials_exception
+    if revocation_list.is_revoked(payload.get("jti"), payload.get("uid"), payload.get("ver")):
+        raise credentials_exception
+
+    return payload
+
+
+def verify_token(token: str, credentials_exception, db: Session = Depends(get_db)):
+    payload = decode_token(token, credentials_exception)
+    email: str = payload.get("sub")
+
+    if settings.STATELESS_AUTH == "True" and "uid" in payload:
+        return CurrentUser(
+            id=payload["uid"],
+            name=payload.get("name"),
+            email=email,
+            is_staff=payload.get("role") == "staff",
+            is_active=payload.get("active", False),
+        )
+
+    user = UserService.get_user(email=email, db=db)
 
     if not user:
         raise credentials_exception
@@ -50,3 +81,10 @@ def get_currentUser(db: Session = Depends(get_db), data: str = Depends(oauth2_sc
 
     return verify_token(token=data, credentials_exception=credentials_exception, db=db)
 
+
+def get_staffUser(current_user=Depends(get_currentUser)):
+    if not current_user.is_staff:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
+        )
+    return current_user
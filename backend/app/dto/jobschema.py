@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class JobCreate(BaseModel):
+    payload: dict = {}
+    priority: Optional[int] = None
+
+
+class JobOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    kind: str
+    status: str
+    priority: int
+    progress: float
+    message: Optional[str]
+    attempts: int
+    max_attempts: int
+    result: Optional[Any]
+    error: Optional[str]
+    run_at: datetime
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
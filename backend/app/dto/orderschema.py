@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional, Union
 
 
 class CartSchema(BaseModel):
@@ -16,6 +17,7 @@ class TokenSchema(BaseModel):
 
 
 class CartItemSchema(BaseModel):
+    id: int  # the product
     name: str
     quantity: int
     price: int
@@ -35,3 +37,77 @@ class OrderCreatePlaceOrder(BaseModel):
     currentUser: CurrentUserSchema
     subtotal: int
 
+
+class OrderOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str]
+    email: Optional[str]
+    orderAmount: Optional[int]
+    transactionId: Optional[str]
+    isDelivered: Optional[bool]
+    user_id: Optional[int]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+
+class OrderItemOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str]
+    quantity: Optional[int]
+    price: Optional[int]
+    order_id: Optional[int]
+
+
+class ShippingOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    address: Optional[str]
+    # Card zip codes are free text, although the column is an Integer.
+    postalCode: Optional[Union[int, str]]
+    country: Optional[str]
+    city: Optional[str]
+    order_id: Optional[int]
+
+
+class OrderWithItem(OrderOut):
+    order_items: OrderItemOut
+
+
+class OrderDetail(BaseModel):
+    name: Optional[str]
+    email: Optional[str]
+    orderAmount: Optional[int]
+    transactionId: Optional[str]
+    isDelivered: Optional[bool]
+    user_id: Optional[int]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    orderItems: List[OrderItemOut]
+    shippingAddress: Optional[ShippingOut]
+
+
+class FulfillmentBatch(BaseModel):
+    orderIds: List[int] = []
+    transactionIds: List[str] = []
+    isDelivered: bool = True
+
+
+class FulfillmentOutcome(BaseModel):
+    # As given: an order id or a transaction id.
+    id: Union[int, str]
+    # "updated", "unchanged" (already in that state), "not_found" or "failed".
+    status: str
+    orderId: Optional[int] = None
+
+
+class FulfillmentResult(BaseModel):
+    updated: int
+    unchanged: int
+    notFound: int
+    failed: int
+    results: List[FulfillmentOutcome]
@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
 
 
 class ReviewSchema(BaseModel):
@@ -17,3 +19,77 @@ class ProductSchema(BaseModel):
     price: int
     countInStock: int
     rating: Optional[int]
+
+
+class ImageFile(BaseModel):
+    url: str
+    width: int
+    height: int
+    bytes: int
+    format: Optional[str] = None
+
+
+class ProductImages(BaseModel):
+    original: ImageFile
+    # Largest first; empty until the thumbnails job has run.
+    variants: List[ImageFile] = []
+
+
+class ProductOut(ProductSchema):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    image_variants: Optional[ProductImages] = None
+
+
+class ProductSummary(ProductOut):
+    """A product with the sentiment of its scored reviews (percentages are 0-100)."""
+
+    sentiment_reviews: int = 0
+    sentiment_average: Optional[float] = None
+    sentiment_positive_pct: Optional[float] = None
+    sentiment_neutral_pct: Optional[float] = None
+    sentiment_negative_pct: Optional[float] = None
+
+
+class ReviewSentiment(BaseModel):
+    id: int
+    rating: int
+    comment: str
+    sentiment: str
+    sentiment_score: float
+
+
+class ProductDetail(ProductSummary):
+    reviews: List[ReviewSentiment]
+
+
+class ReviewPhrase(BaseModel):
+    phrase: str
+    score: float
+
+
+class ReviewInsights(BaseModel):
+    product_id: int
+    reviews: int = 0
+    positive: List[ReviewPhrase] = []
+    negative: List[ReviewPhrase] = []
+    positive_summary: Optional[str] = None
+    negative_summary: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+
+class RecommendedProduct(BaseModel):
+    id: int
+    name: str
+    description: str
+    image: str
+    countInStock: int
+    price: int
+    rating: float
+
+
+class Recommendation(BaseModel):
+    recommended_products: List[RecommendedProduct]
+    accuracy: float
+    message: Optional[str] = None
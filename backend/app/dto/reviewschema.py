@@ -1,7 +1,22 @@
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
 
 
 class ReviewCreate(BaseModel):
     rating: int
     comment: str
 
+
+class ReviewOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str]
+    comment: Optional[str]
+    rating: int
+    user_id: int
+    product_id: int
+    created_at: datetime
+    updated_at: datetime
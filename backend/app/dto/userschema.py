@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 
@@ -8,3 +8,30 @@ class RegisterUser(BaseModel):
     password: str
     is_staff: Optional[bool]
     is_active: Optional[bool]
+
+
+class CurrentUser(BaseModel):
+    id: int
+    name: Optional[str]
+    email: str
+    is_staff: bool
+    is_active: bool
+
+
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str]
+    email: str
+    is_staff: Optional[bool]
+    is_active: Optional[bool]
+
+
+class LoginResponse(UserOut):
+    jwtToken: str
+
+
+class LogoutUserResponse(BaseModel):
+    user_id: int
+    token_version: int
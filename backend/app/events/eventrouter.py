@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+
+from config.config import settings
+from config.database import SessionLocal
+from config.events import Subscriber, events_shared, frame, hub
+from config.token import verify_token
+from monitoring.profiler import run_in_threadpool
+from models.ordermodels import OrderModel
+from models.productmodels import ProductModel
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+# EventSource cannot send headers, so the token may also come as ?access_token=.
+optional_token = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
+
+
+class EventStreamResponse(StreamingResponse):
+    """Streams a subscriber's events and unsubscribes it however the response ends."""
+
+    media_type = "text/event-stream"
+
+    def __init__(self, subscriber: Subscriber, first: bytes):
+        self.subscriber = subscriber
+        super().__init__(self._events(first), headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async def _events(self, first: bytes):
+        yield first
+        async for data in self.subscriber.frames():
+            yield data
+
+    async def __call__(self, scope, receive, send):
+        # Also when the client left before the body started.
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            hub.unsubscribe(self.subscriber)
+
+
+def _product_ids(products: str) -> list:
+    try:
+        ids = sorted({int(part) for part in products.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="products must be a comma separated list of ids")
+    if len(ids) > settings.EVENTS_MAX_PRODUCTS:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"At most {settings.EVENTS_MAX_PRODUCTS} products per stream")
+    return ids
+
+
+def _authenticate(token: str) -> int:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    if not token:
+        raise credentials_exception
+    with SessionLocal() as db:
+        return verify_token(token=token, credentials_exception=credentials_exception, db=db).id
+
+
+def _snapshot(product_ids: list, user_id: int) -> bytes:
+    """The current state of everything the stream follows, as events.
+
+    Read from the primary: a lagging replica could be older than events
+    already queued for the stream.
+    """
+    frames = []
+    with SessionLocal() as db:
+        if product_ids:
+            rows = db.execute(
+                select(ProductModel.id, ProductModel.countInStock).where(ProductModel.id.in_(product_ids))
+            ).all()
+            frames += [frame("stock", {"id": row.id, "countInStock": row.countInStock}) for row in rows]
+        if user_id is not None:
+            rows = db.execute(
+                select(OrderModel.id, OrderModel.transactionId, OrderModel.isDelivered, OrderModel.updated_at)
+                .where(OrderModel.user_id == user_id)
+            ).all()
+            frames += [frame("order", row._asdict()) for row in rows]
+    return b"".join(frames)
+
+
+@router.get("/stream", response_class=EventStreamResponse)
+async def eventStream(
+    products: str = Query("", description="Comma separated product ids to follow the stock of"),
+    orders: bool = Query(False, description="Follow the delivery status of the caller's orders"),
+    access_token: str = None,
+    authorization: str = Depends(optional_token),
+):
+    """Server-sent ``stock`` and ``order`` events; each stream starts with the current state."""
+    if not events_shared():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Event streams need REDIS_URL when the server runs more than one worker")
+    product_ids = _product_ids(products)
+    user_id = await run_in_threadpool(_authenticate, authorization or access_token) if orders else None
+    if not product_ids and user_id is None:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Nothing to follow")
+    if len(hub) >= settings.EVENTS_MAX_CONNECTIONS:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Too many event streams", headers={"Retry-After": "30"})
+
+    topics = [f"product:{product_id}" for product_id in product_ids]
+    if user_id is not None:
+        topics.append(f"user:{user_id}")
+    # Subscribed before the snapshot is read, so no change falls in between.
+    subscriber = hub.subscribe(topics)
+    try:
+        snapshot = await run_in_threadpool(_snapshot, product_ids, user_id)
+    except BaseException:
+        hub.unsubscribe(subscriber)
+        raise
+    return EventStreamResponse(subscriber, f"retry: {settings.EVENTS_RETRY_MS}\n\n".encode() + snapshot)
@@ -0,0 +1,165 @@
+"""Export jobs: a dataset written to a gzipped CSV or a Parquet file.
+
+``POST /api/product/export`` and ``POST /api/order/export`` call
+:func:`start_export`, which queues an ``export`` job. The job streams the
+rows in batches into a temporary file under EXPORT_DIR and renames it
+once it is complete, so a download never sees a partial file.
+``GET /api/jobs/{id}/download`` then serves it with ``Range`` support.
+
+An export identical to one that finished less than EXPORT_FRESH_SECONDS
+ago, or that is still queued or running, returns that job instead of
+starting another.
+"""
+import csv
+import gzip
+import os
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import Boolean, DateTime, Float, Integer, func, select
+from sqlalchemy.orm import Session
+
+from config.config import settings
+from models.jobmodels import JobModel
+from models.ordermodels import OrderItemsModel, OrderModel
+from models.productmodels import ProductModel
+from .jobservice import JobService
+from .registry import LOW, JobContext, job
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional
+    pyarrow = None
+
+FORMATS = {
+    "csv": (".csv.gz", "application/gzip"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+# Each dataset is one column select; the labels become the file's header.
+DATASETS = {
+    "products": lambda: select(
+        ProductModel.id, ProductModel.name, ProductModel.category, ProductModel.description,
+        ProductModel.price, ProductModel.countInStock, ProductModel.rating, ProductModel.image,
+    ).order_by(ProductModel.id),
+    # One row per order item, as the old /order/export-csv meant to produce.
+    "orders": lambda: select(
+        OrderModel.id.label("order_id"), OrderModel.created_at, OrderModel.name, OrderModel.email,
+        OrderModel.user_id, OrderModel.transactionId, OrderModel.orderAmount, OrderModel.isDelivered,
+        OrderItemsModel.name.label("product"), OrderItemsModel.quantity, OrderItemsModel.price,
+    ).join(OrderItemsModel, OrderModel.id == OrderItemsModel.order_id).order_by(OrderModel.id, OrderItemsModel.id),
+}
+
+
+def export_dir() -> str:
+    return os.path.abspath(settings.EXPORT_DIR)
+
+
+def start_export(dataset: str, fmt: str, db: Session, user_id: int) -> JobModel:
+    """The export job for ``dataset`` in ``fmt``: a fresh finished one, an active one or a new one."""
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Unknown format, use one of: {', '.join(FORMATS)}")
+    if fmt == "parquet" and pyarrow is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Parquet export needs the pyarrow package")
+
+    key = f"export:{dataset}:{fmt}"
+    fresh = db.execute(
+        select(JobModel)
+        .where(
+            JobModel.key == key,
+            JobModel.status == "succeeded",
+            JobModel.finished_at >= datetime.utcnow() - timedelta(seconds=settings.EXPORT_FRESH_SECONDS),
+        )
+        .order_by(JobModel.finished_at.desc())
+        .limit(1)
+    ).scalars().first()
+    if fresh is not None and os.path.exists(os.path.join(export_dir(), fresh.result["file"])):
+        return fresh
+    # A running export reads the same data a new one would; enqueue only
+    # deduplicates queued jobs.
+    running = db.execute(
+        select(JobModel).where(JobModel.key == key, JobModel.status == "running").limit(1)
+    ).scalars().first()
+    if running is not None:
+        return running
+    return JobService.enqueue("export", db=db, payload={"dataset": dataset, "format": fmt},
+                              key=key, user_id=user_id)
+
+
+def _write_csv(path: str, columns, batches, on_batch):
+    # Level 6: most of level 9's ratio at a fraction of the time.
+    with gzip.open(path, "wt", compresslevel=6, newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(columns)
+        for rows in batches:
+            writer.writerows(rows)
+            on_batch(len(rows))
+
+
+def _arrow_schema(query):
+    """Arrow types from the selected columns' types, not guessed from the first batch,
+    which may hold only NULLs in a column."""
+    def arrow_type(column_type):
+        if isinstance(column_type, Boolean):
+            return pyarrow.bool_()
+        if isinstance(column_type, Integer):
+            return pyarrow.int64()
+        if isinstance(column_type, Float):
+            return pyarrow.float64()
+        if isinstance(column_type, DateTime):
+            return pyarrow.timestamp("us")
+        return pyarrow.string()
+
+    return pyarrow.schema([(column.key, arrow_type(column.type)) for column in query.selected_columns])
+
+
+def _write_parquet(path: str, schema, batches, on_batch):
+    with pyarrow.parquet.ParquetWriter(path, schema, compression="zstd") as writer:
+        for rows in batches:
+            columns = [list(values) for values in zip(*rows)]
+            writer.write_table(pyarrow.Table.from_arrays(columns, schema=schema))
+            on_batch(len(rows))
+
+
+@job("export", priority=LOW, max_attempts=2)
+def export(ctx: JobContext, dataset: str, format: str):
+    query = DATASETS[dataset]()
+    total = ctx.db.execute(select(func.count()).select_from(query.order_by(None).subquery())).scalar()
+    extension, _ = FORMATS[format]
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d-%H%M%S}-job{ctx.job_id}{extension}"
+    os.makedirs(export_dir(), exist_ok=True)
+    path = os.path.join(export_dir(), filename)
+    temporary = f"{path}.part"
+
+    # stream_results keeps a server-side cursor on PostgreSQL, so memory
+    # stays at one batch however large the table is.
+    result = ctx.db.execute(query.execution_options(stream_results=True, yield_per=settings.EXPORT_BATCH_ROWS))
+    columns = list(result.keys())
+    written = 0
+
+    def on_batch(count: int):
+        nonlocal written
+        written += count
+        ctx.progress(written, total or 1, f"{written} of {total} rows")
+
+    try:
+        if format == "parquet":
+            _write_parquet(temporary, _arrow_schema(query), result.partitions(), on_batch)
+        else:
+            _write_csv(temporary, columns, result.partitions(), on_batch)
+        os.replace(temporary, path)
+        ctx.progress(written, total or 1, f"{written} rows", force=True)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+    return {
+        "file": filename,
+        "format": format,
+        "rows": written,
+        "bytes": os.path.getsize(path),
+        "download": f"/api/jobs/{ctx.job_id}/download",
+    }
@@ -0,0 +1,68 @@
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.orm import Session
+from config.database import get_db
+from config.files import file_response
+from config.token import get_currentUser, get_staffUser
+from dto.jobschema import JobCreate, JobOut
+from models.usermodels import User
+from .exports import FORMATS, export_dir
+from .jobservice import JobService
+from .registry import handlers, load_handlers
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+load_handlers()
+
+
+@router.get("/", response_model=List[JobOut])
+def getJobs(
+    job_status: Optional[str] = Query(None, alias="status"),
+    kind: Optional[str] = None,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_currentUser),
+):
+    return JobService.list_jobs(db=db, current_user=current_user, job_status=job_status, kind=kind,
+                                limit=min(limit, 500))
+
+
+@router.get("/{jobid}", response_model=JobOut)
+def getJob(jobid: int, db: Session = Depends(get_db), current_user: User = Depends(get_currentUser)):
+    return JobService.get_job(jobid, db=db, current_user=current_user)
+
+
+@router.api_route("/{jobid}/download", methods=["GET", "HEAD"], response_class=Response)
+def downloadJob(
+    jobid: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_currentUser),
+):
+    found = JobService.get_job(jobid, db=db, current_user=current_user)
+    if found.status != "succeeded" or not (found.result or {}).get("file"):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Job has no file to download")
+    filename = found.result["file"]
+    _, media_type = FORMATS[found.result["format"]]
+    return file_response(request, os.path.join(export_dir(), filename), filename, media_type)
+
+
+@router.post("/{jobid}/cancel", response_model=JobOut)
+def cancelJob(jobid: int, db: Session = Depends(get_db), current_user: User = Depends(get_currentUser)):
+    return JobService.cancel(jobid, db=db, current_user=current_user)
+
+
+@router.post("/run/{kind}", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+def runJob(
+    kind: str,
+    request: JobCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_staffUser),
+):
+    spec = handlers.get(kind)
+    if spec is None or not spec.public:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown job kind")
+    return JobService.enqueue(kind, db=db, payload=request.payload, priority=request.priority,
+                              user_id=current_user.id)
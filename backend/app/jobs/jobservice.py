@@ -0,0 +1,243 @@
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import exists, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from config.config import settings
+from models.jobmodels import JobModel
+from .registry import handlers
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class JobService:
+    @staticmethod
+    def enqueue(
+        kind: str,
+        db: Session,
+        payload: dict = None,
+        key: str = None,
+        priority: int = None,
+        max_attempts: int = None,
+        user_id: int = None,
+        run_at: datetime = None,
+    ) -> JobModel:
+        """Queue a job and commit; with ``key``, a queued job with that key is returned instead.
+
+        A running job with the key does not count: it may have read its
+        input before the change that is being enqueued for. The unique
+        index ``uq_jobs_queued_key`` allows one queued job per key, so two
+        concurrent enqueues cannot both insert.
+        """
+        spec = handlers.get(kind)
+        if spec is None:
+            raise ValueError(f"unknown job kind {kind!r}")
+
+        if key is not None:
+            existing = JobService._queued(key, db)
+            if existing is not None:
+                return existing
+
+        new_job = JobModel(
+            kind=kind,
+            payload=payload or {},
+            key=key,
+            status="queued",
+            priority=spec.priority if priority is None else priority,
+            attempts=0,
+            max_attempts=max_attempts or spec.max_attempts or settings.JOB_MAX_ATTEMPTS,
+            run_at=run_at or datetime.utcnow(),
+            progress=0.0,
+            cancel_requested=False,
+            user_id=user_id,
+        )
+        try:
+            # The savepoint keeps the caller's pending changes if another
+            # transaction queued the same key since the check above.
+            with db.begin_nested():
+                db.add(new_job)
+        except IntegrityError:
+            existing = JobService._queued(key, db) if key is not None else None
+            if existing is None:
+                raise
+            db.commit()
+            return existing
+        db.commit()
+        db.refresh(new_job)
+        return new_job
+
+    @staticmethod
+    def _queued(key: str, db: Session):
+        return db.execute(
+            select(JobModel).where(JobModel.key == key, JobModel.status == "queued")
+        ).scalars().first()
+
+    @staticmethod
+    def get_job(jobid: int, db: Session, current_user=None) -> JobModel:
+        found = db.get(JobModel, jobid)
+        # Someone else's job is reported as missing, not forbidden.
+        if found is None or (
+            current_user is not None and not current_user.is_staff and found.user_id != current_user.id
+        ):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        return found
+
+    @staticmethod
+    def list_jobs(db: Session, current_user, job_status: str = None, kind: str = None, limit: int = 50):
+        query = select(JobModel).order_by(JobModel.id.desc()).limit(limit)
+        if not current_user.is_staff:
+            query = query.where(JobModel.user_id == current_user.id)
+        if job_status is not None:
+            query = query.where(JobModel.status == job_status)
+        if kind is not None:
+            query = query.where(JobModel.kind == kind)
+        return db.execute(query).scalars().all()
+
+    @staticmethod
+    def cancel(jobid: int, db: Session, current_user) -> JobModel:
+        """A queued job is cancelled at once; a running one at its next progress report."""
+        found = JobService.get_job(jobid, db=db, current_user=current_user)
+        if found.status == "queued":
+            found.status = "cancelled"
+            found.finished_at = datetime.utcnow()
+        elif found.status == "running":
+            found.cancel_requested = True
+        else:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job already {found.status}")
+        db.commit()
+        db.refresh(found)
+        return found
+
+    # Used by the workers
+
+    @staticmethod
+    def claim(worker: str, db: Session):
+        """Mark the next due job as running by ``worker`` and return it, or None.
+
+        On PostgreSQL the candidate row is locked with SKIP LOCKED, so
+        concurrent workers pick different jobs instead of queueing on the
+        same row. The update only applies while the job is still queued,
+        which keeps a second claim from succeeding where row locks do not
+        exist (SQLite).
+        """
+        now = datetime.utcnow()
+        candidate = db.execute(
+            select(JobModel.id)
+            .where(JobModel.status == "queued", JobModel.run_at <= now)
+            .order_by(JobModel.priority.desc(), JobModel.run_at, JobModel.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar()
+        if candidate is None:
+            db.rollback()
+            return None
+
+        claimed = db.execute(
+            update(JobModel)
+            .where(JobModel.id == candidate, JobModel.status == "queued")
+            .values(status="running", worker=worker, started_at=now, heartbeat_at=now,
+                    attempts=JobModel.attempts + 1)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return None
+        return db.get(JobModel, candidate)
+
+    @staticmethod
+    def report_progress(jobid: int, progress: float, message: str, db: Session) -> bool:
+        """Store progress and refresh the heartbeat; True if cancellation was requested."""
+        values = {"progress": progress, "heartbeat_at": datetime.utcnow()}
+        if message is not None:
+            values["message"] = message[:255]
+        db.execute(update(JobModel).where(JobModel.id == jobid).values(**values))
+        db.commit()
+        return bool(db.execute(select(JobModel.cancel_requested).where(JobModel.id == jobid)).scalar())
+
+    @staticmethod
+    def heartbeat(jobids, db: Session):
+        db.execute(update(JobModel).where(JobModel.id.in_(jobids)).values(heartbeat_at=datetime.utcnow()))
+        db.commit()
+
+    @staticmethod
+    def finish(jobid: int, db: Session, result=None, error: str = None, cancelled: bool = False) -> str:
+        """Record the outcome of a run; a failure with attempts left is queued again with backoff."""
+        found = db.get(JobModel, jobid)
+        now = datetime.utcnow()
+        if cancelled:
+            found.status = "cancelled"
+        elif error is None:
+            found.status = "succeeded"
+            found.result = result
+            found.progress = 1.0
+            found.error = None
+        elif found.attempts >= found.max_attempts or not JobService._retry(found, error, now, db):
+            found.status = "failed"
+            found.error = error
+        if found.status != "queued":
+            found.finished_at = now
+        found.worker = None
+        db.commit()
+        return found.status
+
+    @staticmethod
+    def _retry(job: JobModel, error: str, now: datetime, db: Session) -> bool:
+        """Queue ``job`` again with backoff; False if its key was queued again meanwhile, as that job does the work."""
+        try:
+            with db.begin_nested():
+                job.status = "queued"
+                job.error = error
+                job.run_at = now + timedelta(seconds=settings.JOB_RETRY_SECONDS * 2 ** (job.attempts - 1))
+        except IntegrityError:
+            return False
+        return True
+
+    @staticmethod
+    def schedule_daily(db: Session, now: datetime = None):
+        """Make sure every ``daily_at`` kind has a run queued for its next occurrence."""
+        now = now or datetime.utcnow()
+        for spec in handlers.values():
+            if not spec.daily_at:
+                continue
+            hour, minute = map(int, spec.daily_at.split(":"))
+            run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if run_at <= now:
+                run_at += timedelta(days=1)
+            # The key makes this a no-op while one is queued.
+            JobService.enqueue(spec.kind, db=db, key=f"{spec.kind}:daily", run_at=run_at)
+
+    @staticmethod
+    def requeue_stale(db: Session) -> int:
+        """Queue again running jobs whose worker stopped sending heartbeats (it died)."""
+        cutoff = datetime.utcnow() - timedelta(seconds=3 * settings.JOB_HEARTBEAT_SECONDS)
+        stale = (JobModel.status == "running", JobModel.heartbeat_at < cutoff)
+        other = aliased(JobModel)
+        # Not when the key was queued again meanwhile, or a later job with the
+        # key is running too: that job does the work.
+        superseded = exists().where(
+            other.key == JobModel.key,
+            (other.status == "queued") | ((other.status == "running") & (other.id > JobModel.id)),
+        )
+        retried = db.execute(
+            update(JobModel)
+            .where(*stale, JobModel.attempts < JobModel.max_attempts, ~superseded)
+            .values(status="queued", worker=None, error="worker lost")
+        ).rowcount
+        failed = db.execute(
+            update(JobModel)
+            .where(*stale)
+            .values(status="failed", worker=None, error="worker lost", finished_at=datetime.utcnow())
+        ).rowcount
+        db.commit()
+        return retried + failed
+
+    @staticmethod
+    def purge(older_than: datetime, db: Session) -> int:
+        deleted = db.execute(
+            JobModel.__table__.delete().where(
+                JobModel.status.in_(FINISHED), JobModel.finished_at < older_than
+            )
+        ).rowcount
+        db.commit()
+        return deleted
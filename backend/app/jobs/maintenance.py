@@ -0,0 +1,28 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from config.config import settings
+from models.jobmodels import JobModel
+from .exports import export_dir
+from .jobservice import FINISHED, JobService
+from .registry import LOW, JobContext, job
+
+
+@job("jobs.purge", priority=LOW, public=True)
+def purge_finished_jobs(ctx: JobContext, days: int = None):
+    """Delete jobs that finished more than ``days`` (JOB_RETENTION_DAYS) ago, and their files."""
+    older_than = datetime.utcnow() - timedelta(days=settings.JOB_RETENTION_DAYS if days is None else days)
+    results = ctx.db.execute(
+        select(JobModel.result).where(JobModel.status.in_(FINISHED), JobModel.finished_at < older_than)
+    ).scalars()
+    files = 0
+    for result in results:
+        if result and result.get("file"):
+            try:
+                os.remove(os.path.join(export_dir(), result["file"]))
+                files += 1
+            except FileNotFoundError:
+                pass
+    return {"deleted": JobService.purge(older_than, db=ctx.db), "files": files}
@@ -0,0 +1,100 @@
+"""Job kinds and the code that runs them.
+
+::
+
+    @job("products.retrain", priority=LOW, max_attempts=2)
+    def retrain(ctx: JobContext, category: str = None):
+        for done, product in enumerate(products, 1):
+            ...
+            ctx.progress(done, len(products))
+        return {"products": len(products)}
+
+The handler gets a :class:`JobContext` and the job's payload as keyword
+arguments. What it returns must be JSON serializable and becomes the
+job's ``result``. When it raises, the job is retried with backoff until
+``max_attempts``. With ``daily_at="HH:MM"`` (UTC) the workers keep one run
+of the kind queued for the next occurrence of that time.
+
+Modules defining jobs are listed in ``JOB_MODULES``, so a worker knows
+every kind without importing the whole application.
+"""
+import importlib
+import time
+from dataclasses import dataclass
+
+HIGH = 10
+NORMAL = 0
+LOW = -10
+
+JOB_MODULES = (
+    "jobs.maintenance",
+    "jobs.exports",
+    "review.reviewjobs",
+    "product.images",
+)
+
+
+class JobCancelled(Exception):
+    """Raised from :meth:`JobContext.progress` once cancellation was requested."""
+
+
+@dataclass
+class JobSpec:
+    kind: str
+    handler: object
+    priority: int
+    max_attempts: int
+    # Staff may enqueue these through POST /api/jobs/{kind}.
+    public: bool
+    daily_at: str = None
+
+
+handlers = {}
+
+
+def job(kind: str, priority: int = NORMAL, max_attempts: int = None, public: bool = False, daily_at: str = None):
+    def decorate(fn):
+        handlers[kind] = JobSpec(kind, fn, priority, max_attempts, public, daily_at or None)
+        return fn
+
+    return decorate
+
+
+def load_handlers() -> dict:
+    for module in JOB_MODULES:
+        importlib.import_module(module)
+    return handlers
+
+
+class JobContext:
+    """What a running job may use: its session and progress reporting.
+
+    ``db`` is the worker's session for this job. Progress is written with a
+    separate session, so it never commits the handler's pending changes.
+    """
+
+    def __init__(self, job_id: int, db, session_factory, min_interval: float = 0.5):
+        self.job_id = job_id
+        self.db = db
+        self._session_factory = session_factory
+        self._min_interval = min_interval
+        self._last_write = 0.0
+
+    def progress(self, done: float, total: float = 1, message: str = None, force: bool = False):
+        """Report ``done`` out of ``total``; raises :class:`JobCancelled` if the job was cancelled.
+
+        Writes are throttled to one per ``min_interval`` seconds unless ``force``.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_write < self._min_interval:
+            return
+        self._last_write = now
+
+        from .jobservice import JobService
+
+        with self._session_factory() as db:
+            cancelled = JobService.report_progress(
+                self.job_id, min(1.0, done / total) if total else 0.0, message, db=db
+            )
+        if cancelled:
+            raise JobCancelled()
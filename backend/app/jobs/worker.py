@@ -0,0 +1,168 @@
+"""Job worker processes.
+
+::
+
+    python -m jobs.worker --processes 2
+
+Each process claims one job at a time from the ``jobs`` table, runs it and
+records the outcome, and polls every JOB_POLL_SECONDS while the queue is
+empty. Between jobs it also queues the next run of daily job kinds. The table is the only broker, so this runs wherever the database
+does. ``server.py`` forks JOB_WORKERS of these next to the HTTP workers.
+
+Workers lower their own CPU priority (JOB_WORKER_NICE) and can be pinned
+to JOB_WORKER_CPUS, so a backfill does not take CPU from request handling.
+On TERM or INT a worker finishes its current job and exits.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from config.config import settings
+from config.database import SessionLocal
+from monitoring.prometheus import metrics, update_process_metrics
+from .jobservice import JobService
+from .registry import JobCancelled, JobContext, load_handlers
+
+logger = logging.getLogger("ecom.jobs")
+
+
+def isolate():
+    """Keep this process from competing with the HTTP workers for CPU."""
+    if settings.JOB_WORKER_NICE:
+        os.nice(settings.JOB_WORKER_NICE)
+    if settings.JOB_WORKER_CPUS and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {int(cpu) for cpu in settings.JOB_WORKER_CPUS.split(",")})
+
+
+class Worker:
+    def __init__(self, session_factory=SessionLocal, poll_seconds: float = None):
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.session_factory = session_factory
+        self.poll_seconds = settings.JOB_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.stop = threading.Event()
+        self.handlers = load_handlers()
+        self._next_housekeeping = 0.0
+
+    def run(self):
+        logger.info("job worker %s started", self.name)
+        while not self.stop.is_set():
+            try:
+                ran = self.run_once()
+            except Exception:
+                # The database being unreachable must not kill the worker.
+                logger.exception("job worker %s failed to claim a job", self.name)
+                ran = False
+            if settings.METRICS_ENABLED == "True":
+                update_process_metrics()
+                metrics.maybe_flush()
+            if not ran:
+                self.stop.wait(self.poll_seconds)
+        logger.info("job worker %s stopped", self.name)
+
+    def run_once(self) -> bool:
+        """Claim and run one job; False if none was due."""
+        with self.session_factory() as db:
+            if time.monotonic() >= self._next_housekeeping:
+                self._next_housekeeping = time.monotonic() + settings.JOB_HEARTBEAT_SECONDS
+                if JobService.requeue_stale(db=db):
+                    logger.warning("re-queued jobs of a worker that stopped responding")
+                JobService.schedule_daily(db=db)
+            claimed = JobService.claim(self.name, db=db)
+            if claimed is None:
+                return False
+            self.execute(claimed.id, claimed.kind, dict(claimed.payload or {}), db)
+        return True
+
+    def execute(self, job_id: int, kind: str, payload: dict, db):
+        result, error, cancelled = None, None, False
+        beating = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, beating), daemon=True)
+        heartbeat.start()
+        start = time.perf_counter()
+        try:
+            spec = self.handlers.get(kind)
+            if spec is None:
+                raise LookupError(f"no handler for job kind {kind!r}")
+            result = spec.handler(JobContext(job_id, db, self.session_factory), **payload)
+        except JobCancelled:
+            cancelled = True
+        except Exception:
+            error = traceback.format_exc(limit=20)
+            logger.exception("job %d (%s) failed", job_id, kind)
+        finally:
+            beating.set()
+            heartbeat.join()
+        elapsed = time.perf_counter() - start
+
+        # Whatever the handler left uncommitted is abandoned with the job.
+        db.rollback()
+        outcome = JobService.finish(job_id, db=db, result=result, error=error, cancelled=cancelled)
+        logger.info("job %d (%s) %s in %.1fs", job_id, kind, outcome, elapsed)
+        metrics.inc("jobs_total", (("kind", kind), ("status", outcome)))
+        metrics.inc("job_run_seconds_total", (("kind", kind),), elapsed)
+
+    def _heartbeat(self, job_id: int, done: threading.Event):
+        while not done.wait(settings.JOB_HEARTBEAT_SECONDS):
+            try:
+                with self.session_factory() as db:
+                    JobService.heartbeat([job_id], db=db)
+            except Exception:
+                logger.exception("heartbeat for job %d failed", job_id)
+
+
+def run_process():
+    """Entry point of one worker process: isolate, run until TERM or INT, then exit."""
+    isolate()
+    worker = Worker()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: worker.stop.set())
+    worker.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m jobs.worker", description="Run background jobs.")
+    parser.add_argument("--processes", type=int, default=max(1, settings.JOB_WORKERS))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s:     [jobs] %(message)s")
+
+    # Handlers are imported once here and shared by the forked processes.
+    load_handlers()
+    if args.processes == 1:
+        run_process()
+        return
+
+    children = []
+    for _ in range(args.processes):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_process()
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def forward(signum, frame):
+        for child in children:
+            try:
+                os.kill(child, signum)
+            except ProcessLookupError:
+                pass
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, forward)
+    for child in children:
+        os.waitpid(child, 0)
+
+
+metrics.describe("jobs_total", "counter", "Background job runs by kind and resulting status.")
+metrics.describe("job_run_seconds_total", "counter", "Time spent running background jobs, by kind.")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,25 @@ import uvicorn
 
 
 from fastapi import FastAPI
-from config.database import engine
+from fastapi.responses import ORJSONResponse
+from config.database import async_engine, engine
 from config.database import Base
+from config.config import settings
+from config.files import ImmutableStaticFiles
+from config.replicas import ReadYourWritesMiddleware, replica_router
 from auth import authrouter
 from users import usersrouter
 from review import reviewrouter
 from product import productrouter
 from order import orderrouter
+from jobs import jobrouter
+from events import eventrouter
+from monitoring import monitoringrouter
 
 from fastapi.middleware.cors import CORSMiddleware
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 
 origins = ["*"]
@@ -27,11 +34,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if replica_router.replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
 
-Base.metadata.create_all(bind=engine)
+if settings.SQL_INSTRUMENTATION == "True":
+    from monitoring.sqlinstrument import SQLInstrumentationMiddleware
 
+    app.add_middleware(SQLInstrumentationMiddleware)
 
-@app.get("/")
+if settings.COMPRESSION_ENABLED == "True":
+    from config.compression import CompressionMiddleware
+
+    app.add_middleware(CompressionMiddleware)
+
+# Added last so it is the outermost middleware and times the whole stack.
+if settings.METRICS_ENABLED == "True":
+    from monitoring.prometheus import PrometheusMiddleware
+
+    app.add_middleware(PrometheusMiddleware)
+
+
+# The schema is managed by Alembic (``alembic upgrade head``); create_all is
+# only a shortcut for throwaway databases such as tests and benchmarks.
+if settings.AUTO_CREATE_TABLES == "True":
+    Base.metadata.create_all(bind=engine)
+
+
+@app.on_event("shutdown")
+async def dispose_engines():
+    # Pooled aiosqlite connections each own a thread that would keep the process alive.
+    if async_engine is not None:
+        await async_engine.dispose()
+    for replica in replica_router.replicas:
+        if replica.async_engine is not None:
+            await replica.async_engine.dispose()
+    replica_router.dispose()
+    engine.dispose()
+
+
+@app.get("/", response_model=str)
 def hello():
     return "Hello"
 
@@ -41,6 +82,19 @@ app.include_router(usersrouter.router, prefix="/api")
 app.include_router(reviewrouter.router, prefix="/api")
 app.include_router(productrouter.router, prefix="/api")
 app.include_router(orderrouter.router, prefix="/api")
+app.include_router(jobrouter.router, prefix="/api")
+app.include_router(eventrouter.router, prefix="/api")
+app.mount(settings.MEDIA_URL, ImmutableStaticFiles(directory=settings.MEDIA_DIR, check_dir=False), name="media")
+# Not under /api, so the nginx frontend does not proxy it to the public. The
+# backend port may still be reachable, so the routes need staff or METRICS_TOKEN.
+app.include_router(monitoringrouter.router)
+app.include_router(monitoringrouter.metrics_router)
+
+# Wraps the endpoints included above; when disabled nothing is installed.
+if settings.PROFILING_ENABLED == "True":
+    from monitoring.profiler import install_profiler
+
+    install_profiler(app)
 
 
 if __name__ == "__main__":
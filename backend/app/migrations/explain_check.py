@@ -0,0 +1,73 @@
+"""Fail if any hot query is planned as a sequential scan.
+
+Run from ``backend/app`` after ``alembic upgrade head``::
+
+    python -m migrations.explain_check
+
+On Postgres sequential scans are disabled for the session first, so a
+``Seq Scan`` in the plan means there is no usable index at all rather than
+the planner preferring a scan on a small table.
+"""
+import json
+import sys
+
+from sqlalchemy import select, text
+
+from config.database import engine
+from models.ordermodels import OrderItemsModel, OrderModel, ShippingAddressModel
+from models.productmodels import ProductModel  # noqa: F401  (configures ReviewModel.product)
+from models.reviewmodels import ReviewModel
+from models.usermodels import User
+
+HOT_QUERIES = {
+    "users.email": select(User).where(User.email == "user@example.com"),
+    "order.user_id": select(OrderModel).where(OrderModel.user_id == 1),
+    "orderitems.order_id": select(OrderItemsModel).where(OrderItemsModel.order_id == 1),
+    "shipping.order_id": select(ShippingAddressModel).where(ShippingAddressModel.order_id == 1),
+    "review.product_id": select(ReviewModel).where(ReviewModel.product_id == 1),
+    "review.user_id": select(ReviewModel).where(ReviewModel.user_id == 1),
+    "review.user_id+product_id": select(ReviewModel).where(
+        ReviewModel.user_id == 1, ReviewModel.product_id == 1
+    ),
+}
+
+
+def _postgres_scans(connection, sql):
+    plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scans, nodes = [], [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            scans.append(f"Seq Scan on {node.get('Relation Name')}")
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+def _sqlite_scans(connection, sql):
+    rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return [row[-1] for row in rows if row[-1].startswith("SCAN")]
+
+
+def check(bind=engine) -> list:
+    failures = []
+    with bind.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SET enable_seqscan = off"))
+            find_scans = _postgres_scans
+        else:
+            find_scans = _sqlite_scans
+
+        for name, query in HOT_QUERIES.items():
+            sql = query.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+            scans = find_scans(connection, str(sql))
+            print(f"{'FAIL' if scans else 'ok':>4}  {name}" + (f"  ({'; '.join(scans)})" if scans else ""))
+            if scans:
+                failures.append(name)
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if check() else 0)
@@ -0,0 +1,107 @@
+"""baseline schema
+
+Matches the tables that ``Base.metadata.create_all`` produced before
+migrations existed. Tables that are already present are left alone, so
+existing deployments can adopt migrations by simply running
+``alembic upgrade head``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_table(name, *columns, id_index=True):
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+        if id_index:
+            op.create_index(f"ix_{name}_id", name, ["id"])
+
+
+def upgrade() -> None:
+    _create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("password", sa.String()),
+        sa.Column("is_staff", sa.Boolean()),
+        sa.Column("is_active", sa.Boolean()),
+    )
+    _create_table(
+        "product",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(200)),
+        sa.Column("image", sa.String(200)),
+        sa.Column("category", sa.String(25)),
+        sa.Column("description", sa.String(255)),
+        sa.Column("price", sa.Integer()),
+        sa.Column("countInStock", sa.Integer()),
+        sa.Column("rating", sa.Integer()),
+        id_index=False,
+    )
+    _create_table(
+        "review",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(200)),
+        sa.Column("comment", sa.String(255)),
+        sa.Column("rating", sa.Integer()),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("product.id")),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+        id_index=False,
+    )
+    _create_table(
+        "order",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(30)),
+        sa.Column("email", sa.String(30)),
+        sa.Column("orderAmount", sa.Integer()),
+        sa.Column("transactionId", sa.String()),
+        sa.Column("isDelivered", sa.Boolean()),
+        sa.Column("user_id", sa.Integer()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    _create_table(
+        "shipping",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("address", sa.String()),
+        sa.Column("postalCode", sa.Integer()),
+        sa.Column("country", sa.String()),
+        sa.Column("city", sa.String()),
+        sa.Column("order_id", sa.Integer()),
+    )
+    _create_table(
+        "orderitems",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("quantity", sa.Integer()),
+        sa.Column("price", sa.Integer()),
+        sa.Column("order_id", sa.Integer()),
+    )
+    _create_table(
+        "revoked_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("jti", sa.String(32), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("version", sa.Integer(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    for name in ("revoked_tokens", "orderitems", "shipping", "order", "review", "product", "users"):
+        op.drop_table(name)
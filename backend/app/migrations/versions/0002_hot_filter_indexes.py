@@ -0,0 +1,42 @@
+"""indexes for hot filter columns
+
+Every foreign-key style column that the services filter on. On Postgres
+the indexes are built CONCURRENTLY, outside a transaction, so the tables
+stay writable while the migration runs.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_order_user_id", "order", "user_id"),
+    ("ix_orderitems_order_id", "orderitems", "order_id"),
+    ("ix_shipping_order_id", "shipping", "order_id"),
+    ("ix_review_product_id", "review", "product_id"),
+    ("ix_review_user_id", "review", "user_id"),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, column in INDEXES:
+            op.create_index(
+                name, table, [column], if_not_exists=True, postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
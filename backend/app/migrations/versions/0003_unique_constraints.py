@@ -0,0 +1,38 @@
+"""unique email and one review per user and product
+
+Both rules were only enforced (or not at all) in application code. They are
+added as unique indexes, which also serve the login lookup by email and the
+duplicate-review check. Existing duplicates must be cleaned up first or the
+migration fails.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "uq_users_email", "users", ["email"],
+            unique=True, if_not_exists=True, postgresql_concurrently=True,
+        )
+        op.create_index(
+            "uq_review_user_product", "review", ["user_id", "product_id"],
+            unique=True, if_not_exists=True, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("uq_review_user_product", table_name="review", if_exists=True, postgresql_concurrently=True)
+        op.drop_index("uq_users_email", table_name="users", if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,52 @@
+"""background job table
+
+Holds the queue that ``python -m jobs.worker`` (or the job workers
+``server.py`` forks) claims work from.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(50)),
+        sa.Column("payload", sa.JSON()),
+        sa.Column("key", sa.String(200), nullable=True),
+        sa.Column("status", sa.String(20)),
+        sa.Column("priority", sa.Integer()),
+        sa.Column("attempts", sa.Integer()),
+        sa.Column("max_attempts", sa.Integer()),
+        sa.Column("run_at", sa.DateTime()),
+        sa.Column("progress", sa.Float()),
+        sa.Column("message", sa.String(255), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("cancel_requested", sa.Boolean()),
+        sa.Column("worker", sa.String(100), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_jobs_claim", "jobs", ["status", "priority", "run_at"])
+    op.create_index("ix_jobs_key", "jobs", ["key"])
+    op.create_index("ix_jobs_user_id", "jobs", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("jobs")
@@ -0,0 +1,32 @@
+"""stored review sentiment
+
+Comments were scored with VADER on every product page view. The score is
+now computed once, when the review is created, together with the name of
+the backend that produced it. Existing reviews are scored by the
+``reviews.sentiment_backfill`` job.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("review", sa.Column("sentiment", sa.Float(), nullable=True))
+    op.add_column("review", sa.Column("sentiment_model", sa.String(100), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("review") as batch:
+        batch.drop_column("sentiment_model")
+        batch.drop_column("sentiment")
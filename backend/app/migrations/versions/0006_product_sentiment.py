@@ -0,0 +1,56 @@
+"""per-product sentiment counts
+
+Filled from the review scores stored so far; ``record`` in
+``product/sentimentstats.py`` keeps it current from here on.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_sentiment",
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("product.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("reviews", sa.Integer()),
+        sa.Column("positive", sa.Integer()),
+        sa.Column("neutral", sa.Integer()),
+        sa.Column("negative", sa.Integer()),
+        sa.Column("score_sum", sa.Float()),
+        sa.Column("average", sa.Float()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_product_sentiment_average", "product_sentiment", ["average"])
+    op.execute(
+        """
+        INSERT INTO product_sentiment
+            (product_id, reviews, positive, neutral, negative, score_sum, average, updated_at)
+        SELECT r.product_id,
+               COUNT(r.sentiment),
+               SUM(CASE WHEN r.sentiment >= 0.05 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.sentiment > -0.05 AND r.sentiment < 0.05 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.sentiment <= -0.05 THEN 1 ELSE 0 END),
+               SUM(r.sentiment),
+               AVG(r.sentiment),
+               CURRENT_TIMESTAMP
+        FROM review r
+        JOIN product p ON p.id = r.product_id
+        WHERE r.sentiment IS NOT NULL
+        GROUP BY r.product_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("product_sentiment")
@@ -0,0 +1,36 @@
+"""per-product review keyphrases
+
+Empty until the first ``reviews.insights_rebuild`` job, which the job
+workers run daily at INSIGHTS_REBUILD_AT.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_review_insights",
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("product.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("reviews", sa.Integer()),
+        sa.Column("positive", sa.JSON()),
+        sa.Column("negative", sa.JSON()),
+        sa.Column("positive_summary", sa.String(255), nullable=True),
+        sa.Column("negative_summary", sa.String(255), nullable=True),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("product_review_insights")
@@ -0,0 +1,30 @@
+"""index on order.transactionId
+
+Bulk fulfillment looks orders up by transaction id. Built CONCURRENTLY on
+Postgres, like the indexes of 0002.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_order_transactionId", "order", ["transactionId"], if_not_exists=True, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_order_transactionId", table_name="order", if_exists=True, postgresql_concurrently=True)
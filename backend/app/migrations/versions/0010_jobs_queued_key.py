@@ -0,0 +1,45 @@
+"""one queued job per key
+
+Enqueueing deduplicated jobs by key in application code only, so two
+concurrent requests could both queue the same work. A partial unique
+index on ``key`` for queued jobs enforces it. Duplicates queued before
+this migration are cancelled first, keeping the oldest of each key.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+QUEUED = sa.text("status = 'queued'")
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        UPDATE jobs SET status = 'cancelled', finished_at = CURRENT_TIMESTAMP
+        WHERE status = 'queued' AND key IS NOT NULL AND id > (
+            SELECT MIN(oldest.id) FROM jobs AS oldest
+            WHERE oldest.key = jobs.key AND oldest.status = 'queued'
+        )
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "uq_jobs_queued_key", "jobs", ["key"], unique=True, if_not_exists=True,
+            postgresql_concurrently=True, postgresql_where=QUEUED, sqlite_where=QUEUED,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("uq_jobs_queued_key", table_name="jobs", if_exists=True, postgresql_concurrently=True)
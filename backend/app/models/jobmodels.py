@@ -0,0 +1,38 @@
+from sqlalchemy import JSON, Boolean, Column, DateTime, Float, Index, Integer, String, Text, text
+from config.database import Base
+from datetime import datetime
+
+
+class JobModel(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50))
+    payload = Column(JSON)
+    # Jobs with the same key are one piece of work: enqueueing it again while
+    # a job with that key is queued returns the existing job.
+    key = Column(String(200), index=True, nullable=True)
+    status = Column(String(20), default="queued")  # queued | running | succeeded | failed | cancelled
+    priority = Column(Integer, default=0)  # higher runs first
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    run_at = Column(DateTime, default=datetime.utcnow)  # not before; pushed back between retries
+    progress = Column(Float, default=0.0)  # 0..1
+    message = Column(String(255), nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, default=False)
+    worker = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    user_id = Column(Integer, index=True, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The claim query: next queued job by priority, then due time.
+        Index("ix_jobs_claim", "status", "priority", "run_at"),
+        # At most one queued job per key, whoever enqueues it.
+        Index("uq_jobs_queued_key", "key", unique=True,
+              postgresql_where=text("status = 'queued'"), sqlite_where=text("status = 'queued'")),
+    )
@@ -11,9 +11,9 @@ class OrderModel(Base):
     name = Column(String(30))
     email = Column(String(30))
     orderAmount = Column(Integer)
-    transactionId = Column(String)
+    transactionId = Column(String, index=True)
     isDelivered = Column(Boolean)
-    user_id = Column(Integer)
+    user_id = Column(Integer, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
 
@@ -26,7 +26,7 @@ class ShippingAddressModel(Base):
     postalCode = Column(Integer)
     country = Column(String)
     city = Column(String)
-    order_id = Column(Integer)
+    order_id = Column(Integer, index=True)
 
 
 class OrderItemsModel(Base):
@@ -36,5 +36,5 @@ class OrderItemsModel(Base):
     name = Column(String)
     quantity = Column(Integer)
     price = Column(Integer)
-    order_id = Column(Integer)
+    order_id = Column(Integer, index=True)
 
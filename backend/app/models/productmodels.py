@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import JSON, Column, DateTime, Float, Index, Integer, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import ForeignKey
 from config.database import Base
@@ -19,6 +19,41 @@ class ProductModel(Base):
     price = Column(Integer)
     countInStock = Column(Integer)
     rating = Column(Integer)
+    # Uploaded image and its resized copies (product/images.py):
+    # {"original": {...}, "variants": [{"url", "width", "height", "format", "bytes"}, ...]}
+    image_variants = Column(JSON(none_as_null=True), nullable=True)
 
     reviews_user = relationship("ReviewModel", back_populates="product")
 
+
+class ProductSentimentModel(Base):
+    """Sentiment of a product's scored reviews, kept up to date as reviews are written."""
+
+    __tablename__ = "product_sentiment"
+    __table_args__ = (
+        Index("ix_product_sentiment_average", "average"),
+    )
+
+    product_id = Column(Integer, ForeignKey("product.id", ondelete="CASCADE"), primary_key=True)
+    reviews = Column(Integer, default=0)
+    positive = Column(Integer, default=0)
+    neutral = Column(Integer, default=0)
+    negative = Column(Integer, default=0)
+    score_sum = Column(Float, default=0.0)
+    average = Column(Float, default=0.0)  # score_sum / reviews, stored so rankings can use the index
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ProductInsightsModel(Base):
+    """Keyphrases of a product's positive and negative reviews; see product/insights.py."""
+
+    __tablename__ = "product_review_insights"
+
+    product_id = Column(Integer, ForeignKey("product.id", ondelete="CASCADE"), primary_key=True)
+    reviews = Column(Integer, default=0)  # scored reviews the phrases were taken from
+    positive = Column(JSON)  # [{"phrase": ..., "score": ...}], best first
+    negative = Column(JSON)
+    # The review closest to the average of each side.
+    positive_summary = Column(String(255), nullable=True)
+    negative_summary = Column(String(255), nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
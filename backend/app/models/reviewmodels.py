@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import ForeignKey
 from config.database import Base
@@ -7,15 +7,22 @@ from datetime import datetime
 
 class ReviewModel(Base):
     __tablename__ = "review"
+    __table_args__ = (
+        Index("uq_review_user_product", "user_id", "product_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String(200))
     comment = Column(String(255))
     rating = Column(Integer)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    # Score of ``comment`` from -1 to 1 and the backend that produced it;
+    # reviews scored by another backend are rescored by reviews.sentiment_backfill.
+    sentiment = Column(Float, nullable=True)
+    sentiment_model = Column(String(100), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     user = relationship("User", back_populates="reviews")
 
-    product_id = Column(Integer, ForeignKey("product.id"))
+    product_id = Column(Integer, ForeignKey("product.id"), index=True)
     product = relationship("ProductModel", back_populates="reviews_user")
 
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.sql.sqltypes import DateTime
+from config.database import Base
+from datetime import datetime
+
+
+class RevokedTokenModel(Base):
+    __tablename__ = "revoked_tokens"
+
+    # Monotonic id doubles as the sync cursor for every worker's in-memory list.
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(32), nullable=True)
+    user_id = Column(Integer, nullable=True)
+    version = Column(Integer, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
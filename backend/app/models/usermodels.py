@@ -1,10 +1,11 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Index, Integer, String, Boolean
 from sqlalchemy.orm import relationship
 from config.database import Base
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (Index("uq_users_email", "email", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
@@ -0,0 +1,76 @@
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.orm import Session
+
+from config.config import settings
+from config.database import get_db
+from config.pool import pool_status
+from config.token import get_currentUser, get_staffUser
+
+router = APIRouter(prefix="/internal", tags=["Monitoring"], include_in_schema=False)
+
+# Prometheus expects the conventional path, so this one has no prefix.
+metrics_router = APIRouter(tags=["Monitoring"], include_in_schema=False)
+
+
+def get_scraper(request: Request, db: Session = Depends(get_db)):
+    """A scrape with the METRICS_TOKEN bearer token, or a staff user.
+
+    The backend's port may be reachable without going through nginx, so
+    the monitoring routes are not left open.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and settings.METRICS_TOKEN and hmac.compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        return None
+    return get_staffUser(get_currentUser(db=db, data=token))
+
+
+@router.get("/metrics/pool")
+def poolMetrics(scraper=Depends(get_scraper)):
+    return pool_status()
+
+
+@router.get("/profiles")
+def listProfiles(current_user=Depends(get_staffUser)):
+    from monitoring.profiler import load_profiles
+
+    return [
+        {"id": slug, "route": entry["route"], "requests": entry["requests"],
+         "samples": sum(entry["stacks"].values())}
+        for slug, entry in load_profiles().items()
+    ]
+
+
+@router.get("/profiles/{profileid}")
+def downloadProfile(profileid: str, format: str = "speedscope", current_user=Depends(get_staffUser)):
+    from monitoring.profiler import collapsed, load_profiles, speedscope
+
+    entry = load_profiles().get(profileid)
+    if entry is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No profile for this route")
+    headers = {"Content-Disposition": f'attachment; filename="{profileid}.{format}"'}
+    if format == "collapsed":
+        return PlainTextResponse(collapsed(entry), headers=headers)
+    if format == "speedscope":
+        return JSONResponse(speedscope(entry), headers=headers)
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="format must be speedscope or collapsed")
+
+
+@router.delete("/profiles")
+def clearProfiles(current_user=Depends(get_staffUser)):
+    from monitoring.profiler import clear_profiles
+
+    clear_profiles()
+    return {"detail": "Profiles cleared"}
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def prometheusMetrics(scraper=Depends(get_scraper)):
+    from monitoring.prometheus import metrics, update_process_metrics
+
+    update_process_metrics()
+    return PlainTextResponse(metrics.exposition(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,351 @@
+import contextlib
+import functools
+import inspect
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool as _run_in_threadpool
+
+from config.config import settings
+
+FORCE_HEADER = b"x-profile"
+
+profile_requested: ContextVar = ContextVar("profile_requested", default=False)
+# (sampler, profile, endpoint frame name) while a profiled endpoint runs.
+_current: ContextVar = ContextVar("profile_current", default=None)
+
+
+def _frame_name(code) -> str:
+    path = code.co_filename.replace("\\", "/").split("/")
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+class RouteProfile:
+    """Collapsed stacks sampled from one route, in this worker."""
+
+    def __init__(self, key: str, directory: str):
+        self.key = key
+        self.directory = directory
+        self.requests = 0
+        self.stacks = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, stack: str):
+        with self._lock:
+            self.stacks[stack] += 1
+
+    @property
+    def path(self) -> str:
+        # Named when saving: profiles are created before the workers fork.
+        return os.path.join(self.directory, f"{route_slug(self.key)}.{os.getpid()}.json")
+
+    def save(self):
+        with self._lock:
+            self.requests += 1
+            data = {"route": self.key, "requests": self.requests, "stacks": dict(self.stacks)}
+        path = self.path
+        os.makedirs(self.directory, exist_ok=True)
+        with open(f"{path}.tmp", "w") as handle:
+            json.dump(data, handle)
+        os.replace(f"{path}.tmp", path)
+
+
+class StackSampler:
+    """Samples the stacks of the threads serving profiled requests.
+
+    The thread only runs while at least one request is being profiled.
+    A sample is kept only if the endpoint's own frame is on the stack,
+    which for async endpoints filters out other coroutines sharing the
+    event loop thread. Stacks are cut at the endpoint frame, so they start
+    at the handler rather than in the server.
+
+    Work the endpoint hands to other threads is watched from the frame
+    that runs it, see :func:`run_in_threadpool` and :func:`sampling`; those
+    stacks start with the endpoint's name too.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._targets = {}
+        self._tokens = itertools.count()
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def watch(self, profile: RouteProfile, code, ident: int = None, label: str = None) -> int:
+        """Sample thread ``ident`` (this one by default) from the frame running
+        ``code`` up; ``label``, if given, names that frame in the stacks."""
+        token = next(self._tokens)
+        self._targets[token] = (ident or threading.get_ident(), profile, code, label)
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                    self._thread.start()
+        self._wake.set()
+        return token
+
+    def unwatch(self, token: int):
+        self._targets.pop(token, None)
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            if not self._targets:
+                self._wake.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for ident, profile, code, label in list(self._targets.values()):
+                stack = self._stack(frames.get(ident), code, label)
+                if stack:
+                    profile.add(stack)
+
+    @staticmethod
+    def _stack(frame, root_code, label=None):
+        names = []
+        while frame is not None:
+            names.append(_frame_name(frame.f_code))
+            if frame.f_code is root_code:
+                if label is not None:
+                    names[-1] = label
+                return ";".join(reversed(names))
+            frame = frame.f_back
+        return None
+
+
+async def run_in_threadpool(func, *args, **kwargs):
+    """Starlette's ``run_in_threadpool``. Within a profiled request the
+    thread that runs ``func`` is sampled too, so work an async endpoint
+    offloads (pandas, scikit-learn, sentiment) shows up in its profile."""
+    current = _current.get()
+    if current is None:
+        return await _run_in_threadpool(func, *args, **kwargs)
+    return await _run_in_threadpool(_sampled, current, func, args, kwargs)
+
+
+def _sampled(current, func, args, kwargs):
+    sampler, profile, label = current
+    token = sampler.watch(profile, _sampled.__code__, label=label)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        sampler.unwatch(token)
+
+
+@contextlib.contextmanager
+def sampling(ident: int, code):
+    """Within a profiled request, sample thread ``ident`` from the frame
+    running ``code`` up while the request waits on it.
+
+    For long-lived threads that serve many requests, like the sentiment
+    batcher: what they do for other requests meanwhile is counted too.
+    """
+    current = _current.get()
+    if current is None or ident is None:
+        yield
+        return
+    sampler, profile, label = current
+    token = sampler.watch(profile, code, ident=ident, label=label)
+    try:
+        yield
+    finally:
+        sampler.unwatch(token)
+
+
+def route_slug(key: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", key).strip("_")
+
+
+class Profiler:
+    def __init__(self, directory: str, sample_rate: int, interval: float):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.sampler = StackSampler(interval)
+        self.profiles = {}
+        self._requests = itertools.count(1)
+
+    def should_profile(self, scope) -> bool:
+        if self.sample_rate > 0 and next(self._requests) % self.sample_rate == 0:
+            return True
+        headers = dict(scope["headers"])
+        return FORCE_HEADER in headers and _is_staff(headers.get(b"authorization", b""))
+
+    def wrap(self, route: APIRoute):
+        key = f"{','.join(sorted(route.methods))} {route.path}"
+        profile = self.profiles[key] = RouteProfile(key, self.directory)
+        call = route.dependant.call
+        code = getattr(inspect.unwrap(call), "__code__", None)
+        if code is None:
+            return
+        sampler = self.sampler
+        current = (sampler, profile, _frame_name(code))
+
+        if inspect.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def profiled(*args, **kwargs):
+                if not profile_requested.get():
+                    return await call(*args, **kwargs)
+                token = sampler.watch(profile, code)
+                reset = _current.set(current)
+                try:
+                    return await call(*args, **kwargs)
+                finally:
+                    _current.reset(reset)
+                    sampler.unwatch(token)
+                    profile.save()
+        else:
+            @functools.wraps(call)
+            def profiled(*args, **kwargs):
+                if not profile_requested.get():
+                    return call(*args, **kwargs)
+                token = sampler.watch(profile, code)
+                reset = _current.set(current)
+                try:
+                    return call(*args, **kwargs)
+                finally:
+                    _current.reset(reset)
+                    sampler.unwatch(token)
+                    profile.save()
+
+        route.dependant.call = profiled
+
+
+def _is_staff(authorization: bytes) -> bool:
+    from config.token import decode_token
+
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = decode_token(token, HTTPException(status_code=401))
+    except HTTPException:
+        return False
+    return payload.get("role") == "staff"
+
+
+class ProfilingMiddleware:
+    """Marks 1 in PROFILE_SAMPLE_RATE requests, or those sent by staff with
+    an ``X-Profile`` header, for the wrapped endpoints to profile."""
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profiled", b"1")]
+            await send(message)
+
+        token = profile_requested.set(True)
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            profile_requested.reset(token)
+
+
+def profile_dir() -> str:
+    """Resolved once, when the profiler is installed: in a forked worker the
+    parent is the master rather than the master's own parent."""
+    return settings.PROFILE_DIR or os.path.join(tempfile.gettempdir(), f"ecom-profiles-{os.getppid()}")
+
+
+# The installed profiler, if any; workers inherit it, directory included.
+profiler = None
+
+
+def install_profiler(app):
+    """Wrap every API endpoint and add the middleware. Call after the
+    routers are included; when it is not called nothing is wrapped."""
+    global profiler
+    profiler = Profiler(
+        profile_dir(),
+        sample_rate=settings.PROFILE_SAMPLE_RATE,
+        interval=settings.PROFILE_INTERVAL_MS / 1000,
+    )
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            profiler.wrap(route)
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+    return profiler
+
+
+# Reading profiles back, merged across workers
+
+def load_profiles() -> dict:
+    merged = {}
+    if profiler is None:
+        return merged
+    directory = profiler.directory
+    if not os.path.isdir(directory):
+        return merged
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        entry = merged.setdefault(route_slug(data["route"]), {"route": data["route"], "requests": 0, "stacks": Counter()})
+        entry["requests"] += data["requests"]
+        entry["stacks"].update(data["stacks"])
+    return merged
+
+
+def clear_profiles():
+    if profiler is None:
+        return
+    directory = profiler.directory
+    if os.path.isdir(directory):
+        for filename in os.listdir(directory):
+            os.remove(os.path.join(directory, filename))
+
+
+def collapsed(entry: dict) -> str:
+    """Brendan Gregg's folded format, for flamegraph.pl or speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in entry["stacks"].most_common())
+
+
+def speedscope(entry: dict) -> dict:
+    interval_ms = settings.PROFILE_INTERVAL_MS
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, count in entry["stacks"].most_common():
+        sample = []
+        for name in stack.split(";"):
+            if name not in index:
+                index[name] = len(frames)
+                frames.append({"name": name})
+            sample.append(index[name])
+        samples.append(sample)
+        weights.append(count * interval_ms)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": entry["route"],
+        "exporter": "ecom-profiler",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": entry["route"],
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
@@ -0,0 +1,433 @@
+import gc
+import json
+import os
+import resource
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from starlette.routing import Match
+
+from config.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms for this worker process.
+
+    :meth:`inc`, :meth:`set`, :meth:`add`, :meth:`observe` and
+    :meth:`add_to` may be called from any thread (the threadpool, the
+    sentiment batcher) and take a lock. Cells updated in place, like the
+    per-route series of :class:`PrometheusMiddleware`, must only be written
+    from the event loop thread, which also takes the snapshots. Each worker periodically writes a snapshot to
+    ``directory``; a scrape on any worker merges the snapshots of the
+    workers still alive. A worker's snapshot goes when it exits, so merged
+    counters drop when one is replaced, which Prometheus treats as a
+    counter reset.
+    """
+
+    def __init__(self, directory: str, flush_seconds: float):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.pid = os.getpid()
+        self.descriptions = {}
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._next_flush = 0.0
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, kind: str, help_text: str, buckets=None):
+        self.descriptions[name] = (kind, help_text, buckets)
+
+    # Values live in mutable cells (one-element lists for counters and
+    # gauges) so hot paths can keep a reference and skip the dict lookup.
+
+    def counter(self, name: str, labels: tuple = ()) -> list:
+        cell = self.counters.get((name, labels))
+        if cell is None:
+            with self._lock:
+                cell = self.counters.setdefault((name, labels), [0])
+        return cell
+
+    def gauge(self, name: str, labels: tuple = ()) -> list:
+        cell = self.gauges.get((name, labels))
+        if cell is None:
+            with self._lock:
+                cell = self.gauges.setdefault((name, labels), [0])
+        return cell
+
+    def histogram(self, name: str, labels: tuple = ()) -> list:
+        cell = self.histograms.get((name, labels))
+        if cell is None:
+            with self._lock:
+                # One slot per bucket plus +Inf, then sum and count.
+                cell = self.histograms.setdefault(
+                    (name, labels), [0] * (len(self.descriptions[name][2]) + 1) + [0.0, 0]
+                )
+        return cell
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1):
+        self.add_to(self.counter(name, labels), value)
+
+    def set(self, name: str, labels: tuple, value: float):
+        cell = self.gauge(name, labels)
+        with self._lock:
+            cell[0] = value
+
+    def add(self, name: str, labels: tuple, value: float):
+        self.add_to(self.gauge(name, labels), value)
+
+    def add_to(self, cell: list, value: float = 1):
+        """Add to a cell from :meth:`counter` or :meth:`gauge` kept by the caller."""
+        with self._lock:
+            cell[0] += value
+
+    def observe(self, name: str, labels: tuple, value: float):
+        histogram = self.histogram(name, labels)
+        with self._lock:
+            observe(histogram, self.descriptions[name][2], value)
+
+    # Multi-process aggregation
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"worker-{pid}.json")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pid": self.pid,
+                "counters": [[name, labels, cell[0]] for (name, labels), cell in self.counters.items()],
+                "gauges": [[name, labels, cell[0]] for (name, labels), cell in self.gauges.items()],
+                "histograms": [[name, labels, list(values)] for (name, labels), values in self.histograms.items()],
+            }
+
+    def maybe_flush(self):
+        now = time.monotonic()
+        if now >= self._next_flush:
+            self._next_flush = now + self.flush_seconds
+            self.flush()
+
+    def flush(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(self.pid)
+        with open(f"{path}.tmp", "w") as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(f"{path}.tmp", path)
+
+    def forget(self, pid: int):
+        """Drop the snapshot of a worker that exited."""
+        try:
+            os.remove(self._path(pid))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        """Drop every snapshot, e.g. those a previous server left behind."""
+        if not os.path.isdir(self.directory):
+            return
+        for filename in os.listdir(self.directory):
+            if filename.startswith("worker-"):
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except FileNotFoundError:
+                    pass
+
+    def collect(self) -> dict:
+        """Merge the snapshots of every worker, this one taken live."""
+        self.flush()
+        counters, gauges, histograms = {}, {}, {}
+
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith("worker-") and filename.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as handle:
+                    snapshot = json.load(handle)
+            except (OSError, ValueError):
+                continue
+            if not _alive(snapshot["pid"]):
+                # Exited without its master removing it (e.g. under uvicorn --workers).
+                self.forget(snapshot["pid"])
+                continue
+
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot["histograms"]:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    merged[i] += value
+            for name, labels, value in snapshot["gauges"]:
+                key = (name, tuple(map(tuple, labels)))
+                gauges[key] = gauges.get(key, 0) + value
+
+        return {"counter": counters, "gauge": gauges, "histogram": histograms}
+
+    def exposition(self) -> str:
+        merged = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in sorted(self.descriptions.items()):
+            series = [(labels, value) for (metric, labels), value in merged[kind].items() if metric == name]
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series):
+                if kind != "histogram":
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(buckets) + ["+Inf"], value[:-2]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value[-2])}")
+                lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def observe(histogram: list, buckets: tuple, value: float):
+    histogram[bisect_left(buckets, value)] += 1
+    histogram[-2] += value
+    histogram[-1] += 1
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    rendered = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + rendered + "}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = MetricsRegistry(
+    directory=settings.METRICS_DIR or os.path.join(tempfile.gettempdir(), f"ecom-metrics-{os.getppid()}"),
+    flush_seconds=settings.METRICS_FLUSH_SECONDS,
+)
+
+metrics.describe("http_requests_total", "counter", "Requests by route template, method and status.")
+metrics.describe("http_request_errors_total", "counter", "Requests that failed with a 5xx or an exception.")
+metrics.describe("http_request_duration_seconds", "histogram", "Request latency.", LATENCY_BUCKETS)
+metrics.describe("http_response_size_bytes", "histogram", "Response body size.", SIZE_BUCKETS)
+metrics.describe("http_requests_in_progress", "gauge", "Requests currently being served.")
+metrics.describe("process_resident_memory_bytes", "gauge", "Resident set size per worker.")
+metrics.describe("process_unique_memory_bytes", "gauge",
+                 "Memory only this worker maps (USS); what stopping it would free.")
+metrics.describe("process_proportional_memory_bytes", "gauge",
+                 "Resident memory with shared pages split between the processes sharing them (PSS).")
+metrics.describe("process_cpu_seconds_total", "counter", "User and system CPU time.")
+metrics.describe("python_gc_collections_total", "counter", "Garbage collector runs per generation.")
+metrics.describe("python_gc_objects_collected_total", "counter", "Objects collected per generation.")
+metrics.describe("threadpool_threads_busy", "gauge", "Threadpool tokens in use (sync endpoints and dependencies).")
+metrics.describe("threadpool_threads_limit", "gauge", "Threadpool size.")
+metrics.describe("db_pool_checked_out", "gauge", "Database connections checked out, per engine.")
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def memory_usage(pid="self") -> dict:
+    """RSS, PSS and USS in bytes from /proc/<pid>/smaps_rollup (Linux only, else empty).
+
+    Pages a forked worker still shares copy-on-write with the master count
+    towards its RSS but not its USS.
+    """
+    fields = {"Rss": "rss", "Pss": "pss", "Private_Clean": "uss", "Private_Dirty": "uss"}
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as handle:
+            for line in handle:
+                name, _, rest = line.partition(":")
+                if name in fields:
+                    key = fields[name]
+                    usage[key] = usage.get(key, 0) + int(rest.split()[0]) * 1024
+    except (OSError, ValueError):
+        return {}
+    return usage
+
+
+_last_cpu = {}
+_last_gc = {}
+
+
+def _after_fork():
+    # A worker forked from a preloading master (server.py) starts with the
+    # master's registry; its own pid names its snapshot and CPU time restarts at 0.
+    metrics.pid = os.getpid()
+    _last_cpu.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def update_process_metrics():
+    """Refresh this worker's process-level series; called before each flush."""
+    pid = (("pid", str(metrics.pid)),)
+    metrics.set("process_resident_memory_bytes", pid, _rss_bytes())
+    usage = memory_usage()
+    if usage:
+        metrics.set("process_unique_memory_bytes", pid, usage["uss"])
+        metrics.set("process_proportional_memory_bytes", pid, usage["pss"])
+
+    # Counters are merged by summing snapshots, so record deltas only.
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = usage.ru_utime + usage.ru_stime
+    metrics.inc("process_cpu_seconds_total", (), cpu - _last_cpu.get("cpu", 0.0))
+    _last_cpu["cpu"] = cpu
+
+    for generation, stats in enumerate(gc.get_stats()):
+        labels = (("generation", str(generation)),)
+        for name, field in (("python_gc_collections_total", "collections"),
+                            ("python_gc_objects_collected_total", "collected")):
+            previous = _last_gc.get((name, generation), 0)
+            metrics.inc(name, labels, stats[field] - previous)
+            _last_gc[(name, generation)] = stats[field]
+
+    try:
+        from anyio import to_thread
+
+        limiter = to_thread.current_default_thread_limiter()
+        metrics.set("threadpool_threads_busy", pid, limiter.borrowed_tokens)
+        metrics.set("threadpool_threads_limit", pid, limiter.total_tokens)
+    except RuntimeError:
+        # No running event loop (e.g. flushed from a plain thread).
+        pass
+
+    from config.pool import engines
+
+    for name, engine in engines.items():
+        pool = engine.pool
+        if hasattr(pool, "checkedout"):
+            metrics.set("db_pool_checked_out", pid + (("engine", name),), pool.checkedout())
+
+
+class _RouteSeries:
+    """The cells one route updates on every request."""
+
+    __slots__ = ("labels", "in_progress", "latency", "size", "errors", "requests")
+
+    def __init__(self, method: str, template: str):
+        self.labels = (("method", method), ("route", template))
+        self.in_progress = metrics.gauge("http_requests_in_progress", self.labels)
+        self.latency = metrics.histogram("http_request_duration_seconds", self.labels)
+        self.size = metrics.histogram("http_response_size_bytes", self.labels)
+        self.errors = metrics.counter("http_request_errors_total", self.labels)
+        self.requests = {}
+
+    def by_status(self, status: int) -> list:
+        cell = self.requests.get(status)
+        if cell is None:
+            cell = self.requests[status] = metrics.counter(
+                "http_requests_total", self.labels + (("status", str(status)),)
+            )
+        return cell
+
+
+class PrometheusMiddleware:
+    """Records per-route request metrics.
+
+    Routes are labelled by template (``/api/product/{productid}``), resolved
+    once per distinct raw path and cached, so label cardinality stays bounded
+    by the number of routes.
+    """
+
+    def __init__(self, app, max_cached_paths: int = 10_000):
+        self.app = app
+        self.max_cached_paths = max_cached_paths
+        self._paths = {}
+        self._series = {}
+        self._routes = None
+
+    def _route_series(self, scope) -> _RouteSeries:
+        if self._routes is None:
+            self._routes = [route for route in scope["app"].routes if hasattr(route, "path_regex")]
+        path = scope["path"]
+        # As the router does: the first route matching path and method, else
+        # the first matching the path alone (which answers 405).
+        template = partial = None
+        for route in self._routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                template = route.path
+                break
+            if match == Match.PARTIAL and partial is None:
+                partial = route.path
+        template = template or partial or "<unmatched>"
+        key = (scope["method"], template)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _RouteSeries(*key)
+        if len(self._paths) >= self.max_cached_paths:
+            self._paths.clear()
+        self._paths[(scope["method"], path)] = series
+        return series
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        series = self._paths.get((scope["method"], scope["path"])) or self._route_series(scope)
+        status = 500
+        size = 0
+
+        async def send_and_measure(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        series.in_progress[0] += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_measure)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            # observe() inlined: this runs on every request.
+            elapsed = time.perf_counter() - start
+            latency = series.latency
+            latency[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+            latency[-2] += elapsed
+            latency[-1] += 1
+            sizes = series.size
+            sizes[bisect_left(SIZE_BUCKETS, size)] += 1
+            sizes[-2] += size
+            sizes[-1] += 1
+            series.by_status(status)[0] += 1
+            if status >= 500:
+                series.errors[0] += 1
+            series.in_progress[0] -= 1
+            if time.monotonic() >= metrics._next_flush:
+                update_process_metrics()
+                metrics.maybe_flush()
@@ -0,0 +1,135 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config.config import settings
+
+logger = logging.getLogger("ecom.sql")
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement with literals and IN lists collapsed, so repeats compare equal."""
+    shape = _IN_LIST.sub("IN (...)", statement)
+    shape = _LITERAL.sub("?", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+class RequestStats:
+    __slots__ = ("method", "path", "queries", "seconds", "slowest_seconds", "slowest_statement", "shapes")
+
+    def __init__(self, method: str = None, path: str = None):
+        self.method = method
+        self.path = path
+        self.queries = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.shapes = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.queries += 1
+        self.seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int):
+        return [(shape, count) for shape, count in self.shapes.items() if count >= threshold]
+
+
+current_stats: ContextVar = ContextVar("sql_request_stats", default=None)
+
+
+def log_event(event_name: str, **fields):
+    logger.warning(json.dumps({"event": event_name, **fields}, default=str))
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+
+    stats = current_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+
+    if seconds * 1000 >= settings.SLOW_QUERY_MS:
+        log_event(
+            "slow_query",
+            method=stats.method if stats else None,
+            path=stats.path if stats else None,
+            duration_ms=round(seconds * 1000, 2),
+            statement=statement,
+            parameters=parameters if settings.DEBUG == "True" else None,
+        )
+
+
+class SQLInstrumentationMiddleware:
+    """Counts the queries each request issues.
+
+    Repeated statement shapes are logged as possible N+1 patterns, and in
+    DEBUG mode the totals are returned as ``Server-Timing`` entries.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope["method"], scope["path"])
+        token = current_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.DEBUG == "True":
+                timing = (
+                    f'db;dur={stats.seconds * 1000:.2f};desc="{stats.queries} queries", '
+                    f"db-slowest;dur={stats.slowest_seconds * 1000:.2f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_stats.reset(token)
+            if settings.DEBUG == "True" and stats.queries:
+                log_event(
+                    "request_sql",
+                    method=stats.method,
+                    path=stats.path,
+                    queries=stats.queries,
+                    db_ms=round(stats.seconds * 1000, 2),
+                    slowest_ms=round(stats.slowest_seconds * 1000, 2),
+                    slowest_statement=stats.slowest_statement,
+                )
+            for shape, count in stats.repeated_shapes(settings.N_PLUS_ONE_THRESHOLD):
+                log_event(
+                    "n_plus_one",
+                    method=stats.method,
+                    path=stats.path,
+                    count=count,
+                    statement=shape,
+                )
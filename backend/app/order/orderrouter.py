@@ -1,49 +1,72 @@
-from fastapi import APIRouter, Depends
+from typing import List
+
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.session import Session
 
-from config.database import get_db
-from dto.orderschema import OrderCreatePlaceOrder
-from .orderservice import OrderService
+from config.config import settings
+from config.database import get_async_db, get_db
+from config.token import get_staffUser
+from config.responses import rows_response
+from dto.jobschema import JobOut
+from dto.orderschema import (
+    FulfillmentBatch, FulfillmentResult, OrderCreatePlaceOrder, OrderDetail, OrderOut, OrderWithItem,
+)
+from jobs.exports import start_export
+from models.usermodels import User
+from .orderservice import AsyncOrderService, OrderService
 
 router = APIRouter(prefix="/order", tags=["Order"])
 
 
-@router.get("/")
-def getAll(db: Session = Depends(get_db)):
-    return OrderService.getAll(db=db)
+if settings.USE_ASYNC_DB == "True":
+    @router.get("/", response_model=List[OrderWithItem])
+    async def getAll(db: AsyncSession = Depends(get_async_db)):
+        return ORJSONResponse(await AsyncOrderService.getAll(db=db))
+else:
+    @router.get("/", response_model=List[OrderWithItem])
+    def getAll(db: Session = Depends(get_db)):
+        return ORJSONResponse(OrderService.getAll(db=db))
 
 
-@router.post("/")
+@router.post("/", response_model=OrderCreatePlaceOrder)
 def createOrder(request: OrderCreatePlaceOrder, db: Session = Depends(get_db)):
     return OrderService.createOrderPlace(request=request, db=db)
 
 
-@router.get("/orderbyuser/{userid}")
-def orderByUser(userid: int, db: Session = Depends(get_db)):
-    return OrderService.getOrderByUserId(userid=userid, db=db)
+if settings.USE_ASYNC_DB == "True":
+    @router.get("/orderbyuser/{userid}", response_model=List[OrderOut])
+    async def orderByUser(userid: int, db: AsyncSession = Depends(get_async_db)):
+        return rows_response(await AsyncOrderService.getOrderByUserId(userid=userid, db=db))
 
+    @router.get("/orderbyid/{id}", response_model=OrderDetail)
+    async def orderById(id: int, db: AsyncSession = Depends(get_async_db)):
+        return await AsyncOrderService.getOrderById(id=id, db=db)
+else:
+    @router.get("/orderbyuser/{userid}", response_model=List[OrderOut])
+    def orderByUser(userid: int, db: Session = Depends(get_db)):
+        return rows_response(OrderService.getOrderByUserId(userid=userid, db=db))
 
-@router.get("/orderbyid/{id}")
-def orderById(id: int, db: Session = Depends(get_db)):
-    return OrderService.getOrderById(id=id, db=db)
+    @router.get("/orderbyid/{id}", response_model=OrderDetail)
+    def orderById(id: int, db: Session = Depends(get_db)):
+        return OrderService.getOrderById(id=id, db=db)
 
 
 
-@router.get("/export-csv")
-def export_csv(db: Session = Depends(get_db)):
-    orders = OrderService.getAll(db=db)
+@router.post("/fulfillment/batch", response_model=FulfillmentResult)
+def fulfillBatch(request: FulfillmentBatch, db: Session = Depends(get_db), current_user: User = Depends(get_staffUser)):
+    """Mark orders, given by id or transaction id, delivered (or not with ``isDelivered: false``).
 
-    # Membuat string CSV dari data
-    csv_data = "OrderID,Product,Quantity,Price,Name,Email,TransactionId,UserId,Id,IsDelivered\n"
-    for order in orders:
-        csv_data += f"{order.id},{order.name},{order.orderAmount},{order.price},"
-        csv_data += f"{order.name},{order.email},{order.transactionId},{order.user_id},{order.id},{order.isDelivered}\n"
+    Returns one outcome per distinct id; subscribers of the orders' users get ``order`` events.
+    """
+    return OrderService.fulfillBatch(request=request, db=db)
 
-    # Membuat respons StreamingResponse dengan tipe konten CSV
-    response = StreamingResponse(content=iter([csv_data]), media_type="text/csv")
-    response.headers["Content-Disposition"] = 'attachment; filename="orders.csv"'
 
-    return response
+@router.post("/export", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+def exportOrders(format: str = "csv", db: Session = Depends(get_db), current_user: User = Depends(get_staffUser)):
+    """Start exporting every order item with its order; poll GET /api/jobs/{id}, then download the file."""
+    return start_export("orders", format, db=db, user_id=current_user.id)
 
 
 # @router.post("/create")
@@ -1,60 +1,67 @@
-import os
-import stripe
+import logging
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from fastapi import Depends
-from fastapi.encoders import jsonable_encoder
-from dto.orderschema import OrderCreatePlaceOrder
+from fastapi import Depends, HTTPException, status
+from config import events
+from config.config import settings
+from dto.orderschema import FulfillmentBatch, OrderCreatePlaceOrder
 from models.ordermodels import OrderModel, OrderItemsModel, ShippingAddressModel
+from .paymentgateway import payment_gateway
+from .pricing import price_cart
 
 from uuid import uuid4
 
+ORDER_COLUMNS = (
+    OrderModel.id, OrderModel.name, OrderModel.email, OrderModel.orderAmount,
+    OrderModel.transactionId, OrderModel.isDelivered, OrderModel.user_id,
+    OrderModel.created_at, OrderModel.updated_at,
+)
+ORDER_ITEM_COLUMNS = (
+    OrderItemsModel.id, OrderItemsModel.name, OrderItemsModel.quantity,
+    OrderItemsModel.price, OrderItemsModel.order_id,
+)
+_ORDER_FIELDS = [column.key for column in ORDER_COLUMNS]
+logger = logging.getLogger("ecom.orders")
+_ORDER_ITEM_FIELDS = [column.key for column in ORDER_ITEM_COLUMNS]
 
-stripe.api_key = os.environ.get("STRIPE_KEY")
 
+def _orders_with_items_query():
+    return select(*ORDER_COLUMNS, *ORDER_ITEM_COLUMNS).join(
+        OrderItemsModel, OrderModel.id == OrderItemsModel.order_id
+    )
 
 
 class OrderService:
     def getAll(db: Session):
-        orders_with_items = (
-            db.query(OrderModel, OrderItemsModel)
-            .join(OrderItemsModel, OrderModel.id == OrderItemsModel.order_id)
-            .all()
-        )
-        result = []
-        for order, order_item in orders_with_items:
-            order_data = {
-                "id": order.id,
-                "name": order.name,
-                "email": order.email,
-                "orderAmount": order.orderAmount,
-                "transactionId": order.transactionId,
-                "isDelivered": order.isDelivered,
-                "user_id": order.user_id,
-                "created_at": order.created_at,
-                "updated_at": order.updated_at,
-                "order_items": {
-                    "id": order_item.id,
-                    "name": order_item.name,
-                    "quantity": order_item.quantity,
-                    "price": order_item.price,
-                }
+        rows = db.execute(_orders_with_items_query()).all()
+
+        return OrderService._orders_with_items(rows)
+
+    def _orders_with_items(rows):
+        # One row per order item, straight from the column tuples.
+        split = len(ORDER_COLUMNS)
+        return [
+            {
+                **dict(zip(_ORDER_FIELDS, row[:split])),
+                "order_items": dict(zip(_ORDER_ITEM_FIELDS, row[split:])),
             }
-            result.append(order_data)
-    
-   
-        return jsonable_encoder(result)
+            for row in rows
+        ]
 
     def createOrderPlace(request: OrderCreatePlaceOrder, db: Session):
+        # Rejects stale prices, missing stock or a wrong subtotal before charging.
+        quote = price_cart(request.cartItems, request.subtotal, db)
 
-        customer = stripe.Customer.create(
-            email=request.token.email, source=request.token.id
-        )
-
-        payment = stripe.Charge.create(
-            amount=request.subtotal * 1000,
+        payment = payment_gateway.charge(
+            amount=quote["amount"],
             currency="MYR",
-            customer=customer.id,
-            receipt_email=request.token.email,
+            email=request.token.email,
+            source=request.token.id,
         )
 
         if payment:
@@ -62,33 +69,29 @@ class OrderService:
                 user_id=request.currentUser.id,
                 name=request.currentUser.name,
                 email=request.currentUser.email,
-                orderAmount=request.subtotal,
-                transactionId=uuid4()
+                orderAmount=quote["subtotal"],
+                transactionId=str(uuid4())
             )
             db.add(order_create)
-            db.commit()
-
-            db_orderid = db.query(OrderModel).filter(OrderModel.user_id == request.currentUser.id).first()
-            
-            
+            db.flush()
 
             shipping_a = ShippingAddressModel(
                 address=request.token.card.address_line1,
                 city=request.token.card.address_city,
                 country=request.token.card.address_country,
                 postalCode=request.token.card.address_zip,
-                order_id=db_orderid.id,
+                order_id=order_create.id,
             )
 
-            for dic in request.cartItems:
-                order_item_a = OrderItemsModel(
-                    name=dic.name,
-                    quantity=dic.quantity,
-                    price=dic.price,
-                    order_id=db_orderid.id,
+            db.add_all([
+                OrderItemsModel(
+                    name=line["name"],
+                    quantity=line["quantity"],
+                    price=line["price"],
+                    order_id=order_create.id,
                 )
-
-            db.add(order_item_a)
+                for line in quote["lines"]
+            ])
             db.add(shipping_a)
             db.commit()
         else:
@@ -98,16 +101,21 @@ class OrderService:
 
     def getOrderById(id: int, db: Session):
         order_byid = db.query(OrderModel).filter(OrderModel.id == id).first()
+        if order_byid is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
 
         orderItembyid = (
-            db.query(OrderItemsModel).filter(OrderItemsModel.id == order_byid.id).all()
+            db.query(OrderItemsModel).filter(OrderItemsModel.order_id == order_byid.id).all()
         )
         shippingByid = (
             db.query(ShippingAddressModel)
-            .filter(ShippingAddressModel.id == order_byid.id)
+            .filter(ShippingAddressModel.order_id == order_byid.id)
             .first()
         )
 
+        return OrderService._order_detail(order_byid, orderItembyid, shippingByid)
+
+    def _order_detail(order_byid, orderItembyid, shippingByid):
         response = {
             "name": order_byid.name,
             "email": order_byid.email,
@@ -124,9 +132,103 @@ class OrderService:
         return response
 
     def getOrderByUserId(userid: int, db: Session):
-        order_by_userid = (
-            db.query(OrderModel).filter(OrderModel.user_id == userid).all()
-        )
+        order_by_userid = db.execute(
+            select(*ORDER_COLUMNS).where(OrderModel.user_id == userid)
+        ).all()
 
         return order_by_userid
 
+    def fulfillBatch(request: FulfillmentBatch, db: Session):
+        """Set isDelivered on the orders named by id or transaction id.
+
+        Each chunk of FULFILLMENT_CHUNK_SIZE ids is one transaction of two
+        statements, whatever the batch size. A chunk that fails is rolled
+        back and reported as ``failed``; the chunks before it stay committed.
+        """
+        batches = [
+            (OrderModel.id, list(dict.fromkeys(request.orderIds))),
+            (OrderModel.transactionId, list(dict.fromkeys(request.transactionIds))),
+        ]
+        total = sum(len(keys) for _, keys in batches)
+        if not total:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="No orders given")
+        if total > settings.FULFILLMENT_MAX_IDS:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                detail=f"At most {settings.FULFILLMENT_MAX_IDS} ids per batch")
+
+        results = []
+        size = settings.FULFILLMENT_CHUNK_SIZE
+        for column, keys in batches:
+            for start in range(0, len(keys), size):
+                results += OrderService._fulfill_chunk(column, keys[start:start + size], request.isDelivered, db)
+
+        counts = Counter(result["status"] for result in results)
+        return {
+            "updated": counts["updated"],
+            "unchanged": counts["unchanged"],
+            "notFound": counts["not_found"],
+            "failed": counts["failed"],
+            "results": results,
+        }
+
+    def _fulfill_chunk(column, keys: list, delivered: bool, db: Session) -> list:
+        """Outcomes of ``keys``, values of ``column``; commits, then publishes the changes."""
+        now = datetime.utcnow()
+        try:
+            # NULL counts as not delivered. The condition is part of the
+            # UPDATE, so a concurrent batch cannot make an order count twice.
+            changed = db.execute(
+                update(OrderModel)
+                .where(column.in_(keys), OrderModel.isDelivered.is_distinct_from(delivered))
+                .values(isDelivered=delivered, updated_at=now)
+                .returning(OrderModel.id, OrderModel.transactionId, OrderModel.user_id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            found = dict(db.execute(select(column, OrderModel.id).where(column.in_(keys))).all())
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            logger.exception("fulfillment of %d orders failed", len(keys))
+            return [{"id": key, "status": "failed", "orderId": None} for key in keys]
+
+        events.orders_changed(
+            {"id": row.id, "transactionId": row.transactionId, "isDelivered": delivered,
+             "updated_at": now, "user_id": row.user_id}
+            for row in changed
+        )
+        updated = {getattr(row, column.key) for row in changed}
+        return [
+            {"id": key, "orderId": found.get(key),
+             "status": "updated" if key in updated else "unchanged" if key in found else "not_found"}
+            for key in keys
+        ]
+
+
+class AsyncOrderService:
+    async def getAll(db: AsyncSession):
+        rows = (await db.execute(_orders_with_items_query())).all()
+
+        return OrderService._orders_with_items(rows)
+
+    async def getOrderById(id: int, db: AsyncSession):
+        order_byid = (
+            await db.scalars(select(OrderModel).where(OrderModel.id == id))
+        ).first()
+        if order_byid is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+
+        orderItembyid = (
+            await db.scalars(select(OrderItemsModel).where(OrderItemsModel.order_id == order_byid.id))
+        ).all()
+        shippingByid = (
+            await db.scalars(
+                select(ShippingAddressModel).where(ShippingAddressModel.order_id == order_byid.id)
+            )
+        ).first()
+
+        return OrderService._order_detail(order_byid, orderItembyid, shippingByid)
+
+    async def getOrderByUserId(userid: int, db: AsyncSession):
+        return (
+            await db.execute(select(*ORDER_COLUMNS).where(OrderModel.user_id == userid))
+        ).all()
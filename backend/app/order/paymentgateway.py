@@ -0,0 +1,36 @@
+import os
+import time
+from uuid import uuid4
+
+import stripe
+
+from config.config import settings
+
+stripe.api_key = os.environ.get("STRIPE_KEY")
+
+
+class StripeGateway:
+    def charge(self, amount: int, currency: str, email: str, source: str):
+        customer = stripe.Customer.create(email=email, source=source)
+
+        return stripe.Charge.create(
+            amount=amount,
+            currency=currency,
+            customer=customer.id,
+            receipt_email=email,
+        )
+
+
+class StubGateway:
+    """Accepts every charge without calling Stripe. For benchmarks and local
+    runs only; PAYMENT_STUB_LATENCY_MS simulates the round trip."""
+
+    def charge(self, amount: int, currency: str, email: str, source: str):
+        if settings.PAYMENT_STUB_LATENCY_MS:
+            time.sleep(settings.PAYMENT_STUB_LATENCY_MS / 1000)
+        return {"id": f"ch_stub_{uuid4().hex}", "amount": amount, "currency": currency, "paid": True}
+
+
+GATEWAYS = {"stripe": StripeGateway, "stub": StubGateway}
+
+payment_gateway = GATEWAYS[settings.PAYMENT_GATEWAY]()
@@ -0,0 +1,77 @@
+"""Server-side pricing of a cart, before anything is charged.
+
+:func:`price_cart` resolves every cart line against the products' current
+price and stock with one ``IN`` query, whatever the number of lines, and
+computes the totals with integers only. The client's line prices and
+subtotal are checked against the result; on any mismatch the order is
+rejected with 409 and the current values, so the client can refresh its
+cart instead of paying a price it did not see.
+"""
+from collections import Counter
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from config.config import settings
+from models.productmodels import ProductModel
+
+# Charges are in thousandths of the displayed unit, as the checkout widget sends them.
+MINOR_UNITS = 1000
+
+
+def _reject(status_code: int, message: str, problems: list = None):
+    detail = {"message": message}
+    if problems is not None:
+        detail["problems"] = problems
+    raise HTTPException(status_code=status_code, detail=detail)
+
+
+def price_cart(cart_items, subtotal: int, db: Session) -> dict:
+    """The cart's lines at current prices and its subtotal; raises 422 or 409 if it cannot be ordered as sent.
+
+    ``cart_items`` have ``id`` (the product), ``quantity`` and the ``price``
+    the client showed. Quantities of repeated products are checked against
+    stock together.
+    """
+    if not cart_items:
+        _reject(status.HTTP_422_UNPROCESSABLE_ENTITY, "The cart is empty")
+    if len(cart_items) > settings.PRICING_MAX_LINES:
+        _reject(status.HTTP_422_UNPROCESSABLE_ENTITY, f"At most {settings.PRICING_MAX_LINES} cart lines per order")
+
+    products = {
+        row.id: row
+        for row in db.execute(
+            select(ProductModel.id, ProductModel.name, ProductModel.price, ProductModel.countInStock)
+            .where(ProductModel.id.in_({item.id for item in cart_items}))
+        )
+    }
+    wanted = Counter()
+    for item in cart_items:
+        wanted[item.id] += item.quantity
+
+    lines, problems, total = [], [], 0
+    for index, item in enumerate(cart_items):
+        product = products.get(item.id)
+        if product is None:
+            problems.append({"line": index, "productId": item.id, "problem": "not_found"})
+            continue
+        if item.quantity <= 0:
+            problems.append({"line": index, "productId": item.id, "problem": "invalid_quantity"})
+            continue
+        if product.price is None or item.price != product.price:
+            problems.append({"line": index, "productId": item.id, "problem": "price_changed", "price": product.price})
+        if wanted[item.id] > (product.countInStock or 0):
+            problems.append({"line": index, "productId": item.id, "problem": "out_of_stock",
+                             "countInStock": product.countInStock or 0})
+        line_total = (product.price or 0) * item.quantity
+        total += line_total
+        lines.append({"id": product.id, "name": product.name, "quantity": item.quantity,
+                      "price": product.price, "total": line_total})
+
+    if problems:
+        _reject(status.HTTP_409_CONFLICT, "The cart does not match current prices or stock", problems)
+    if subtotal != total:
+        _reject(status.HTTP_409_CONFLICT, "The subtotal does not match the cart",
+                [{"problem": "subtotal_mismatch", "subtotal": total}])
+    return {"lines": lines, "subtotal": total, "amount": total * MINOR_UNITS}
@@ -0,0 +1,203 @@
+"""Product images stored and resized locally.
+
+Staff upload a product's image to ``POST /api/product/{id}/image``. The
+original is kept under MEDIA_DIR and becomes the product's ``image`` at
+once; a ``products.thumbnails`` job then renders a JPEG and a WebP copy
+at each of IMAGE_WIDTHS, records them on the product (``image_variants``)
+and points ``image`` at the largest JPEG. Job workers are separate,
+lower-priority processes, so the request only stores the upload.
+
+Every file is named by a hash of its content. A URL therefore always
+means the same bytes, and MEDIA_URL serves them as immutable for a year;
+a new upload or new settings produce new URLs.
+
+``products.thumbnails_rebuild`` renders the whole catalog again across a
+pool of IMAGE_PROCESSES processes, e.g. after IMAGE_WIDTHS or a quality
+setting changed.
+"""
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from fastapi import HTTPException, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy import select, update
+
+from config.cache import cache
+from config.config import settings
+from jobs.registry import LOW, JobContext, job
+from models.productmodels import ProductModel
+
+logger = logging.getLogger("ecom.images")
+
+# Accepted upload formats and the extension their originals are stored with.
+FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+
+def media_path(relative: str) -> str:
+    return os.path.join(os.path.abspath(settings.MEDIA_DIR), relative)
+
+
+def media_url(relative: str) -> str:
+    return f"{settings.MEDIA_URL.rstrip('/')}/{relative}"
+
+
+def widths() -> list:
+    return sorted({int(width) for width in settings.IMAGE_WIDTHS.split(",") if width.strip()})
+
+
+def _store(data: bytes, folder: str, extension: str) -> str:
+    """Write ``data`` under its content hash, unless already there; returns its path relative to MEDIA_DIR."""
+    relative = f"{folder}/{hashlib.sha256(data).hexdigest()[:32]}.{extension}"
+    path = media_path(relative)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.{os.getpid()}.part"
+        with open(partial, "wb") as handle:
+            handle.write(data)
+        os.replace(partial, path)
+    return relative
+
+
+def save_original(data: bytes) -> dict:
+    """Check that ``data`` is an image we accept and store it; raises 413 or 400 if not."""
+    if len(data) > settings.IMAGE_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Images may be at most {settings.IMAGE_MAX_BYTES} bytes",
+        )
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            kind, size = image.format, image.size
+            image.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Not a readable image")
+    if kind not in FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Unsupported image format, use one of: {', '.join(FORMATS)}")
+
+    relative = _store(data, "originals", FORMATS[kind])
+    return {"url": media_url(relative), "width": size[0], "height": size[1], "bytes": len(data), "format": kind.lower()}
+
+
+def original_path(variants: dict) -> str:
+    """Where the original recorded in ``image_variants`` is stored."""
+    return f"originals/{variants['original']['url'].rsplit('/', 1)[-1]}"
+
+
+def render(original: str, sizes, jpeg_quality: int, webp_quality: int) -> list:
+    """Resized JPEG and WebP copies of the stored original ``original``, largest first.
+
+    Runs in pool processes, so it only takes and returns plain values.
+    Sizes wider than the original are rendered at the original's width.
+    """
+    with Image.open(media_path(original)) as image:
+        # JPEGs can be decoded at a fraction of their size, which is most of
+        # the cost of downscaling a photo.
+        image.draft("RGB", (max(sizes), max(sizes)))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    variants = []
+    for width in sorted({min(size, image.width) for size in sizes}, reverse=True):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize(
+            (width, height), Image.Resampling.LANCZOS, reducing_gap=3.0
+        )
+        opaque = resized
+        if has_alpha:
+            # JPEG has no alpha channel: flatten onto white.
+            opaque = Image.new("RGB", resized.size, "white")
+            opaque.paste(resized, mask=resized.getchannel("A"))
+        for name, extension, target, options in (
+            ("jpeg", "jpg", opaque, {"quality": jpeg_quality, "optimize": True, "progressive": True}),
+            ("webp", "webp", resized, {"quality": webp_quality, "method": 4}),
+        ):
+            buffer = io.BytesIO()
+            target.save(buffer, format=name.upper(), **options)
+            data = buffer.getvalue()
+            variants.append({
+                "url": media_url(_store(data, "products", extension)),
+                "width": width, "height": height, "format": name, "bytes": len(data),
+            })
+    return variants
+
+
+def _render_args() -> tuple:
+    return widths(), settings.IMAGE_JPEG_QUALITY, settings.IMAGE_WEBP_QUALITY
+
+
+def _main_image(variants: list) -> str:
+    return next(variant["url"] for variant in variants if variant["format"] == "jpeg")
+
+
+@job("products.thumbnails")
+def make_thumbnails(ctx: JobContext, product_id: int):
+    """Render the product's current original; queued by each upload."""
+    product = ctx.db.get(ProductModel, product_id)
+    if product is None or not product.image_variants:
+        return {"variants": 0}
+    original = product.image_variants["original"]
+    variants = render(original_path(product.image_variants), *_render_args())
+
+    ctx.db.refresh(product)
+    if product.image_variants["original"] != original:
+        # Replaced while rendering; the newer upload's job takes over.
+        return {"variants": 0, "superseded": True}
+    product.image_variants = {"original": original, "variants": variants}
+    product.image = _main_image(variants)
+    ctx.db.commit()
+    cache.invalidate("products", f"product:{product_id}")
+    return {"image": product.image, "variants": len(variants)}
+
+
+@job("products.thumbnails_rebuild", priority=LOW, public=True)
+def rebuild_thumbnails(ctx: JobContext, processes: int = None, batch_size: int = 200):
+    """Render every uploaded product image again, in parallel."""
+    products = ctx.db.execute(
+        select(ProductModel.id, ProductModel.image_variants).where(ProductModel.image_variants.is_not(None))
+    ).all()
+    total = len(products)
+    done, failed, pending, written = 0, [], [], []
+
+    def write():
+        if pending:
+            ctx.db.execute(update(ProductModel), pending)
+            ctx.db.commit()
+            written.extend(row["id"] for row in pending)
+            pending.clear()
+
+    pool = ProcessPoolExecutor(processes or settings.IMAGE_PROCESSES or os.cpu_count())
+    try:
+        futures = {
+            pool.submit(render, original_path(variants), *_render_args()): (product_id, variants["original"])
+            for product_id, variants in products
+        }
+        for future in as_completed(futures):
+            product_id, original = futures[future]
+            try:
+                variants = future.result()
+            except Exception as exc:
+                # A missing, unreadable or oversized original, or a crashed
+                # render process; keep what the product has.
+                logger.warning("thumbnails for product %s failed: %r", product_id, exc)
+                failed.append(product_id)
+            else:
+                pending.append({
+                    "id": product_id, "image": _main_image(variants),
+                    "image_variants": {"original": original, "variants": variants},
+                })
+            done += 1
+            if len(pending) >= batch_size:
+                write()
+            ctx.progress(done, total, f"{done} of {total} products")
+        write()
+    finally:
+        pool.shutdown(cancel_futures=True)
+        # Also when cancelled or failed part way: committed rows are live.
+        if written:
+            cache.invalidate("products", *(f"product:{product_id}" for product_id in written))
+    return {"products": total - len(failed), "failed": failed[:100]}
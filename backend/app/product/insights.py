@@ -0,0 +1,181 @@
+"""Keyphrases of each product's positive and negative reviews.
+
+Comments are weighted with TF-IDF whose document frequencies come from
+every scored review in the catalog, so a phrase ranks high for a product
+when its reviews use it more than reviews in general do. A product's
+reviews are split by sentiment label (neutral ones are left out); the
+phrases of a side are the terms with the highest mean weight over its
+reviews, and its summary is the review closest to that mean.
+
+:func:`rebuild` fits the vectorizer on the whole corpus and computes every
+product in one pass: a single sparse product of a (product, side) by
+review indicator matrix with the review by term matrix. It saves the
+fitted vectorizer to INSIGHTS_VECTORIZER_PATH, and :func:`refresh` reuses
+it for one product when new reviews arrive, until the next rebuild.
+"""
+import os
+from datetime import datetime
+
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from config.config import settings
+from models.productmodels import ProductInsightsModel, ProductModel
+from models.reviewmodels import ReviewModel
+from .sentiment import NEGATIVE_THRESHOLD, POSITIVE_THRESHOLD
+
+SIDES = ("positive", "negative")
+
+# (path, mtime) -> vectorizer; the file only changes on a rebuild.
+_loaded = {}
+
+
+def make_vectorizer() -> TfidfVectorizer:
+    return TfidfVectorizer(
+        ngram_range=(1, 2),
+        stop_words="english",
+        min_df=2,
+        sublinear_tf=True,
+        max_features=settings.INSIGHTS_MAX_FEATURES,
+        dtype=np.float32,
+    )
+
+
+def _top_phrases(names, columns, weights, count: int) -> list:
+    """The ``count`` heaviest terms, skipping any that repeat or extend a heavier one."""
+    phrases, seen = [], []
+    for i in np.argsort(-weights, kind="stable")[:3 * count]:
+        words = set(names[columns[i]].split())
+        if any(words <= taken or taken <= words for taken in seen):
+            continue
+        seen.append(words)
+        phrases.append({"phrase": str(names[columns[i]]), "score": round(float(weights[i]), 4)})
+        if len(phrases) == count:
+            break
+    return phrases
+
+
+def extract(vectorizer: TfidfVectorizer, product_ids, comments, scores, terms: int = None) -> dict:
+    """Insights of every product in ``product_ids``, by product id.
+
+    The three sequences describe one scored review each, in any order.
+    """
+    terms = terms or settings.INSIGHTS_TERMS
+    product_ids = np.asarray(product_ids, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.float64)
+    counts = dict(zip(*np.unique(product_ids, return_counts=True)))
+    results = {
+        int(product_id): {"reviews": int(count), "positive": [], "negative": [],
+                          "positive_summary": None, "negative_summary": None}
+        for product_id, count in counts.items()
+    }
+
+    sides = np.where(scores >= POSITIVE_THRESHOLD, 0, np.where(scores <= NEGATIVE_THRESHOLD, 1, -1))
+    kept = np.flatnonzero(sides >= 0)
+    if not len(kept):
+        return results
+    weights = vectorizer.transform([comments[i] or "" for i in kept])
+
+    # Row g of `means` is the mean weight vector of group g's reviews.
+    groups, group_of = np.unique(
+        np.stack([product_ids[kept], sides[kept]], axis=1), axis=0, return_inverse=True
+    )
+    group_of = group_of.ravel()
+    sizes = np.bincount(group_of)
+    indicator = sparse.csr_matrix(
+        (1.0 / sizes[group_of], (group_of, np.arange(len(kept)))), shape=(len(groups), len(kept))
+    )
+    means = (indicator @ weights).tocsr()
+
+    # Each review's closeness to its group's mean; the closest one per group
+    # comes first in its run of `order`.
+    closeness = np.asarray(weights.multiply(means[group_of]).sum(axis=1)).ravel()
+    order = np.lexsort((-closeness, group_of))
+    closest = order[np.r_[0, np.flatnonzero(np.diff(group_of[order])) + 1]]
+
+    names = vectorizer.get_feature_names_out()
+    for g, (product_id, side) in enumerate(groups):
+        start, end = means.indptr[g], means.indptr[g + 1]
+        entry = results[int(product_id)]
+        entry[SIDES[side]] = _top_phrases(names, means.indices[start:end], means.data[start:end], terms)
+        entry[f"{SIDES[side]}_summary"] = comments[kept[closest[g]]]
+    return results
+
+
+def _scored_reviews(db: Session, product_id: int = None):
+    query = (
+        select(ReviewModel.product_id, ReviewModel.comment, ReviewModel.sentiment)
+        .join(ProductModel, ProductModel.id == ReviewModel.product_id)
+        .where(ReviewModel.sentiment.is_not(None))
+    )
+    if product_id is not None:
+        query = query.where(ReviewModel.product_id == product_id)
+    rows = db.execute(query).all()
+    return [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows]
+
+
+def _store(db: Session, results: dict, product_ids=None):
+    """Replace the rows of ``product_ids`` (every row when None) with ``results``."""
+    table = ProductInsightsModel
+    if product_ids is None:
+        db.execute(delete(table))
+    else:
+        db.execute(delete(table).where(table.product_id.in_(product_ids)))
+    now = datetime.utcnow()
+    if results:
+        db.execute(insert(table), [
+            {"product_id": product_id, "updated_at": now, **entry} for product_id, entry in results.items()
+        ])
+
+
+def save_vectorizer(vectorizer: TfidfVectorizer, path: str = None):
+    path = path or settings.INSIGHTS_VECTORIZER_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    joblib.dump(vectorizer, path + ".part")
+    os.replace(path + ".part", path)
+
+
+def load_vectorizer(path: str = None):
+    """The vectorizer of the last rebuild, or None if there was none."""
+    path = path or settings.INSIGHTS_VECTORIZER_PATH
+    try:
+        key = (path, os.stat(path).st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    if key not in _loaded:
+        _loaded.clear()
+        _loaded[key] = joblib.load(path)
+    return _loaded[key]
+
+
+def rebuild(db: Session) -> int:
+    """Refit on every scored review and replace all insights; the caller commits. Returns the product count."""
+    product_ids, comments, scores = _scored_reviews(db)
+    vectorizer = make_vectorizer()
+    try:
+        vectorizer.fit([comment or "" for comment in comments])
+    except ValueError:
+        # No term occurs in two reviews (or there are none): nothing to show yet.
+        _store(db, {})
+        return 0
+    results = extract(vectorizer, product_ids, comments, scores)
+    _store(db, results)
+    save_vectorizer(vectorizer)
+    return len(results)
+
+
+def refresh(db: Session, product_id: int) -> bool:
+    """Recompute one product with the last rebuild's vectorizer; the caller commits.
+
+    False when there has been no rebuild yet.
+    """
+    vectorizer = load_vectorizer()
+    if vectorizer is None:
+        return False
+    product_ids, comments, scores = _scored_reviews(db, product_id)
+    _store(db, extract(vectorizer, product_ids, comments, scores), [product_id])
+    return True
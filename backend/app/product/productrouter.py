@@ -1,26 +1,64 @@
-from fastapi import APIRouter, Depends, Response
+from typing import List
+
+from fastapi import APIRouter, Depends, File, Query, Response, UploadFile, status
 from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from dto.productschema import ProductSchema
+from dto.jobschema import JobOut
+from dto.productschema import ProductDetail, ProductOut, ProductSchema, ProductSummary, Recommendation, ReviewInsights
+from config.config import settings
 from config.database import get_db
+from config.replicas import get_async_read_db, get_read_db
+from config.token import get_staffUser
+from jobs.exports import start_export
+from models.usermodels import User
 import csv
 
-from .productservice import ProductService
+from .productservice import AsyncProductService, ProductService
 
 router = APIRouter(prefix="/product", tags=["Products"])
 
 
-@router.get("/")
-def getallProduct(db: Session = Depends(get_db)):
-
-    return ProductService.get_all_product(db=db)
-
-@router.get("/recommendation")
-def get_recommendation(db: Session = Depends(get_db)):
-    return ProductService.recommend_products(db);
+if settings.USE_ASYNC_DB == "True":
+    @router.get("/", response_model=List[ProductSummary])
+    async def getallProduct(db: AsyncSession = Depends(get_async_read_db)):
+        return await AsyncProductService.get_all_product(db=db)
+
+    @router.get("/sentiment-ranking", response_model=List[ProductSummary])
+    async def getSentimentRanking(
+        limit: int = Query(10, ge=1, le=100),
+        min_reviews: int = Query(1, ge=1),
+        worst: bool = False,
+        db: AsyncSession = Depends(get_async_read_db),
+    ):
+        """Products with the best (or with ``worst``, the worst) average review sentiment."""
+        return await AsyncProductService.sentiment_ranking(db=db, limit=limit, min_reviews=min_reviews, worst=worst)
+
+    @router.get("/recommendation", response_model=Recommendation)
+    async def get_recommendation(db: AsyncSession = Depends(get_async_read_db)):
+        return await AsyncProductService.recommend_products(db)
+else:
+    @router.get("/", response_model=List[ProductSummary])
+    def getallProduct(db: Session = Depends(get_read_db)):
+
+        return ProductService.get_all_product(db=db)
+
+    @router.get("/sentiment-ranking", response_model=List[ProductSummary])
+    def getSentimentRanking(
+        limit: int = Query(10, ge=1, le=100),
+        min_reviews: int = Query(1, ge=1),
+        worst: bool = False,
+        db: Session = Depends(get_read_db),
+    ):
+        """Products with the best (or with ``worst``, the worst) average review sentiment."""
+        return ProductService.sentiment_ranking(db=db, limit=limit, min_reviews=min_reviews, worst=worst)
+
+    @router.get("/recommendation", response_model=Recommendation)
+    def get_recommendation(db: Session = Depends(get_read_db)):
+        return ProductService.recommend_products(db);
 
 @router.get("/export-csv")
-def export_csv(db: Session = Depends(get_db)):
+def export_csv(db: Session = Depends(get_read_db)):
     products = ProductService.get_all_product(db=db)
    
     csv_data = "ID,Name,Description,Category,Price,Rating,CountInStock,Image\n"
@@ -36,24 +74,58 @@ def export_csv(db: Session = Depends(get_db)):
     return response
 
 
-@router.post("/")
+@router.post("/export", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+def exportProducts(format: str = "csv", db: Session = Depends(get_db), current_user: User = Depends(get_staffUser)):
+    """Start exporting every product; poll GET /api/jobs/{id}, then download the file."""
+    return start_export("products", format, db=db, user_id=current_user.id)
+
+
+@router.post("/{productid}/image", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+def uploadProductImage(
+    productid: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_staffUser),
+):
+    """Store the product's image; its resized copies are ready once the returned job has succeeded."""
+    # One byte over the limit is enough to reject it.
+    data = file.file.read(settings.IMAGE_MAX_BYTES + 1)
+    return ProductService.upload_image(productid=productid, data=data, db=db, user_id=current_user.id)
+
+
+@router.post("/", response_model=ProductOut)
 def createProduct(request: ProductSchema, db: Session = Depends(get_db)):
     return ProductService.create_product(request=request, db=db)
 
 
-@router.get("/{productid}")
-def showProduct(productid: int, db: Session = Depends(get_db)):
-    return ProductService.show_product(productid=productid, db=db)
+if settings.USE_ASYNC_DB == "True":
+    @router.get("/{productid}", response_model=ProductDetail)
+    async def showProduct(productid: int, db: AsyncSession = Depends(get_async_read_db)):
+        return await AsyncProductService.show_product(productid=productid, db=db)
+
+    @router.get("/{productid}/review-insights", response_model=ReviewInsights)
+    async def getReviewInsights(productid: int, db: AsyncSession = Depends(get_async_read_db)):
+        """Top keyphrases of the product's positive and negative reviews."""
+        return await AsyncProductService.review_insights(productid=productid, db=db)
+else:
+    @router.get("/{productid}", response_model=ProductDetail)
+    def showProduct(productid: int, db: Session = Depends(get_read_db)):
+        return ProductService.show_product(productid=productid, db=db)
+
+    @router.get("/{productid}/review-insights", response_model=ReviewInsights)
+    def getReviewInsights(productid: int, db: Session = Depends(get_read_db)):
+        """Top keyphrases of the product's positive and negative reviews."""
+        return ProductService.review_insights(productid=productid, db=db)
 
 
-@router.put("/{productid}")
+@router.put("/{productid}", response_model=ProductOut)
 def updateProduct(
     productid: int, request: ProductSchema, db: Session = Depends(get_db)
 ):
     return ProductService.update_product(productid=productid, request=request, db=db)
 
 
-@router.delete("/{productid}")
+@router.delete("/{productid}", response_model=str)
 def deleteProduct(productid: int, db: Session = Depends(get_db)):
     return ProductService.delete_product(productid=productid, db=db)
 
@@ -1,30 +1,66 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.session import Session
+from config import events
+from config.cache import cache
 from config.database import get_db
-from models.productmodels import ProductModel, ReviewModel
+from models.productmodels import ProductInsightsModel, ProductModel, ProductSentimentModel, ReviewModel
 from dto.productschema import ProductSchema
 from config.hashing import Hashing
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import linear_kernel
 from sklearn.neighbors import NearestNeighbors
 from sklearn.preprocessing import MinMaxScaler
-import nltk
 import pandas as pd
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from jobs.jobservice import JobService
+from monitoring.profiler import run_in_threadpool
+from .images import save_original
+from .sentiment import backend as sentiment_backend, label, scores, scores_async
+from .sentimentstats import SENTIMENT_COLUMNS, summary, summary_query
 
+PRODUCT_COLUMNS = (
+    ProductModel.id, ProductModel.name, ProductModel.image, ProductModel.category,
+    ProductModel.description, ProductModel.price, ProductModel.countInStock, ProductModel.rating,
+    ProductModel.image_variants,
+)
 
 
-nltk.download('vader_lexicon')
-sia = SentimentIntensityAnalyzer()
+def _with_sentiment(query):
+    return query.add_columns(*SENTIMENT_COLUMNS).outerjoin(
+        ProductSentimentModel, ProductSentimentModel.product_id == ProductModel.id
+    )
+
+
+def _sentiment_ranking_query(limit: int, min_reviews: int, worst: bool):
+    average = ProductSentimentModel.average
+    return (
+        select(*PRODUCT_COLUMNS, *SENTIMENT_COLUMNS)
+        .join(ProductSentimentModel, ProductSentimentModel.product_id == ProductModel.id)
+        .where(ProductSentimentModel.reviews >= min_reviews)
+        .order_by(average.asc() if worst else average.desc(), ProductSentimentModel.reviews.desc())
+        .limit(limit)
+    )
 
 
 class ProductService:
     @staticmethod
+    @cache.cached(ttl=30, stale=300, tags=("products",))
     def get_all_product(db: Session):
-        return db.query(ProductModel).order_by(ProductModel.rating.desc()).limit(10).all()
+        # Column rows rather than ORM instances: they outlive the session in the cache.
+        return db.execute(
+            _with_sentiment(select(*PRODUCT_COLUMNS)).order_by(ProductModel.rating.desc()).limit(10)
+        ).all()
 
     @staticmethod
+    @cache.cached(ttl=60, stale=600, tags=("products",))
+    def sentiment_ranking(db: Session, limit: int = 10, min_reviews: int = 1, worst: bool = False):
+        """Products by average review sentiment, read from the per-product aggregates."""
+        return db.execute(_sentiment_ranking_query(limit, min_reviews, worst)).all()
+
+    @staticmethod
+    @cache.cached(ttl=300, stale=3600, tags=("products",))
     def recommend_products(db: Session) -> dict:
         """
             Metode recommend_products yang telah disesuaikan menggunakan algoritma Collaborative Filtering with Nearest Neighbors untuk merekomendasikan produk kepada pengguna berdasarkan dua fitur: rating dan harga. Berikut adalah penjelasan cara kerjanya:
@@ -52,6 +88,10 @@ class ProductService:
         # Ambil semua produk dari database
         products = ProductService.get_all_product(db)
 
+        return ProductService._recommend(products)
+
+    @staticmethod
+    def _recommend(products) -> dict:
         # Verificar si hay productos
         if not products:
             return {
@@ -163,34 +203,40 @@ class ProductService:
         db.add(new_product)
         db.commit()
         db.refresh(new_product)
+        cache.invalidate("products")
 
         return new_product
 
     @staticmethod
+    @cache.cached(ttl=60, stale=600, tags=("product:{productid}",))
     def show_product(productid: int, db: Session) -> dict:
         show_p = db.query(ProductModel).filter(ProductModel.id == productid).first()
         review_id = db.query(ReviewModel).filter(ReviewModel.product_id == show_p.id).all()
-            
-        # Menggunakan analisis sentimen untuk setiap ulasan
+        sentiment = summary(db.execute(summary_query(show_p.id)).first())
+
+        return ProductService._product_detail(show_p, review_id, sentiment)
+
+    @staticmethod
+    def _unscored(review_id) -> list:
+        # Scores are stored when the review is created; only reviews scored by
+        # another backend (or before scores were stored) are scored again.
+        return [review for review in review_id if review.sentiment_model != sentiment_backend.name]
+
+    @staticmethod
+    def _product_detail(show_p, review_id, sentiment: dict, fresh_scores: dict = None) -> dict:
+        if fresh_scores is None:
+            stale = ProductService._unscored(review_id)
+            fresh_scores = dict(zip((review.id for review in stale), scores(review.comment for review in stale)))
+
         reviews_with_sentiment = []
         for review in review_id:
-            # Menggunakan NLTK untuk analisis sentimen
-            sentiment_scores = sia.polarity_scores(review.comment)
-            sentiment_score = sentiment_scores['compound']
-
-            # Menentukan label sentimen berdasarkan skor sentimen
-            if sentiment_score >= 0.05:
-                sentiment_label = 'POSITIVE'
-            elif sentiment_score <= -0.05:
-                sentiment_label = 'NEGATIVE'
-            else:
-                sentiment_label = 'NEUTRAL'
-            
+            sentiment_score = fresh_scores.get(review.id, review.sentiment)
+
             review_info = {
                 "id": review.id,
                 "rating": review.rating,
                 "comment": review.comment,
-                "sentiment": sentiment_label,
+                "sentiment": label(sentiment_score),
                 "sentiment_score": sentiment_score
             }
             reviews_with_sentiment.append(review_info)
@@ -201,30 +247,75 @@ class ProductService:
             "price": show_p.price,
             "rating": show_p.rating,
             "image": show_p.image,
+            "image_variants": show_p.image_variants,
             "name": show_p.name,
             "description": show_p.description,
             "countInStock": show_p.countInStock,
             "reviews": reviews_with_sentiment,  
+            **sentiment,
         }
 
         return response
 
 
+    @staticmethod
+    @cache.cached(ttl=300, stale=3600, tags=("insights", "insights:{productid}"))
+    def review_insights(productid: int, db: Session) -> dict:
+        """Stored keyphrases of the product's reviews; empty until the first refresh."""
+        if db.get(ProductModel, productid) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        return ProductService._insights(productid, db.get(ProductInsightsModel, productid))
+
+    @staticmethod
+    def _insights(productid: int, stored) -> dict:
+        if stored is None:
+            return {"product_id": productid}
+        return {
+            "product_id": productid,
+            "reviews": stored.reviews,
+            "positive": stored.positive or [],
+            "negative": stored.negative or [],
+            "positive_summary": stored.positive_summary,
+            "negative_summary": stored.negative_summary,
+            "updated_at": stored.updated_at,
+        }
+
     @staticmethod
     def update_product(productid: int, request: ProductSchema, db: Session):
         product_id = db.query(ProductModel).filter(ProductModel.id == productid).first()
 
         product_id.name = request.name
+        if request.image != product_id.image:
+            # Pointed elsewhere; the uploaded image no longer applies.
+            product_id.image_variants = None
         product_id.image = request.image
         product_id.category = request.category
         product_id.description = request.description
         product_id.price = request.price
+        stock_updated = product_id.countInStock != request.countInStock
         product_id.countInStock = request.countInStock
         product_id.rating = request.rating
         db.commit()
+        cache.invalidate("products", f"product:{productid}")
+        if stock_updated:
+            events.stock_changed(productid, request.countInStock)
 
         return product_id
     
+    @staticmethod
+    def upload_image(productid: int, data: bytes, db: Session, user_id: int = None):
+        """Store ``data`` as the product's image and queue its thumbnails; returns the job."""
+        product = db.get(ProductModel, productid)
+        if product is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        original = save_original(data)
+
+        product.image = original["url"]
+        product.image_variants = {"original": original, "variants": []}
+        db.commit()
+        cache.invalidate("products", f"product:{productid}")
+        return JobService.enqueue("products.thumbnails", db=db, payload={"product_id": productid}, user_id=user_id)
+
     @staticmethod
     def delete_product(productid: int, db: Session):
         del_product = (
@@ -233,6 +324,53 @@ class ProductService:
 
         db.delete(del_product)
         db.commit()
+        cache.invalidate("products", f"product:{productid}")
 
         return "Done"
 
+
+class AsyncProductService:
+    """Read paths of ProductService for the async engine (USE_ASYNC_DB).
+
+    Queries are awaited on the event loop; the pandas/scikit-learn work is
+    pushed to the threadpool and review sentiment is awaited from
+    :func:`product.sentiment.scores_async`, so neither blocks other requests.
+    """
+
+    @staticmethod
+    @cache.cached(ttl=30, stale=300, tags=("products",))
+    async def get_all_product(db: AsyncSession):
+        result = await db.execute(
+            _with_sentiment(select(*PRODUCT_COLUMNS)).order_by(ProductModel.rating.desc()).limit(10)
+        )
+        return result.all()
+
+    @staticmethod
+    @cache.cached(ttl=60, stale=600, tags=("products",))
+    async def sentiment_ranking(db: AsyncSession, limit: int = 10, min_reviews: int = 1, worst: bool = False):
+        return (await db.execute(_sentiment_ranking_query(limit, min_reviews, worst))).all()
+
+    @staticmethod
+    @cache.cached(ttl=300, stale=3600, tags=("products",))
+    async def recommend_products(db: AsyncSession) -> dict:
+        products = await AsyncProductService.get_all_product(db)
+        return await run_in_threadpool(ProductService._recommend, products)
+
+    @staticmethod
+    @cache.cached(ttl=60, stale=600, tags=("product:{productid}",))
+    async def show_product(productid: int, db: AsyncSession) -> dict:
+        show_p = await db.get(ProductModel, productid)
+        review_id = (
+            await db.scalars(select(ReviewModel).where(ReviewModel.product_id == show_p.id))
+        ).all()
+        sentiment = summary((await db.execute(summary_query(show_p.id))).first())
+        stale = ProductService._unscored(review_id)
+        fresh_scores = dict(zip((review.id for review in stale), await scores_async(review.comment for review in stale)))
+        return ProductService._product_detail(show_p, review_id, sentiment, fresh_scores)
+
+    @staticmethod
+    @cache.cached(ttl=300, stale=3600, tags=("insights", "insights:{productid}"))
+    async def review_insights(productid: int, db: AsyncSession) -> dict:
+        if await db.get(ProductModel, productid) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        return ProductService._insights(productid, await db.get(ProductInsightsModel, productid))
@@ -0,0 +1,331 @@
+"""Sentiment of review comments.
+
+Callers use :func:`scores` (or :func:`scores_async`) and :func:`label`;
+SENTIMENT_BACKEND picks what computes them:
+
+- ``vader``: NLTK's VADER lexicon. Fast, and weak on anything that is not
+  plain English product talk.
+- ``transformer``: a sequence classification model (SENTIMENT_MODEL, a
+  Hugging Face name or a local directory) run with PyTorch or
+  TensorFlow. With SENTIMENT_ONNX it runs the directory's ``model.onnx``
+  with onnxruntime instead, which SENTIMENT_QUANTIZE first quantizes
+  dynamically to int8.
+
+A forward pass costs about the same for one comment as for a dozen, so a
+batched backend sits behind a :class:`MicroBatcher`. Comments submitted
+by concurrent requests are collected for up to SENTIMENT_BATCH_WAIT_MS
+or SENTIMENT_BATCH_SIZE comments and scored in one pass. Scores are
+cached per process by a hash of the comment.
+
+Backends are built on import. Under ``server.py`` that import happens in
+the master before it forks, so every worker shares the lexicon or model
+weights copy-on-write instead of loading its own.
+"""
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from hashlib import blake2b
+
+import nltk
+import numpy as np
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+from config.config import settings
+from monitoring.profiler import run_in_threadpool, sampling
+from monitoring.prometheus import metrics
+
+# VADER's conventional cut-offs for :func:`label`; the per-product
+# aggregates count reviews with the same ones.
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+
+def _load_analyzer() -> SentimentIntensityAnalyzer:
+    # nltk.download checks the remote index on every call; only fetch when missing.
+    try:
+        nltk.data.find("sentiment/vader_lexicon.zip")
+    except LookupError:
+        nltk.download("vader_lexicon", quiet=True)
+    return SentimentIntensityAnalyzer()
+
+
+class SentimentBackend:
+    """Scores texts from -1 (negative) to 1 (positive)."""
+
+    name = ""
+    # True when scoring n texts at once is much cheaper than n single calls.
+    batched = False
+
+    def score_batch(self, texts) -> list:
+        raise NotImplementedError
+
+
+class VaderBackend(SentimentBackend):
+    name = "vader"
+
+    def __init__(self):
+        self.analyzer = _load_analyzer()
+
+    def score_batch(self, texts) -> list:
+        return [self.analyzer.polarity_scores(text)["compound"] for text in texts]
+
+
+class TransformerBackend(SentimentBackend):
+    """A transformers sequence classifier; the score is P(positive) - P(negative)."""
+
+    batched = True
+
+    def __init__(self, model: str, onnx: bool = False, quantize: bool = False,
+                 max_length: int = 256, threads: int = 0):
+        from transformers import AutoConfig, AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model)
+        self.max_length = max_length
+        id2label = AutoConfig.from_pretrained(model).id2label
+        labels = {int(index): name.lower() for index, name in id2label.items()}
+        self.positive = [index for index, name in labels.items() if name.startswith("pos")]
+        self.negative = [index for index, name in labels.items() if name.startswith("neg")]
+        if not self.positive or not self.negative:
+            raise ValueError(f"{model} has no positive/negative labels: {id2label}")
+
+        if onnx:
+            self._logits = self._onnx(model, quantize, threads)
+            self.name = f"{model}:onnx{'-int8' if quantize else ''}"
+        else:
+            self._logits = self._framework(model, threads)
+            self.name = model
+
+    def _framework(self, model: str, threads: int):
+        try:
+            import torch
+            from transformers import AutoModelForSequenceClassification
+        except ImportError:
+            # The Pipfile ships tensorflow-cpu.
+            from transformers import TFAutoModelForSequenceClassification
+
+            classifier = TFAutoModelForSequenceClassification.from_pretrained(model)
+            return lambda inputs: classifier(**inputs("tf")).logits.numpy()
+
+        if threads:
+            torch.set_num_threads(threads)
+        classifier = AutoModelForSequenceClassification.from_pretrained(model).eval()
+
+        def logits(inputs):
+            with torch.inference_mode():
+                return classifier(**inputs("pt")).logits.numpy()
+
+        return logits
+
+    def _onnx(self, model: str, quantize: bool, threads: int):
+        import onnxruntime
+
+        path = os.path.join(model, "model.onnx")
+        if quantize:
+            quantized = os.path.join(model, "model.int8.onnx")
+            if not os.path.exists(quantized):
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+
+                quantize_dynamic(path, quantized, weight_type=QuantType.QInt8)
+            path = quantized
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        names = {node.name for node in session.get_inputs()}
+
+        def logits(inputs):
+            feed = {name: value.astype(np.int64) for name, value in inputs("np").items() if name in names}
+            return session.run(None, feed)[0]
+
+        return logits
+
+    def score_batch(self, texts) -> list:
+        def inputs(tensor_type):
+            return self.tokenizer(list(texts), padding=True, truncation=True,
+                                  max_length=self.max_length, return_tensors=tensor_type)
+
+        logits = self._logits(inputs)
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probabilities = exp / exp.sum(axis=1, keepdims=True)
+        return (probabilities[:, self.positive].sum(axis=1) - probabilities[:, self.negative].sum(axis=1)).tolist()
+
+
+class MicroBatcher:
+    """Groups single texts from concurrent callers into batches for one backend.
+
+    A batch is scored once it holds ``max_batch`` texts or its first text
+    has waited ``max_wait_ms``, so a lone request pays at most that wait.
+    The scoring thread starts on first use, and again in a forked child,
+    since threads do not survive a fork.
+    """
+
+    def __init__(self, backend: SentimentBackend, max_batch: int, max_wait_ms: float):
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # The scoring thread, for profiling the requests waiting on it.
+        self.thread_ident = None
+
+    def submit(self, text: str) -> Future:
+        if self._pid != os.getpid():
+            self._start()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.SimpleQueue()
+            thread = threading.Thread(target=self._run, args=(self._queue,), name="sentiment-batcher", daemon=True)
+            thread.start()
+            self.thread_ident = thread.ident
+            self._pid = os.getpid()
+
+    def _run(self, pending: queue.SimpleQueue):
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._score(batch)
+
+    def _score(self, batch):
+        texts = [text for text, _ in batch]
+        start = time.perf_counter()
+        try:
+            results = self.backend.score_batch(texts)
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        metrics.inc("sentiment_inference_seconds_total", (), time.perf_counter() - start)
+        metrics.observe("sentiment_batch_size", (), len(batch))
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+class ScoreCache:
+    """LRU of scores by comment hash."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def get(self, key: bytes):
+        with self._lock:
+            score = self._entries.get(key)
+            if score is not None:
+                self._entries.move_to_end(key)
+            return score
+
+    def put(self, key: bytes, score: float):
+        with self._lock:
+            self._entries[key] = score
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def make_backend() -> SentimentBackend:
+    if settings.SENTIMENT_BACKEND == "transformer":
+        return TransformerBackend(
+            settings.SENTIMENT_MODEL,
+            onnx=settings.SENTIMENT_ONNX == "True",
+            quantize=settings.SENTIMENT_QUANTIZE == "True",
+            threads=settings.SENTIMENT_THREADS,
+        )
+    return VaderBackend()
+
+
+backend = make_backend()
+batcher = None
+if backend.batched:
+    batcher = MicroBatcher(backend, settings.SENTIMENT_BATCH_SIZE, settings.SENTIMENT_BATCH_WAIT_MS)
+score_cache = ScoreCache(settings.SENTIMENT_CACHE_SIZE)
+
+
+def _lookup(texts):
+    """Cached scores (None where missing) and the cache keys."""
+    keys = [ScoreCache.key(text or "") for text in texts]
+    cached = [score_cache.get(key) for key in keys]
+    hits = sum(score is not None for score in cached)
+    if hits:
+        metrics.inc("sentiment_texts_total", (("source", "cache"),), hits)
+    if hits < len(texts):
+        metrics.inc("sentiment_texts_total", (("source", "model"),), len(texts) - hits)
+    return cached, keys
+
+
+def scores(texts) -> list:
+    """Score each text, from the cache where possible. Blocks until the batch is scored."""
+    texts = list(texts)
+    results, keys = _lookup(texts)
+    missing = [i for i, score in enumerate(results) if score is None]
+    if not missing:
+        return results
+
+    if batcher is None:
+        computed = backend.score_batch([texts[i] or "" for i in missing])
+    else:
+        futures = [batcher.submit(texts[i] or "") for i in missing]
+        with sampling(batcher.thread_ident, MicroBatcher._score.__code__):
+            computed = [future.result() for future in futures]
+    for i, score in zip(missing, computed):
+        results[i] = score
+        score_cache.put(keys[i], score)
+    return results
+
+
+async def scores_async(texts) -> list:
+    """:func:`scores` without blocking the event loop while a batch is scored."""
+    texts = list(texts)
+    results, keys = _lookup(texts)
+    missing = [i for i, score in enumerate(results) if score is None]
+    if not missing:
+        return results
+
+    if batcher is None:
+        computed = await run_in_threadpool(backend.score_batch, [texts[i] or "" for i in missing])
+    else:
+        futures = [asyncio.wrap_future(batcher.submit(texts[i] or "")) for i in missing]
+        with sampling(batcher.thread_ident, MicroBatcher._score.__code__):
+            computed = await asyncio.gather(*futures)
+    for i, score in zip(missing, computed):
+        results[i] = score
+        score_cache.put(keys[i], score)
+    return results
+
+
+def label(score: float) -> str:
+    if score >= POSITIVE_THRESHOLD:
+        return "POSITIVE"
+    if score <= NEGATIVE_THRESHOLD:
+        return "NEGATIVE"
+    return "NEUTRAL"
+
+
+metrics.describe("sentiment_texts_total", "counter", "Comments scored, by source: cache or model.")
+metrics.describe("sentiment_inference_seconds_total", "counter", "Time spent in batched sentiment forward passes.")
+metrics.describe("sentiment_batch_size", "histogram", "Comments per batched sentiment forward pass.",
+                 buckets=(1, 2, 4, 8, 16, 32, 64, 128))
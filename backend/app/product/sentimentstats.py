@@ -0,0 +1,137 @@
+"""Per-product sentiment counts.
+
+``product_sentiment`` holds, per product, how many scored reviews are
+positive, neutral and negative and the sum and average of their scores.
+:func:`record` adds a review in the transaction that inserts it, so the
+counts never disagree with the reviews. :func:`rebuild` recomputes every
+row from the stored review scores in one statement, for after a backfill
+or anything else that rewrote scores. It locks the table first, so a
+review recorded meanwhile is either in its aggregates or counted after it.
+
+Product pages, the listing and the sentiment ranking read these rows, so
+no comment is scored to answer them.
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, case, delete, func, insert, literal, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.productmodels import ProductModel, ProductSentimentModel
+from models.reviewmodels import ReviewModel
+from .sentiment import NEGATIVE_THRESHOLD, POSITIVE_THRESHOLD, label
+
+
+def _share(count):
+    return count * 100.0 / func.nullif(ProductSentimentModel.reviews, 0)
+
+
+# Selected next to PRODUCT_COLUMNS, from an outer join on product_sentiment.
+SENTIMENT_COLUMNS = (
+    func.coalesce(ProductSentimentModel.reviews, 0).label("sentiment_reviews"),
+    ProductSentimentModel.average.label("sentiment_average"),
+    _share(ProductSentimentModel.positive).label("sentiment_positive_pct"),
+    _share(ProductSentimentModel.neutral).label("sentiment_neutral_pct"),
+    _share(ProductSentimentModel.negative).label("sentiment_negative_pct"),
+)
+
+EMPTY = {
+    "sentiment_reviews": 0,
+    "sentiment_average": None,
+    "sentiment_positive_pct": None,
+    "sentiment_neutral_pct": None,
+    "sentiment_negative_pct": None,
+}
+
+_COUNTERS = {
+    "POSITIVE": ProductSentimentModel.positive,
+    "NEUTRAL": ProductSentimentModel.neutral,
+    "NEGATIVE": ProductSentimentModel.negative,
+}
+
+
+def record(db: Session, product_id: int, score: float):
+    """Count one newly scored review of ``product_id``; the caller commits."""
+    table = ProductSentimentModel
+    counter = _COUNTERS[label(score)]
+    # Increments in SQL, so concurrent reviews of one product cannot lose
+    # each other's counts. SET expressions all see the old row.
+    increment = (
+        update(table)
+        .where(table.product_id == product_id)
+        .values({
+            table.reviews: table.reviews + 1,
+            counter: counter + 1,
+            table.score_sum: table.score_sum + score,
+            table.average: (table.score_sum + score) / (table.reviews + 1),
+            table.updated_at: datetime.utcnow(),
+        })
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(increment).rowcount:
+        return
+    try:
+        # The product's first scored review. The savepoint keeps the
+        # review if another transaction inserted the row first.
+        with db.begin_nested():
+            db.execute(insert(table).values({
+                table.product_id: product_id,
+                table.reviews: 1,
+                table.positive: 0,
+                table.neutral: 0,
+                table.negative: 0,
+                counter: 1,
+                table.score_sum: score,
+                table.average: score,
+                table.updated_at: datetime.utcnow(),
+            }))
+    except IntegrityError:
+        db.execute(increment)
+
+
+def summary_query(product_id: int):
+    """The ``SENTIMENT_COLUMNS`` of one product; pass the first row to :func:`summary`."""
+    return select(*SENTIMENT_COLUMNS).where(ProductSentimentModel.product_id == product_id)
+
+
+def summary(row) -> dict:
+    return row._asdict() if row else dict(EMPTY)
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every product's row from its reviews' stored scores; returns the row count."""
+    score = ReviewModel.sentiment
+
+    def count(condition):
+        return func.sum(case((condition, 1), else_=0))
+
+    reviews = func.count(score)
+    aggregates = (
+        select(
+            ReviewModel.product_id,
+            reviews,
+            count(score >= POSITIVE_THRESHOLD),
+            count((score > NEGATIVE_THRESHOLD) & (score < POSITIVE_THRESHOLD)),
+            count(score <= NEGATIVE_THRESHOLD),
+            func.sum(score),
+            func.avg(score),
+            literal(datetime.utcnow(), DateTime),
+        )
+        # Skips reviews of products that no longer exist.
+        .join(ProductModel, ProductModel.id == ReviewModel.product_id)
+        .where(score.is_not(None))
+        .group_by(ReviewModel.product_id)
+    )
+    table = ProductSentimentModel
+    if db.get_bind().dialect.name == "postgresql":
+        # Waits for reviews already counted to commit, so the aggregates
+        # include them, and holds off record() until this commits. Without
+        # it, a review could add to a row that is then deleted and rebuilt
+        # from reviews that do not include it. SQLite has one writer anyway.
+        db.execute(text(f"LOCK TABLE {table.__tablename__} IN EXCLUSIVE MODE"))
+    db.execute(delete(table))
+    db.execute(insert(table).from_select(
+        ["product_id", "reviews", "positive", "neutral", "negative", "score_sum", "average", "updated_at"],
+        aggregates,
+    ))
+    return db.execute(select(func.count()).select_from(table)).scalar()
@@ -0,0 +1,79 @@
+from sqlalchemy import func, or_, select, update
+
+from config.cache import cache
+from config.config import settings
+from jobs.jobservice import JobService
+from jobs.registry import LOW, JobContext, job
+from models.productmodels import ProductSentimentModel
+from models.reviewmodels import ReviewModel
+from product import insights
+from product.sentiment import backend
+from product.sentimentstats import rebuild
+
+
+@job("reviews.sentiment_backfill", priority=LOW, public=True)
+def sentiment_backfill(ctx: JobContext, batch_size: int = None):
+    """Score reviews that have no score from the current sentiment backend.
+
+    Run it after the migration that added the column, and after changing
+    SENTIMENT_BACKEND or SENTIMENT_MODEL. Until then, product pages score
+    those reviews on every cache miss. The per-product counts are rebuilt
+    at the end.
+    """
+    batch_size = batch_size or 8 * settings.SENTIMENT_BATCH_SIZE
+    pending = or_(ReviewModel.sentiment_model.is_(None), ReviewModel.sentiment_model != backend.name)
+    total = ctx.db.execute(select(func.count()).where(pending)).scalar()
+
+    done, last_id = 0, 0
+    while True:
+        rows = ctx.db.execute(
+            select(ReviewModel.id, ReviewModel.comment)
+            .where(pending, ReviewModel.id > last_id)
+            .order_by(ReviewModel.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        # Straight to the backend: a job already has its batch.
+        values = backend.score_batch([comment or "" for _, comment in rows])
+        ctx.db.execute(update(ReviewModel), [
+            {"id": review_id, "sentiment": score, "sentiment_model": backend.name}
+            for (review_id, _), score in zip(rows, values)
+        ])
+        ctx.db.commit()
+        last_id = rows[-1].id
+        done += len(rows)
+        ctx.progress(done, total, f"{done} of {total} reviews")
+
+    # Labels may have changed, and with them which side a review counts for.
+    JobService.enqueue("reviews.insights_rebuild", db=ctx.db, key="reviews.insights_rebuild")
+    return {"scored": done, "model": backend.name, "products": rebuild_sentiment(ctx)["products"]}
+
+
+@job("products.sentiment_rebuild", priority=LOW, public=True)
+def rebuild_sentiment(ctx: JobContext):
+    """Recompute the per-product sentiment counts from the stored review scores."""
+    products = rebuild(ctx.db)
+    ctx.db.commit()
+    product_ids = ctx.db.execute(select(ProductSentimentModel.product_id)).scalars()
+    cache.invalidate("products", *(f"product:{product_id}" for product_id in product_ids))
+    return {"products": products}
+
+
+@job("reviews.insights_refresh", priority=LOW)
+def refresh_insights(ctx: JobContext, product_id: int):
+    """Recompute one product's review keyphrases; queued by new reviews."""
+    if not insights.refresh(ctx.db, product_id):
+        return rebuild_insights(ctx)
+    ctx.db.commit()
+    cache.invalidate(f"insights:{product_id}")
+    return {"products": 1}
+
+
+@job("reviews.insights_rebuild", priority=LOW, public=True, daily_at=settings.INSIGHTS_REBUILD_AT)
+def rebuild_insights(ctx: JobContext):
+    """Refit TF-IDF on every scored review and recompute all products' keyphrases."""
+    products = insights.rebuild(ctx.db)
+    ctx.db.commit()
+    cache.invalidate("insights")
+    return {"products": products}
@@ -1,20 +1,31 @@
+from typing import List
+
 from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from config.config import settings
 from config.database import get_db
+from config.replicas import get_async_read_db, get_read_db
+from config.responses import rows_response
 from models.usermodels import User
-from dto.reviewschema import ReviewCreate
+from dto.reviewschema import ReviewCreate, ReviewOut
 from config.token import get_currentUser
-from .reviewservice import ReviewService
+from .reviewservice import AsyncReviewService, ReviewService
 
 router = APIRouter(prefix="/review", tags=["Review"])
 
 
-@router.get("/")
-def getAllReview(db: Session = Depends(get_db)):
-    return ReviewService.get_all(db=db)
+if settings.USE_ASYNC_DB == "True":
+    @router.get("/", response_model=List[ReviewOut])
+    async def getAllReview(db: AsyncSession = Depends(get_async_read_db)):
+        return rows_response(await AsyncReviewService.get_all(db=db))
+else:
+    @router.get("/", response_model=List[ReviewOut])
+    def getAllReview(db: Session = Depends(get_read_db)):
+        return rows_response(ReviewService.get_all(db=db))
 
 
-@router.post("/create/{productid}")
+@router.post("/create/{productid}", response_model=ReviewOut)
 def createReview(
     productid: int,
     request: ReviewCreate,
@@ -28,7 +39,7 @@ def createReview(
     )
 
 
-@router.post("/coba")
+@router.post("/coba", response_model=ReviewCreate)
 def cobaReview(request: ReviewCreate):
     return request
 
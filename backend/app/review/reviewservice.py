@@ -1,18 +1,34 @@
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
 from models.productmodels import ProductModel
 
 from config.token import get_currentUser
 from models.reviewmodels import ReviewModel
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.usermodels import User
+from config.cache import cache
 from config.database import get_db
 from sqlalchemy.orm import Session
 from dto.reviewschema import ReviewCreate
+from product.sentiment import backend as sentiment_backend, scores
+from product.sentimentstats import record as record_sentiment
+from jobs.jobservice import JobService
+from config.config import settings
+from datetime import datetime, timedelta
+import logging
+
+logger = logging.getLogger("ecom.reviews")
+
+REVIEW_COLUMNS = (
+    ReviewModel.id, ReviewModel.name, ReviewModel.comment, ReviewModel.rating,
+    ReviewModel.user_id, ReviewModel.product_id, ReviewModel.created_at, ReviewModel.updated_at,
+)
 
 
 class ReviewService:
+    @cache.cached(ttl=30, stale=120, tags=("reviews",))
     def get_all(db: Session):
-        return db.query(ReviewModel).all()
+        return db.execute(select(*REVIEW_COLUMNS)).all()
 
     def create_review(
         request: ReviewCreate,
@@ -20,6 +36,10 @@ class ReviewService:
         db: Session = Depends(get_db),
         current_user: User = Depends(get_currentUser),
     ):
+        # Scored before the transaction starts; with a transformer backend
+        # this waits for a micro-batch.
+        sentiment, = scores([request.comment])
+
         try:
             # Ambil produk yang akan direview
             product = db.query(ProductModel).filter(ProductModel.id == productId).first()
@@ -48,12 +68,15 @@ class ReviewService:
                 user_id=current_user.id,
                 rating=request.rating,
                 comment=request.comment,
+                sentiment=sentiment,
+                sentiment_model=sentiment_backend.name,
                 product_id=productId
             )
 
             # Tambahkan ulasan ke database
             db.add(review_new)
-            db.commit()
+            db.flush()
+            record_sentiment(db, productId, sentiment)
 
             # Hitung total rating dan jumlah ulasan saat ini untuk produk
             total_rating, total_reviews = db.query(
@@ -79,10 +102,35 @@ class ReviewService:
 
             # Perbarui rating produk di database dengan rating rata-rata yang baru
             product.rating = int(new_average_rating)
+            # One commit: the review, the sentiment counts and the rating.
             db.commit()
+        except HTTPException:
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()  # Batalkan transaksi jika terjadi kesalahan
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Terjadi kesalahan saat menambahkan ulasan.",
             )
+
+        cache.invalidate("reviews", "products", f"product:{productId}")
+        try:
+            # Reviews arriving within the delay share one refresh.
+            JobService.enqueue(
+                "reviews.insights_refresh", db=db, payload={"product_id": productId},
+                key=f"reviews.insights_refresh:{productId}",
+                run_at=datetime.utcnow() + timedelta(seconds=settings.INSIGHTS_REFRESH_DELAY_SECONDS),
+            )
+        except Exception:
+            # The review is saved; its insights catch up at the daily rebuild.
+            db.rollback()
+            logger.exception("queueing the insights refresh of product %d failed", productId)
+
+        return review_new
+
+
+class AsyncReviewService:
+    @cache.cached(ttl=30, stale=120, tags=("reviews",))
+    async def get_all(db: AsyncSession):
+        return (await db.execute(select(*REVIEW_COLUMNS))).all()
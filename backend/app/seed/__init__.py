@@ -0,0 +1,11 @@
+"""Deterministic synthetic data for development, load tests and benchmarks.
+
+Run from ``backend/app`` against the configured database::
+
+    python -m seed --create-tables --scale 1
+    python -m seed --reset --scale 90 --jobs 8    # about 10M rows
+"""
+
+# Row counts at --scale 1. Items average 2.5 per order and every order has
+# one shipping row, so scale 1 is about 110k rows and scale 90 about 10M.
+BASE_COUNTS = {"users": 2_000, "products": 1_000, "reviews": 20_000, "orders": 20_000}
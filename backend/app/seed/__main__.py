@@ -0,0 +1,112 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from datetime import date
+
+from config.database import Base, engine
+from config.hashing import Hashing
+from models import jobmodels, ordermodels, productmodels, reviewmodels, revokedtokenmodels, usermodels
+
+from . import BASE_COUNTS
+from .generate import GENERATORS, PASSWORD, Plan
+from .writers import PostgresWriter, SQLiteWriter
+
+
+def make_writer():
+    url = engine.url
+    if url.get_backend_name() == "sqlite":
+        return SQLiteWriter(url.database)
+    return PostgresWriter(url.set(drivername="postgresql").render_as_string(hide_password=False))
+
+
+_plan = None
+_writer = None
+
+
+def _init_worker(plan: Plan, parallel_writes: bool):
+    global _plan, _writer
+    _plan = plan
+    # A connection inherited through fork must not be reused.
+    engine.dispose(close=False)
+    _writer = make_writer() if parallel_writes else None
+
+
+def _run(task):
+    table, start, stop = task
+    chunk = GENERATORS[table](_plan, start, stop)
+    if _writer is None:
+        return chunk
+    _writer.write(chunk)
+    return {name: len(rows) for name, rows in chunk.items()}
+
+
+def tasks(table: str, total: int, chunk_size: int):
+    return [(table, start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m seed", description="Fill the database with synthetic data.")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for the default row counts")
+    for name, count in BASE_COUNTS.items():
+        parser.add_argument(f"--{name}", type=int, help=f"override the number of {name} ({count} x scale)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date(2026, 1, 1),
+                        help="last day of order and review history (fixed, to keep output deterministic)")
+    parser.add_argument("--days", type=int, default=730, help="length of the history")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=20_000)
+    parser.add_argument("--reset", action="store_true", help="delete existing rows first")
+    parser.add_argument("--create-tables", action="store_true",
+                        help="create missing tables with create_all instead of requiring migrations")
+    args = parser.parse_args()
+
+    counts = {
+        name: getattr(args, name) if getattr(args, name) is not None else max(1, int(count * args.scale))
+        for name, count in BASE_COUNTS.items()
+    }
+
+    if args.create_tables:
+        Base.metadata.create_all(bind=engine)
+
+    writer = make_writer()
+    if args.reset:
+        writer.clear()
+    elif any(writer.count(table) for table in ("users", "product", "review", "order")):
+        sys.exit("The database already has rows; pass --reset to replace them.")
+
+    started = time.perf_counter()
+    plan = Plan(
+        args.seed, counts["users"], counts["products"], counts["reviews"], counts["orders"],
+        end=args.end_date, days=args.days, password_hash=Hashing.bcrypt(PASSWORD),
+    )
+    print(f"planned {plan.users} users, {plan.products} products, {plan.reviews} reviews, "
+          f"{plan.orders} orders, {plan.items} order items in {time.perf_counter() - started:.1f}s")
+
+    # Reviews reference users and products, so those go in first.
+    phases = [
+        tasks("users", plan.users, args.chunk_size) + tasks("product", plan.products, args.chunk_size),
+        tasks("review", plan.reviews, args.chunk_size) + tasks("order", plan.orders, args.chunk_size),
+    ]
+    totals = {}
+    with multiprocessing.Pool(args.jobs, initializer=_init_worker, initargs=(plan, writer.parallel)) as pool:
+        for phase in phases:
+            for result in pool.imap_unordered(_run, phase):
+                if not writer.parallel:
+                    writer.write(result)
+                    result = {name: len(rows) for name, rows in result.items()}
+                for table, count in result.items():
+                    totals[table] = totals.get(table, 0) + count
+    writer.finish()
+
+    elapsed = time.perf_counter() - started
+    rows = sum(totals.values())
+    print(", ".join(f"{count} {table}" for table, count in totals.items()))
+    print(f"{rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    print(f"every user's password is {PASSWORD!r}; admin@example.com is staff")
+    print("reviews are unscored; run the reviews.sentiment_backfill job to score them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Word lists the generators draw from."""
+
+CATEGORIES = [
+    "Electronics", "Accessories", "Phone", "TV", "Monitor", "Audio", "Gaming",
+    "Home", "Kitchen", "Sports", "Books", "Toys", "Beauty", "Fashion", "Garden",
+]
+
+ADJECTIVES = [
+    "Wireless", "Portable", "Smart", "Compact", "Ergonomic", "Premium", "Ultra",
+    "Pro", "Classic", "Foldable", "Waterproof", "Rechargeable", "Slim", "Heavy-Duty",
+    "Mini", "Digital", "Adjustable", "Noise-Cancelling", "Eco", "Deluxe",
+]
+
+NOUNS = {
+    "Electronics": ["Power Bank", "Smartwatch", "Tablet", "E-Reader", "Drone", "Webcam"],
+    "Accessories": ["Phone Case", "Laptop Stand", "USB-C Hub", "Charging Cable", "Screen Protector"],
+    "Phone": ["Smartphone", "Flip Phone", "Rugged Phone"],
+    "TV": ["LED TV", "OLED TV", "Projector", "Streaming Stick"],
+    "Monitor": ["Monitor", "Curved Monitor", "Portable Monitor"],
+    "Audio": ["Headphones", "Earbuds", "Bluetooth Speaker", "Soundbar", "Microphone"],
+    "Gaming": ["Gaming Mouse", "Mechanical Keyboard", "Controller", "Gaming Headset", "Mouse Pad"],
+    "Home": ["Desk Lamp", "Air Purifier", "Humidifier", "Robot Vacuum", "Smart Plug"],
+    "Kitchen": ["Blender", "Air Fryer", "Kettle", "Coffee Grinder", "Rice Cooker"],
+    "Sports": ["Yoga Mat", "Dumbbell Set", "Water Bottle", "Fitness Tracker", "Jump Rope"],
+    "Books": ["Cookbook", "Novel", "Travel Guide", "Notebook", "Planner"],
+    "Toys": ["Building Blocks", "Puzzle", "RC Car", "Board Game", "Plush Toy"],
+    "Beauty": ["Hair Dryer", "Trimmer", "Face Cleanser", "Perfume", "Makeup Brush Set"],
+    "Fashion": ["Backpack", "Sneakers", "Wallet", "Sunglasses", "Jacket"],
+    "Garden": ["Garden Hose", "Pruning Shears", "Planter", "Solar Light", "Sprinkler"],
+}
+
+BRANDS = [
+    "Acme", "Zenith", "Nova", "Orion", "Vertex", "Lumen", "Pixel", "Halo", "Aero",
+    "Kite", "Summit", "Atlas", "Echo", "Ion", "Quartz", "Nimbus",
+]
+
+FIRST_NAMES = [
+    "Aisha", "Ben", "Chen", "Daniel", "Elena", "Farah", "George", "Hana", "Ivan", "Jia",
+    "Kumar", "Laura", "Mohd", "Nur", "Omar", "Priya", "Quinn", "Rina", "Sam", "Tan",
+    "Umar", "Vera", "Wei", "Xin", "Yusuf", "Zara", "Ahmad", "Siti", "John", "Maria",
+]
+
+LAST_NAMES = [
+    "Abdullah", "Brown", "Chong", "Das", "Evans", "Fernandez", "Goh", "Hassan", "Ibrahim",
+    "Johnson", "Kaur", "Lim", "Muller", "Ng", "Osman", "Patel", "Rahman", "Smith",
+    "Tan", "Wong", "Yamamoto", "Zhang", "Lee", "Garcia", "Ismail",
+]
+
+# (city, country, postal code range)
+CITIES = [
+    ("Kuala Lumpur", "Malaysia", (50000, 60000)),
+    ("Penang", "Malaysia", (10000, 14400)),
+    ("Johor Bahru", "Malaysia", (79000, 81900)),
+    ("Singapore", "Singapore", (10000, 83000)),
+    ("Jakarta", "Indonesia", (10110, 14540)),
+    ("Bangkok", "Thailand", (10100, 10900)),
+    ("Manila", "Philippines", (1000, 1800)),
+    ("New York", "United States", (10001, 10292)),
+    ("London", "United Kingdom", (10000, 20000)),
+    ("Sydney", "Australia", (2000, 2234)),
+]
+
+STREETS = ["Jalan Ampang", "Main Street", "Orchard Road", "Jalan Bukit Bintang", "Oak Avenue",
+           "Pine Road", "Elm Street", "Jalan Tun Razak", "High Street", "Sukhumvit Road"]
+
+# Review sentences by star rating; a comment is an opener, a detail and a closer.
+REVIEW_OPENERS = {
+    1: ["Terrible purchase.", "Completely disappointed.", "Do not buy this.", "Waste of money."],
+    2: ["Not great.", "Pretty underwhelming.", "Expected more for the price.", "Mediocre at best."],
+    3: ["It's okay.", "Average product.", "Does the job, nothing more.", "Mixed feelings."],
+    4: ["Really good.", "Happy with this purchase.", "Solid product.", "Works well."],
+    5: ["Absolutely love it!", "Exceeded my expectations!", "Fantastic quality!", "Best purchase this year!"],
+}
+
+REVIEW_DETAILS = {
+    1: ["It stopped working after two days", "the build quality is awful", "it arrived broken",
+        "customer support never replied"],
+    2: ["the battery life is poor", "it feels cheap", "delivery took far too long",
+        "the instructions were confusing"],
+    3: ["the quality is fine for the price", "setup took a while", "it is a bit smaller than expected",
+        "shipping was slow but it works"],
+    4: ["the build quality is good", "it arrived quickly", "setup was easy",
+        "it does exactly what I need"],
+    5: ["the quality is outstanding", "it arrived the next day", "it is worth every penny",
+        "my whole family loves it"],
+}
+
+REVIEW_CLOSERS = {
+    1: ["Returning it.", "Avoid.", "Never again.", "Zero stars if I could."],
+    2: ["Would not buy again.", "Look elsewhere.", "Disappointing overall.", ""],
+    3: ["Might buy again on sale.", "It's fine.", "", "Could be better."],
+    4: ["Would recommend.", "Good value.", "", "Would buy again."],
+    5: ["Highly recommend!", "Five stars!", "Will definitely buy again.", "Perfect!"],
+}
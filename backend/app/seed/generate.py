@@ -0,0 +1,265 @@
+"""Row generators.
+
+Every chunk draws from its own generator, keyed by (seed, table, chunk
+start). Ids are assigned from fixed offsets, so the output is the same
+whatever the number of processes or the order in which chunks finish.
+"""
+import hashlib
+from datetime import date
+
+import numpy as np
+
+from . import data
+
+TABLE_KEYS = {"users": 1, "product": 2, "review": 3, "order": 4, "plan": 5}
+
+# Columns per table, in the order the generators emit them.
+COLUMNS = {
+    "users": ["id", "name", "email", "password", "is_staff", "is_active"],
+    "product": ["id", "name", "image", "category", "description", "price", "countInStock", "rating"],
+    "review": ["id", "name", "comment", "rating", "user_id", "product_id", "created_at", "updated_at"],
+    "order": ["id", "name", "email", "orderAmount", "transactionId", "isDelivered", "user_id",
+              "created_at", "updated_at"],
+    "orderitems": ["id", "name", "quantity", "price", "order_id"],
+    "shipping": ["id", "address", "postalCode", "country", "city", "order_id"],
+}
+
+# Shared by every seeded user; hashing millions of passwords is not the point.
+PASSWORD = "password"
+
+
+def rng_for(seed: int, table: str, start: int) -> np.random.Generator:
+    return np.random.default_rng([seed, TABLE_KEYS[table], start])
+
+
+def zipf_cdf(n: int, exponent: float) -> np.ndarray:
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def user_names(ids: np.ndarray) -> list:
+    # A multiplicative hash spreads consecutive ids over the name lists.
+    mixed = (ids.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(2**32)
+    first = mixed % np.uint64(len(data.FIRST_NAMES))
+    last = (mixed // np.uint64(len(data.FIRST_NAMES))) % np.uint64(len(data.LAST_NAMES))
+    return [f"{data.FIRST_NAMES[f]} {data.LAST_NAMES[l]}" for f, l in zip(first.tolist(), last.tolist())]
+
+
+def user_emails(ids: np.ndarray) -> list:
+    return ["admin@example.com" if i == 1 else f"user{i}@example.com" for i in ids.tolist()]
+
+
+def timestamps(days: np.ndarray, seconds: np.ndarray, end: date, span: int) -> list:
+    base = np.datetime64(end, "s") - np.timedelta64(span, "D")
+    moments = base + days.astype("timedelta64[D]") + seconds.astype("timedelta64[s]")
+    return [f"{value.replace('T', ' ')}.000000" for value in np.datetime_as_string(moments, unit="s")]
+
+
+class Plan:
+    """Everything chunks share: counts, popularity curves, the product
+    catalogue and the (user, product) pairs that get a review."""
+
+    def __init__(self, seed: int, users: int, products: int, reviews: int, orders: int,
+                 end: date, days: int, password_hash: str):
+        self.seed = seed
+        self.users = users
+        self.products = products
+        self.orders = orders
+        self.end = end
+        self.days = days
+        self.password_hash = password_hash
+
+        rng = rng_for(seed, "plan", 0)
+
+        # Zipfian popularity; the permutations decouple rank from id.
+        self.product_rank = rng.permutation(products) + 1
+        self.product_cdf = zipf_cdf(products, 1.1)
+        self.user_rank = rng.permutation(users) + 1
+        self.user_cdf = zipf_cdf(users, 0.9)
+
+        # Latent quality drives both the listed rating and review stars.
+        self.product_quality = np.clip(rng.normal(3.8, 0.8, products), 1, 5)
+        self.product_price = np.round(rng.lognormal(3.6, 0.9, products)).astype(np.int64) + 1
+        self.product_category = rng.integers(0, len(data.CATEGORIES), products)
+        self.product_brand = rng.integers(0, len(data.BRANDS), products)
+        self.product_adjective = rng.integers(0, len(data.ADJECTIVES), products)
+        self.product_noun = rng.integers(0, 1 << 16, products)
+        self.product_names = [self._product_name(i) for i in range(products)]
+
+        self.review_users, self.review_products = self._review_pairs(rng, min(reviews, users * products))
+        self.reviews = len(self.review_users)
+
+        self.day_cdf = self._seasonal_day_cdf()
+        hours = np.array([1, 0.5, 0.3, 0.2, 0.2, 0.4, 1, 2, 3, 4, 4.5, 5,
+                          5.5, 5, 4.5, 4.5, 5, 5.5, 6, 7, 7.5, 6.5, 4, 2])
+        self.hour_cdf = np.cumsum(hours) / hours.sum()
+
+        # Items per order, fixed up front so every order chunk knows its item ids.
+        self.items_per_order = np.minimum(rng.geometric(0.4, orders), 12).astype(np.int64)
+        self.item_offsets = np.concatenate([[0], np.cumsum(self.items_per_order)])
+
+    @property
+    def items(self) -> int:
+        return int(self.item_offsets[-1])
+
+    def _product_name(self, index: int) -> str:
+        category = data.CATEGORIES[self.product_category[index]]
+        nouns = data.NOUNS[category]
+        return (f"{data.BRANDS[self.product_brand[index]]} {data.ADJECTIVES[self.product_adjective[index]]} "
+                f"{nouns[self.product_noun[index] % len(nouns)]} {chr(65 + index % 26)}{index % 1000}")
+
+    def _review_pairs(self, rng, count: int):
+        """Distinct (user, product) pairs, heavy on active users and popular
+        products, as the review table's unique constraint requires."""
+        keys = np.empty(0, dtype=np.int64)
+        while len(keys) < count:
+            before = len(keys)
+            batch = max(int((count - len(keys)) * 1.3), 1024)
+            users = self.pick_users(rng, batch)
+            products = self.pick_products(rng, batch)
+            keys = np.concatenate([keys, users * (self.products + 1) + products])
+            _, first = np.unique(keys, return_index=True)
+            keys = keys[np.sort(first)]
+            if len(keys) == before:
+                # The popularity curves cannot reach any new pair.
+                break
+        keys = keys[:count]
+        return keys // (self.products + 1), keys % (self.products + 1)
+
+    def _seasonal_day_cdf(self) -> np.ndarray:
+        t = np.arange(self.days)
+        dates = np.datetime64(self.end, "D") - np.timedelta64(self.days, "D") + t
+        weekday = (dates.astype(np.int64) + 3) % 7  # 0 = Monday
+        day_of_year = (dates - dates.astype("datetime64[Y]")).astype(np.int64)
+
+        trend = 1 + 1.5 * t / max(self.days, 1)
+        weekly = np.where(weekday >= 5, 1.3, 1.0)
+        yearly = (
+            1
+            + 2.5 * np.exp(-(((day_of_year - 314) / 2.0) ** 2))   # 11.11
+            + 1.5 * np.exp(-(((day_of_year - 330) / 4.0) ** 2))   # Black Friday
+            + 0.8 * np.exp(-(((day_of_year - 350) / 10.0) ** 2))  # December
+            + 0.5 * np.exp(-(((day_of_year - 186) / 3.0) ** 2))   # mid-year sale
+        )
+        weights = trend * weekly * yearly
+        cdf = np.cumsum(weights)
+        return cdf / cdf[-1]
+
+    def pick_products(self, rng, count: int) -> np.ndarray:
+        return self.product_rank[np.searchsorted(self.product_cdf, rng.random(count))]
+
+    def pick_users(self, rng, count: int) -> np.ndarray:
+        return self.user_rank[np.searchsorted(self.user_cdf, rng.random(count))]
+
+    def pick_moments(self, rng, count: int):
+        days = np.searchsorted(self.day_cdf, rng.random(count))
+        hours = np.searchsorted(self.hour_cdf, rng.random(count))
+        seconds = hours * 3600 + rng.integers(0, 3600, count)
+        return days, seconds
+
+
+def users_chunk(plan: Plan, start: int, stop: int) -> dict:
+    rng = rng_for(plan.seed, "users", start)
+    ids = np.arange(start + 1, stop + 1)
+    active = rng.random(len(ids)) < 0.98
+    rows = zip(
+        ids.tolist(), user_names(ids), user_emails(ids), [plan.password_hash] * len(ids),
+        (ids == 1).tolist(), (active | (ids == 1)).tolist(),
+    )
+    return {"users": list(rows)}
+
+
+def product_chunk(plan: Plan, start: int, stop: int) -> dict:
+    rng = rng_for(plan.seed, "product", start)
+    index = np.arange(start, stop)
+    rows = []
+    stock = rng.integers(0, 500, len(index))
+    for i, count in zip(index.tolist(), stock.tolist()):
+        category = data.CATEGORIES[plan.product_category[i]]
+        name = plan.product_names[i]
+        description = (f"{name} in {category.lower()} by {data.BRANDS[plan.product_brand[i]]}. "
+                       f"{data.ADJECTIVES[plan.product_adjective[i]]} design, backed by a one-year warranty.")
+        rows.append((
+            i + 1, name, f"https://example.com/images/{i + 1}.jpg", category, description[:255],
+            int(plan.product_price[i]), count, int(round(plan.product_quality[i])),
+        ))
+    return {"product": rows}
+
+
+def review_comments(rng, ratings: np.ndarray) -> list:
+    picks = rng.integers(0, 4, (len(ratings), 3)).tolist()
+    comments = []
+    for rating, (opener, detail, closer) in zip(ratings.tolist(), picks):
+        text = (f"{data.REVIEW_OPENERS[rating][opener]} "
+                f"{data.REVIEW_DETAILS[rating][detail].capitalize()}. {data.REVIEW_CLOSERS[rating][closer]}")
+        comments.append(text.strip())
+    return comments
+
+
+def review_chunk(plan: Plan, start: int, stop: int) -> dict:
+    rng = rng_for(plan.seed, "review", start)
+    users = plan.review_users[start:stop]
+    products = plan.review_products[start:stop]
+    quality = plan.product_quality[products - 1]
+    ratings = np.clip(np.rint(rng.normal(quality, 1.1)), 1, 5).astype(np.int64)
+    days, seconds = plan.pick_moments(rng, len(users))
+    created = timestamps(days, seconds, plan.end, plan.days)
+    rows = zip(
+        range(start + 1, stop + 1), user_names(users), review_comments(rng, ratings), ratings.tolist(),
+        users.tolist(), products.tolist(), created, created,
+    )
+    return {"review": list(rows)}
+
+
+def order_chunk(plan: Plan, start: int, stop: int) -> dict:
+    """Orders with their items and shipping address."""
+    rng = rng_for(plan.seed, "order", start)
+    count = stop - start
+    order_ids = np.arange(start + 1, stop + 1)
+    users = plan.pick_users(rng, count)
+    days, seconds = plan.pick_moments(rng, count)
+    created = timestamps(days, seconds, plan.end, plan.days)
+    delivered = (days < plan.days - 5) & (rng.random(count) < 0.97)
+
+    per_order = plan.items_per_order[start:stop]
+    first_item = int(plan.item_offsets[start])
+    item_count = int(per_order.sum())
+    item_orders = np.repeat(order_ids, per_order)
+    item_products = plan.pick_products(rng, item_count)
+    quantities = np.minimum(rng.geometric(0.7, item_count), 10)
+    prices = plan.product_price[item_products - 1]
+    amounts = np.add.reduceat(quantities * prices, np.concatenate([[0], np.cumsum(per_order)[:-1]]))
+
+    transaction_ids = [
+        hashlib.md5(f"{plan.seed}-{order_id}".encode()).hexdigest() for order_id in order_ids.tolist()
+    ]
+    orders = zip(
+        order_ids.tolist(), user_names(users), user_emails(users), amounts.tolist(), transaction_ids,
+        delivered.tolist(), users.tolist(), created, created,
+    )
+    items = zip(
+        range(first_item + 1, first_item + item_count + 1),
+        [plan.product_names[p - 1] for p in item_products.tolist()],
+        quantities.tolist(), prices.tolist(), item_orders.tolist(),
+    )
+
+    cities = rng.integers(0, len(data.CITIES), count).tolist()
+    streets = rng.integers(0, len(data.STREETS), count).tolist()
+    numbers = rng.integers(1, 400, count).tolist()
+    postal = rng.random(count).tolist()
+    shipping = []
+    for order_id, city, street, number, p in zip(order_ids.tolist(), cities, streets, numbers, postal):
+        name, country, (low, high) = data.CITIES[city]
+        shipping.append((order_id, f"{number} {data.STREETS[street]}", low + int(p * (high - low)),
+                         country, name, order_id))
+
+    return {"order": list(orders), "orderitems": list(items), "shipping": shipping}
+
+
+GENERATORS = {
+    "users": users_chunk,
+    "product": product_chunk,
+    "review": review_chunk,
+    "order": order_chunk,
+}
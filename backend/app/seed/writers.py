@@ -0,0 +1,93 @@
+import csv
+import io
+import sqlite3
+
+from .generate import COLUMNS
+
+# Children before parents, for clearing.
+TABLES = ["review", "orderitems", "shipping", "order", "product", "users"]
+# Derived from the tables above; cleared with them but never written.
+DERIVED_TABLES = ["product_sentiment", "product_review_insights"]
+
+
+def _quoted(name: str) -> str:
+    return f'"{name}"'
+
+
+class SQLiteWriter:
+    """Batched executemany, one transaction per chunk. SQLite has a single
+    writer, so chunks are generated in parallel and written here serially."""
+
+    parallel = False
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        # Durability is irrelevant for a database that can be regenerated.
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=OFF")
+
+    def count(self, table: str) -> int:
+        return self.connection.execute(f"SELECT COUNT(*) FROM {_quoted(table)}").fetchone()[0]
+
+    def clear(self):
+        with self.connection:
+            for table in DERIVED_TABLES + TABLES:
+                self.connection.execute(f"DELETE FROM {_quoted(table)}")
+
+    def write(self, chunk: dict):
+        with self.connection:
+            for table, rows in chunk.items():
+                columns = COLUMNS[table]
+                self.connection.executemany(
+                    f"INSERT INTO {_quoted(table)} ({', '.join(map(_quoted, columns))}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    rows,
+                )
+
+    def finish(self):
+        self.connection.execute("ANALYZE")
+        self.connection.close()
+
+
+class PostgresWriter:
+    """COPY FROM STDIN. Each seeding process opens its own connection, so
+    chunks are generated and copied in parallel."""
+
+    parallel = True
+
+    def __init__(self, dsn: str):
+        import psycopg2
+
+        self.connection = psycopg2.connect(dsn)
+
+    def count(self, table: str) -> int:
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {_quoted(table)}")
+            return cursor.fetchone()[0]
+
+    def clear(self):
+        with self.connection, self.connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {', '.join(map(_quoted, DERIVED_TABLES + TABLES))} RESTART IDENTITY CASCADE")
+
+    def write(self, chunk: dict):
+        with self.connection, self.connection.cursor() as cursor:
+            for table, rows in chunk.items():
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY {_quoted(table)} ({', '.join(map(_quoted, COLUMNS[table]))}) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+
+    def finish(self):
+        # Ids were given explicitly, so move the serial sequences past them.
+        with self.connection, self.connection.cursor() as cursor:
+            for table in TABLES:
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{_quoted(table)}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {_quoted(table)}), 0) + 1, false)"
+                )
+            cursor.execute("ANALYZE")
+        self.connection.close()
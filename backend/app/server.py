@@ -0,0 +1,409 @@
+"""Preforking production server.
+
+::
+
+    python server.py --host 0.0.0.0 --port 8000 --workers 4
+
+The master imports the application, including pandas, scikit-learn and
+the VADER lexicon. It then freezes the garbage collector and forks the
+workers. The workers share those pages with the master copy-on-write, so
+each one's unique memory (USS) is only what it allocates after the fork.
+``uvicorn --workers`` instead starts fresh interpreters that each import
+everything again.
+
+Signals to the master:
+
+- ``TERM`` / ``INT``: stop. Workers finish their in-flight requests, for
+  up to ``--graceful-timeout`` seconds.
+- ``HUP``: reload. The master checks that the current code imports, then
+  re-executes itself. It keeps its PID and the listening socket. The new
+  image forks fresh workers and stops the old ones only once the new ones
+  are serving, so no connection is refused.
+- ``USR1``: log RSS, PSS and USS of the master and every worker.
+
+Cache invalidations and events are shared between workers through Redis
+when ``REDIS_URL`` is set; login rate limits are too when
+``RATE_LIMIT_BACKEND`` is ``redis``, its default then. Otherwise each
+worker keeps its own (see ``unshared_state``), so the default is a single
+worker, and asking for more logs a warning naming what is not shared.
+
+The master also forks ``--job-workers`` background job workers (see
+``jobs/worker.py``), which share the preloaded modules in the same way.
+A worker of either kind that exits unexpectedly is replaced.
+"""
+import argparse
+import gc
+import logging
+import os
+import resource
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import uvicorn
+
+from config.config import settings
+from monitoring.prometheus import metrics
+
+LISTEN_FD_ENV = "ECOM_SERVER_FD"
+OLD_WORKERS_ENV = "ECOM_SERVER_OLD_WORKERS"
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+logger = logging.getLogger("ecom.server")
+
+
+def listening_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """The socket inherited across a reload, or a new one."""
+    fd = os.environ.pop(LISTEN_FD_ENV, None)
+    if fd is not None:
+        sock = socket.socket(fileno=int(fd))
+    else:
+        sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def raise_open_files_limit():
+    """Allow as many open files as the hard limit; each event stream holds a socket."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            # An unlimited hard limit is still capped by the kernel's nr_open.
+            logger.warning("could not raise the open files limit from %d", soft)
+
+
+def unshared_state() -> list:
+    """What each worker would keep to itself instead of sharing through Redis."""
+    unshared = []
+    if not settings.REDIS_URL:
+        unshared += ["cache invalidations", "events"]
+    if settings.RATE_LIMIT_ENABLED == "True" and settings.RATE_LIMIT_BACKEND != "redis":
+        # The login limit would be multiplied by the number of workers.
+        unshared.append("login rate limits")
+    return unshared
+
+
+def default_workers() -> int:
+    """One per CPU, when the workers share all their state through Redis; otherwise one."""
+    return 1 if unshared_state() else os.cpu_count()
+
+
+def preload():
+    """Import the app and everything it loads, ready to be shared by forked workers."""
+    import main
+    from config.pool import engines
+
+    # Connections opened during import (create_all) must not be shared by
+    # workers. close=False drops them from the pool without talking to the
+    # database, which the async engines could not do from here.
+    for engine in engines.values():
+        engine.dispose(close=False)
+
+    gc.collect()
+    # Everything allocated so far moves to a permanent generation the collector
+    # never scans. Collections in the workers would otherwise write to these
+    # objects' headers and un-share their pages.
+    gc.freeze()
+    return main.app
+
+
+class WorkerServer(uvicorn.Server):
+    """Tells the master through a pipe once it accepts connections."""
+
+    def __init__(self, config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            os.write(self.ready_fd, b"1")
+        os.close(self.ready_fd)
+
+    async def shutdown(self, sockets=None):
+        from config.events import hub
+
+        # Event streams never finish on their own; end them so that they do
+        # not hold up the graceful shutdown. Clients reconnect elsewhere.
+        hub.close()
+        await super().shutdown(sockets=sockets)
+
+
+def memory_table(pids) -> str:
+    from monitoring.prometheus import memory_usage
+
+    lines = [f"{'pid':>8} {'role':<8} {'rss MiB':>8} {'pss MiB':>8} {'uss MiB':>8}"]
+    for role, pid in pids:
+        usage = memory_usage(pid)
+        if usage:
+            lines.append(f"{pid:>8} {role:<8} {usage['rss'] / 2**20:8.1f} "
+                         f"{usage['pss'] / 2**20:8.1f} {usage['uss'] / 2**20:8.1f}")
+    return "\n".join(lines)
+
+
+class Master:
+    def __init__(self, app, sock: socket.socket, args):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers = {}  # pid -> read end of its ready pipe, None once ready
+        self.job_workers = set()
+        self.retiring = set()
+        self.stopping = False
+        self.signals = []
+        self.crashes = []
+
+    # Workers
+
+    def spawn(self) -> int:
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            self._run_worker(ready_w)
+        os.close(ready_w)
+        self.workers[pid] = ready_r
+        return pid
+
+    @staticmethod
+    def _reset_signals():
+        for signum in (signal.SIGHUP, signal.SIGUSR1, signal.SIGCHLD, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        signal.set_wakeup_fd(-1)
+
+    def _run_worker(self, ready_fd: int):
+        self._reset_signals()
+        code = 0
+        try:
+            config = uvicorn.Config(
+                self.app,
+                log_level=self.args.log_level,
+                access_log=self.args.access_log,
+                timeout_graceful_shutdown=self.args.graceful_timeout,
+                # Behind nginx the peer is the proxy; the client is in X-Forwarded-For.
+                proxy_headers=True,
+                forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+            )
+            WorkerServer(config, ready_fd).run(sockets=[self.sock])
+        except BaseException:
+            logger.exception("worker %d failed", os.getpid())
+            code = 1
+        finally:
+            # Skip the master's atexit handlers and buffered state.
+            os._exit(code)
+
+    def spawn_job_worker(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            self._reset_signals()
+            code = 0
+            try:
+                from jobs.worker import run_process
+
+                logging.basicConfig(level=self.args.log_level.upper(), format="%(levelname)s:     [jobs] %(message)s")
+                run_process()
+            except BaseException:
+                logger.exception("job worker %d failed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.job_workers.add(pid)
+        return pid
+
+    def wait_ready(self, pids, timeout: float) -> bool:
+        """Wait until every pid in ``pids`` reports that it is serving."""
+        pending = {self.workers[pid]: pid for pid in pids if self.workers.get(pid) is not None}
+        deadline = time.monotonic() + timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select(list(pending), [], [], remaining)
+            for fd in readable:
+                pid = pending.pop(fd)
+                ok = os.read(fd, 1) == b"1"
+                os.close(fd)
+                self.workers[pid] = None
+                if not ok:
+                    return False
+        return True
+
+    def stop_workers(self, pids, sig=signal.SIGTERM):
+        for pid in pids:
+            self.retiring.add(pid)
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            ready_fd = self.workers.pop(pid, None)
+            if ready_fd is not None:
+                os.close(ready_fd)
+            metrics.forget(pid)
+            is_job_worker = pid in self.job_workers
+            self.job_workers.discard(pid)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            if self.stopping:
+                continue
+            logger.warning("worker %d exited unexpectedly (status %d), starting a new one", pid, status)
+            now = time.monotonic()
+            self.crashes = [t for t in self.crashes if now - t < 10] + [now]
+            if len(self.crashes) > 2 * (self.args.workers + self.args.job_workers):
+                logger.error("workers keep crashing, shutting down")
+                self.stop()
+                return
+            if is_job_worker:
+                self.spawn_job_worker()
+            else:
+                self.spawn()
+
+    # Signals
+
+    def _on_signal(self, signum, frame):
+        self.signals.append(signum)
+
+    def install_signals(self) -> int:
+        wakeup_r, wakeup_w = os.pipe()
+        os.set_blocking(wakeup_r, False)
+        os.set_blocking(wakeup_w, False)
+        signal.set_wakeup_fd(wakeup_w)
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+        return wakeup_r
+
+    def stop(self):
+        self.stopping = True
+        self.stop_workers(self.children())
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while self.children() and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        if self.children():
+            # A job cut short here is queued again once its heartbeat goes stale.
+            logger.warning("killing %d worker(s) after the graceful timeout", len(self.children()))
+            self.stop_workers(self.children(), signal.SIGKILL)
+            self.reap()
+
+    def children(self):
+        return list(self.workers) + list(self.job_workers)
+
+    def reload(self):
+        """Re-execute the master with the current code, keeping the socket and the old workers."""
+        env = dict(os.environ, PYTHONPATH=APP_DIR)
+        check = subprocess.run([sys.executable, "-c", "import main"], env=env, capture_output=True, text=True)
+        if check.returncode != 0:
+            logger.error("not reloading, the application fails to import:\n%s", check.stderr)
+            return
+        logger.info("reloading")
+        for fd in self.workers.values():
+            if fd is not None:
+                os.close(fd)
+        env = dict(os.environ)
+        env[LISTEN_FD_ENV] = str(self.sock.fileno())
+        env[OLD_WORKERS_ENV] = ",".join(str(pid) for pid in self.children())
+        logging.shutdown()
+        os.execve(sys.executable, [sys.executable] + sys.argv, env)
+
+    def log_memory(self):
+        pids = [("master", os.getpid())] + [
+            ("retiring" if pid in self.retiring else "jobs" if pid in self.job_workers else "worker", pid)
+            for pid in sorted(self.children())
+        ]
+        logger.info("memory per process:\n%s", memory_table(pids))
+
+    # Main loop
+
+    def run(self):
+        wakeup_r = self.install_signals()
+
+        # After a reload, the previous image's workers are still our children.
+        old = [int(pid) for pid in os.environ.pop(OLD_WORKERS_ENV, "").split(",") if pid]
+        for pid in old:
+            self.workers[pid] = None
+        if not old:
+            # Snapshots of a previous run's workers would be merged into /metrics.
+            metrics.clear()
+
+        started = [self.spawn() for _ in range(self.args.workers)]
+        if self.wait_ready(started, timeout=60):
+            logger.info("%d workers serving on %s", len(started), self.sock.getsockname())
+        else:
+            logger.error("workers did not start in time")
+        if old:
+            self.stop_workers(old)
+        for _ in range(self.args.job_workers):
+            self.spawn_job_worker()
+        self.log_memory()
+
+        while not self.stopping:
+            select.select([wakeup_r], [], [], 1.0)
+            try:
+                os.read(wakeup_r, 512)
+            except BlockingIOError:
+                pass
+            signals, self.signals = self.signals, []
+            for signum in signals:
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    logger.info("shutting down")
+                    self.stop()
+                    return
+                if signum == signal.SIGHUP:
+                    self.reload()
+                elif signum == signal.SIGUSR1:
+                    self.log_memory()
+            self.reap()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preforking server for the FastAPI app.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY or default_workers())
+    parser.add_argument("--job-workers", type=int, default=settings.JOB_WORKERS)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.GRACEFUL_TIMEOUT)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", dest="access_log", action="store_false")
+    args = parser.parse_args()
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s:     [master] %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(args.log_level.upper())
+
+    unshared = unshared_state()
+    if args.workers > 1 and unshared:
+        logger.warning(
+            "%d workers, but %s stay per worker%s. Set REDIS_URL (and RATE_LIMIT_BACKEND=redis) or run one worker.",
+            args.workers, ", ".join(unshared), "; event streams are disabled" if not settings.REDIS_URL else "",
+        )
+    # Inherited by the workers, which refuse event streams they could not keep complete.
+    settings.WEB_CONCURRENCY = args.workers
+    raise_open_files_limit()
+    sock = listening_socket(args.host, args.port, args.backlog)
+    started = time.perf_counter()
+    app = preload()
+    logger.info("application loaded in %.1fs, %d objects frozen", time.perf_counter() - started, gc.get_freeze_count())
+    Master(app, sock, args).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""Settings are read when ``config`` is first imported, so the test
+environment is set here, before any test module imports the app: SQLite
+files in a throwaway directory and no Redis."""
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+os.environ.update(USE_SQLITE_DB="True", AUTO_CREATE_TABLES="True", REDIS_URL="")
+# The primary database is ./ecomfastapi.db.
+os.chdir(tempfile.mkdtemp(prefix="ecom-tests-"))
@@ -0,0 +1,38 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from monitoring.profiler import Profiler, ProfilingMiddleware, collapsed, run_in_threadpool
+
+
+def crunch():
+    deadline = time.perf_counter() + 0.3
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(1000))
+    return total
+
+
+def test_async_routes_sample_work_offloaded_to_the_threadpool(tmp_path):
+    app = FastAPI()
+
+    @app.get("/crunch")
+    async def offloaded():
+        return await run_in_threadpool(crunch)
+
+    profiler = Profiler(str(tmp_path), sample_rate=1, interval=0.005)
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            profiler.wrap(route)
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    with TestClient(app) as client:
+        assert client.get("/crunch").headers["x-profiled"] == "1"
+
+    profile = profiler.profiles["GET /crunch"]
+    stacks = collapsed({"stacks": profile.stacks}).splitlines()
+    assert any(
+        stack.startswith("offloaded (") and ";crunch (" in stack for stack in stacks
+    ), stacks
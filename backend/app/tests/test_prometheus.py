@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from monitoring.prometheus import MetricsRegistry, PrometheusMiddleware
+
+
+def test_routes_are_labelled_by_the_route_matching_path_and_method():
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
+
+    @app.get("/items/top")
+    def top():
+        return []
+
+    @app.put("/items/{itemid}")
+    def update(itemid: str):
+        return itemid
+
+    client = TestClient(app)
+    client.get("/items/top")
+    client.put("/items/top")
+    client.delete("/items/top")
+
+    middleware = app.middleware_stack
+    while not isinstance(middleware, PrometheusMiddleware):
+        middleware = middleware.app
+    # The DELETE matches no method, so it is labelled like the 405 it gets.
+    assert set(middleware._series) == {
+        ("GET", "/items/top"), ("PUT", "/items/{itemid}"), ("DELETE", "/items/top"),
+    }
+
+
+def test_scrapes_merge_live_workers_only(tmp_path):
+    def registry(pid):
+        worker = MetricsRegistry(str(tmp_path), flush_seconds=0)
+        worker.pid = pid
+        worker.describe("jobs_total", "counter", "Jobs.")
+        worker.inc("jobs_total")
+        return worker
+
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                            capture_output=True, text=True).stdout.strip()
+    registry(int(exited)).flush()
+    this = registry(os.getpid())
+
+    assert this.collect()["counter"] == {("jobs_total", ()): 1}
+    assert not os.path.exists(tmp_path / f"worker-{exited}.json")
+
+    this.clear()
+    assert os.listdir(tmp_path) == []
+
+
+def test_updates_from_threads_are_not_lost(tmp_path):
+    registry = MetricsRegistry(str(tmp_path), flush_seconds=0)
+    registry.describe("batch_size", "histogram", "Batch sizes.", (1, 10))
+
+    def work():
+        for i in range(20_000):
+            registry.inc("texts_total", (("source", str(i)),))
+            registry.observe("batch_size", (), 5)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    interval = sys.getswitchinterval()
+    # Switch threads as often as possible, so unlocked updates would interleave.
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            # Series are added meanwhile; a snapshot must not see the dict change size.
+            registry.snapshot()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert sum(cell[0] for cell in registry.counters.values()) == 80_000
+    assert registry.histogram("batch_size")[-1] == 80_000
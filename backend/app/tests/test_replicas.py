@@ -0,0 +1,112 @@
+import os
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config import replicas
+from config.database import engine
+from config.replicas import LAST_WRITE_COOKIE, ReadYourWritesMiddleware, ReplicaRouter, get_read_db
+
+
+def _label(bind, name: str):
+    with bind.begin() as connection:
+        connection.execute(text("CREATE TABLE IF NOT EXISTS served_by (name VARCHAR(20))"))
+        connection.execute(text("DELETE FROM served_by"))
+        connection.execute(text("INSERT INTO served_by VALUES (:name)"), {"name": name})
+
+
+@pytest.fixture
+def router(tmp_path, monkeypatch):
+    """Swaps in a router over two SQLite replicas; each database says which one it is."""
+
+    def make(*urls, **options):
+        router = ReplicaRouter(urls, **options)
+        for replica in router.replicas:
+            if os.path.isdir(os.path.dirname(replica.engine.url.database)):
+                _label(replica.engine, replica.name)
+        monkeypatch.setattr(replicas, "replica_router", router)
+        return router
+
+    _label(engine, "primary")
+    yield make, (f"sqlite:///{tmp_path / 'replica_0.db'}", f"sqlite:///{tmp_path / 'replica_1.db'}")
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.get("/read")
+    def read(db: Session = Depends(get_read_db)):
+        return db.execute(text("SELECT name FROM served_by")).scalar()
+
+    @app.post("/write")
+    def write():
+        return "ok"
+
+    @app.post("/fail", status_code=400)
+    def fail():
+        return "no"
+
+    return TestClient(app)
+
+
+def test_reads_go_to_replicas_in_turn(router, client):
+    make, urls = router
+    make(*urls)
+
+    assert [client.get("/read").json() for _ in range(4)] == ["replica_0", "replica_1", "replica_0", "replica_1"]
+
+
+def test_least_connections_picks_the_idle_replica(router):
+    make, urls = router
+    router = make(*urls, balancing="least_connections")
+    busy = router.replicas[0].engine.connect()
+    try:
+        assert router.pick() is router.replicas[1]
+    finally:
+        busy.close()
+
+
+def test_unreachable_replica_falls_back_to_the_primary(router, client, tmp_path):
+    make, _ = router
+    router = make(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}", cooldown=60)
+
+    assert client.get("/read").json() == "primary"
+    # Skipped until the cooldown ends, without trying to connect again.
+    assert router.pick() is None
+    assert client.get("/read").json() == "primary"
+
+
+def test_other_replica_serves_while_one_is_down(router, client, tmp_path):
+    make, urls = router
+    make(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}", urls[1], cooldown=60)
+
+    assert [client.get("/read").json() for _ in range(3)] == ["primary", "replica_1", "replica_1"]
+
+
+def test_reads_stay_on_the_primary_after_a_write(router, client, monkeypatch):
+    make, urls = router
+    make(urls[0])
+
+    assert client.get("/read").json() == "replica_0"
+    response = client.post("/write")
+    assert LAST_WRITE_COOKIE in response.cookies
+    assert client.get("/read").json() == "primary"
+
+    # Once READ_YOUR_WRITES_SECONDS have passed, reads go back to the replica.
+    monkeypatch.setattr(replicas.settings, "READ_YOUR_WRITES_SECONDS", 0)
+    assert client.get("/read").json() == "replica_0"
+
+
+def test_failed_write_does_not_stick_to_the_primary(router, client):
+    make, urls = router
+    make(urls[0])
+
+    response = client.post("/fail")
+    assert response.status_code == 400
+    assert LAST_WRITE_COOKIE not in response.cookies
+    assert client.get("/read").json() == "replica_0"
@@ -1,36 +1,60 @@
-from fastapi import APIRouter, Depends
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from config.database import get_db
+from config.config import settings
+from config.database import get_async_db, get_db
+from config.responses import rows_response
 from models.usermodels import User
-from dto.userschema import RegisterUser
-from .usersservice import UserService
+from dto.userschema import LogoutUserResponse, RegisterUser, UserOut
+from .usersservice import AsyncUserService, UserService
 from config.token import get_currentUser
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
-@router.get("/")
-@router.get("")
-def getAllUser(db: Session = Depends(get_db)):
-    return UserService.get_allUser(db=db)
+if settings.USE_ASYNC_DB == "True":
+    @router.get("/", response_model=List[UserOut])
+    @router.get("", response_model=List[UserOut])
+    async def getAllUser(db: AsyncSession = Depends(get_async_db)):
+        return rows_response(await AsyncUserService.get_allUser(db=db))
+else:
+    @router.get("/", response_model=List[UserOut])
+    @router.get("", response_model=List[UserOut])
+    def getAllUser(db: Session = Depends(get_db)):
+        return rows_response(UserService.get_allUser(db=db))
 
 
-@router.post("/")
-@router.post("")
+@router.post("/", response_model=UserOut)
+@router.post("", response_model=UserOut)
 def createUser(user: RegisterUser, db: Session = Depends(get_db)):
     return UserService.create_user(user, db)
 
 
-@router.get("/me")
+@router.get("/me", response_model=UserOut)
 def getMe(current_user: User = Depends(get_currentUser)):
     return current_user
 
 
-@router.put("/{userid}")
+@router.put("/{userid}", response_model=UserOut)
 def updateUser(userid: int, user: RegisterUser, db: Session = Depends(get_db)):
     return UserService.update_user(userid=userid, user=user, db=db)
 
 
-@router.delete("/{userid}")
+@router.delete("/{userid}", response_model=UserOut)
 def deleteUser(userid: int, db: Session = Depends(get_db)):
     return UserService.deleteUser(userid=userid, db=db)
+
+
+@router.post("/{userid}/logout", response_model=LogoutUserResponse)
+def logoutUser(
+    userid: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_currentUser),
+):
+    if not current_user.is_staff and current_user.id != userid:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
+        )
+    return UserService.logout_user(userid=userid, db=db)
@@ -2,14 +2,20 @@ from fastapi import Depends
 from config.database import get_db
 
 from models.usermodels import User
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from dto.userschema import RegisterUser
 from config.hashing import Hashing
+from config.revocation import revocation_list
+
+# Everything but the password hash.
+USER_COLUMNS = (User.id, User.name, User.email, User.is_staff, User.is_active)
 
 
 class UserService:
     def get_allUser(db: Session):
-        return db.query(User).all()
+        return db.execute(select(*USER_COLUMNS)).all()
 
     def get_user(email: str, db: Session = Depends(get_db)):
         return db.query(User).filter(User.email == email).first()
@@ -34,6 +40,17 @@ class UserService:
     def update_user(userid: int, user: RegisterUser, db: Session):
         db_userid = db.query(User).filter(User.id == userid).first()
 
+        # Tokens carry the email (their ``sub``), the role and the active flag
+        # and stand for the password they were issued against; only changing
+        # those logs the user out. A token keeping an old email would
+        # otherwise resolve to whoever registers that address next.
+        revoke = (
+            db_userid.email != user.email
+            or db_userid.is_staff != user.is_staff
+            or db_userid.is_active != user.is_active
+            or not UserService._same_password(db_userid.password, user.password)
+        )
+
         db_userid.name = user.name
         db_userid.email = user.email
         db_userid.password = Hashing.bcrypt(user.password)
@@ -42,8 +59,18 @@ class UserService:
 
         db.commit()
 
+        if revoke:
+            revocation_list.revoke_user(user_id=userid, db=db)
+
         return db_userid
 
+    def _same_password(hashed_password, plain_password) -> bool:
+        try:
+            return bool(hashed_password) and Hashing.verify(hashed_password, plain_password)
+        except ValueError:
+            # Not a hash passlib recognises (e.g. seeded placeholders).
+            return False
+
     def deleteUser(userid: int, db: Session):
         db_userid = db.query(User).filter(User.id == userid).first()
 
@@ -51,5 +78,19 @@ class UserService:
 
         db.commit()
 
+        revocation_list.revoke_user(user_id=userid, db=db)
+
         return db_userid
 
+    def logout_user(userid: int, db: Session):
+        version = revocation_list.revoke_user(user_id=userid, db=db)
+
+        return {"user_id": userid, "token_version": version}
+
+
+class AsyncUserService:
+    async def get_allUser(db: AsyncSession):
+        return (await db.execute(select(*USER_COLUMNS))).all()
+
+    async def get_user(email: str, db: AsyncSession):
+        return (await db.scalars(select(User).where(User.email == email))).first()
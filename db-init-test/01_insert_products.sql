@@ -1,14 +0,0 @@
--- INSERT statements for product table
--- Note: id is auto-increment, so it's not included in the INSERT statements
-
-INSERT INTO public.product (name, image, category, description, price, "countInStock", rating) VALUES
-('Wireless Bluetooth Headphones', 'https://example.com/images/headphones.jpg', 'Electronics', 'High-quality wireless headphones with noise cancellation', 15000, 25, 4),
-('Smartphone Case', 'https://example.com/images/phone-case.jpg', 'Accessories', 'Protective case for latest smartphone models', 2500, 50, 3),
-('Laptop Stand', 'https://example.com/images/laptop-stand.jpg', 'Accessories', 'Adjustable aluminum laptop stand for better ergonomics', 8000, 15, 5),
-('Mechanical Keyboard', 'https://example.com/images/keyboard.jpg', 'Electronics', 'RGB mechanical keyboard with Cherry MX switches', 12000, 30, 4),
-('Gaming Mouse', 'https://example.com/images/mouse.jpg', 'Electronics', 'High-precision gaming mouse with customizable RGB lighting', 6000, 40, 4),
-('USB-C Hub', 'https://example.com/images/usb-hub.jpg', 'Accessories', 'Multi-port USB-C hub with HDMI, USB 3.0, and charging', 4500, 20, 3),
-('Wireless Charger', 'https://example.com/images/wireless-charger.jpg', 'Accessories', 'Fast wireless charging pad for smartphones', 3500, 35, 4),
-('Bluetooth Speaker', 'https://example.com/images/speaker.jpg', 'Electronics', 'Portable waterproof Bluetooth speaker with 360-degree sound', 9000, 18, 5),
-('Monitor Stand', 'https://example.com/images/monitor-stand.jpg', 'Accessories', 'Height-adjustable monitor stand with cable management', 5500, 12, 4),
-('Webcam', 'https://example.com/images/webcam.jpg', 'Electronics', '4K webcam with built-in microphone and privacy shutter', 11000, 22, 4);